@@ -5,21 +5,29 @@ from typing import Any
 from django.apps import apps
 from django.contrib import admin
 from django.contrib.admin import AdminSite
-from django.db.models import Model
-from django.http import HttpRequest
+from django.db import IntegrityError, transaction
+from django.db.models import Model, QuerySet
+from django.http import HttpRequest, JsonResponse
+from django.urls import URLPattern, URLResolver, path
+from django.utils import timezone
 from solo.admin import SingletonModelAdmin
 
 from app.models import (
     AboutSection,
     ContactSubmission,
     Framework,
+    GitHubCircuitBreaker,
     GitHubStats,
+    Job,
     Language,
     Project,
     SiteConfiguration,
     Tag,
     UserProfile,
 )
+from app.services.refresh import refresh_executor
+
+SINGLETON_NAMES = {"Site Configuration", "GitHub Circuit Breaker"}
 
 
 class CustomAdminSite(AdminSite):
@@ -32,8 +40,8 @@ class CustomAdminSite(AdminSite):
         app_list = super().get_app_list(request, app_label)
         for app in app_list:
             for model in app["models"]:
-                # Site Configuration is a singleton, should not have a count
-                if model["name"] == "Site Configuration":
+                # Singletons should not have a count
+                if model["name"] in SINGLETON_NAMES:
                     continue
                 model_class = apps.get_model(
                     app["app_label"], model["object_name"]
@@ -44,6 +52,25 @@ class CustomAdminSite(AdminSite):
 
         return app_list
 
+    def get_urls(self) -> list[URLPattern | URLResolver]:
+        """Add the background refresh metrics to the admin URLs."""
+        return [
+            path(
+                "refresh-metrics/",
+                self.admin_view(self.refresh_metrics),
+                name="refresh_metrics",
+            ),
+            *super().get_urls(),
+        ]
+
+    def refresh_metrics(self, request: HttpRequest) -> JsonResponse:  # noqa: ARG002
+        """Show the queue and duration metrics of the background refreshes.
+
+        The refreshes run in each web worker process, so these are the
+        metrics of the process that served the request.
+        """
+        return JsonResponse(refresh_executor.metrics())
+
 
 class TagAdmin(admin.ModelAdmin[Tag]):
     """Define the admin interface for Tags."""
@@ -123,6 +150,7 @@ class GitHubStatsAdmin(admin.ModelAdmin[GitHubStats]):
         "open_issues",
         "open_prs",
         "last_updated",
+        "failure_count",
     )
     list_filter = ("last_updated",)
     date_hierarchy = "last_updated"
@@ -133,6 +161,8 @@ class GitHubStatsAdmin(admin.ModelAdmin[GitHubStats]):
         "open_issues",
         "open_prs",
         "last_updated",
+        "failure_count",
+        "retry_after",
     )
 
     def has_add_permission(self, _request: HttpRequest) -> bool:
@@ -173,6 +203,76 @@ class CustomSingletonModelAdmin(SingletonModelAdmin):
     inlines = [AboutSectionInline, LanguageInline, FrameworkInline]  # noqa: RUF012
 
 
+class GitHubCircuitBreakerAdmin(SingletonModelAdmin):
+    """Show the state of the GitHub circuit breaker.
+
+    Only 'opened_until' can be changed, so an open breaker can be closed
+    early once GitHub has recovered.
+    """
+
+    fields = (
+        "breaker_open",
+        "opened_until",
+        "failures",
+        "last_failure_at",
+        "last_error",
+    )
+    readonly_fields = (
+        "breaker_open",
+        "failures",
+        "last_failure_at",
+        "last_error",
+    )
+
+    @admin.display(boolean=True, description="Open")
+    def breaker_open(self, obj: GitHubCircuitBreaker) -> bool:
+        """Return True if calls to GitHub are currently blocked."""
+        return obj.is_open()
+
+
+class JobAdmin(admin.ModelAdmin[Job]):
+    """Show the background jobs that are queued or have failed."""
+
+    list_display = ("name", "status", "attempts", "run_at", "created_at")
+    list_filter = ("status", "name")
+    readonly_fields = (
+        "name",
+        "payload",
+        "dedup_key",
+        "status",
+        "attempts",
+        "max_attempts",
+        "run_at",
+        "locked_until",
+        "last_error",
+        "created_at",
+    )
+    actions = ("retry_jobs",)
+
+    def has_add_permission(self, _request: HttpRequest) -> bool:
+        """Disable add permission."""
+        return False
+
+    @admin.action(description="Retry the selected failed jobs now")
+    def retry_jobs(self, request: HttpRequest, queryset: QuerySet[Job]) -> None:
+        """Queue the selected failed jobs to run again from scratch.
+
+        Jobs whose work has been queued again since are left alone.
+        """
+        retried = 0
+        for job in queryset.filter(status=Job.Status.FAILED):
+            try:
+                with transaction.atomic():
+                    retried += Job.objects.filter(pk=job.pk).update(
+                        status=Job.Status.PENDING,
+                        attempts=0,
+                        run_at=timezone.now(),
+                    )
+            except IntegrityError:  # noqa: PERF203
+                continue
+        self.message_user(request, f"Queued {retried} jobs to run again.")
+
+
 admin_site = CustomAdminSite(name="custom_admin")
 
 admin_site.register(UserProfile)
@@ -180,4 +280,6 @@ admin_site.register(Project, ProjectAdmin)
 admin_site.register(Tag, TagAdmin)
 admin_site.register(GitHubStats, GitHubStatsAdmin)
 admin_site.register(SiteConfiguration, CustomSingletonModelAdmin)
+admin_site.register(GitHubCircuitBreaker, GitHubCircuitBreakerAdmin)
+admin_site.register(Job, JobAdmin)
 admin_site.register(ContactSubmission, ContactSubmissionAdmin)
@@ -8,5 +8,6 @@ class AppConfig(AC):
     name = "app"
 
     def ready(self) -> None:
-        """Import signals when app is ready."""
+        """Import signals and job handlers when app is ready."""
+        import app.jobs
         import app.signals  # noqa: F401
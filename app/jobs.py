@@ -0,0 +1,87 @@
+"""Handle the background jobs queued by the app.
+
+These run in the 'run_worker' management command when ``JOB_QUEUE_ENABLED``
+is set. Each handler is given the payload the job was queued with.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from app.models import ContactSubmission, GitHubStats, Project
+from app.services.email import EmailService
+from app.services.github import GitHubAPIService
+from app.services.jobs import (
+    CONTACT_EMAIL_JOB,
+    REFRESH_PROJECT_JOB,
+    REFRESH_STATS_JOB,
+    JobError,
+    job_handler,
+)
+
+
+@job_handler(REFRESH_STATS_JOB)
+def refresh_stats(payload: dict[str, Any]) -> None:
+    """Refresh the stats of the listed projects that are still due.
+
+    Args:
+        payload: The 'project_ids' to refresh.
+    """
+    projects = (
+        Project.objects.filter(pk__in=payload["project_ids"])
+        .exclude(github_repo="")
+        .select_related("github_stats")
+    )
+    due = [
+        project
+        for project in projects
+        if not hasattr(project, "github_stats")
+        or project.github_stats.needs_update()
+    ]
+    GitHubAPIService().refresh_projects(due, only_due=True)
+
+
+@job_handler(REFRESH_PROJECT_JOB)
+def refresh_project(payload: dict[str, Any]) -> None:
+    """Fetch the stats for a project whose repo was added or changed.
+
+    Args:
+        payload: The 'project_id' to refresh.
+
+    Raises:
+        JobError: If the refresh could not be claimed, so it is retried. A
+            refresh of the old repo may still be in flight, or GitHub cannot
+            be called right now.
+    """
+    project_id = payload["project_id"]
+    project = (
+        Project.objects.filter(pk=project_id).exclude(github_repo="").first()
+    )
+    if project is None:
+        return
+
+    # Validators stored for the old repo must not be sent for the new one
+    GitHubStats.objects.filter(project_id=project_id).update(validators={})
+    if not GitHubAPIService().refresh_projects([project]):
+        msg = f"Could not claim the refresh of project {project_id}"
+        raise JobError(msg)
+
+
+@job_handler(CONTACT_EMAIL_JOB)
+def send_contact_email(payload: dict[str, Any]) -> None:
+    """Send the notification email for a contact form submission.
+
+    Args:
+        payload: The 'submission_id' to send the email for.
+
+    Raises:
+        JobError: If the email could not be sent, so it is retried.
+    """
+    submission = ContactSubmission.objects.filter(
+        pk=payload["submission_id"]
+    ).first()
+    if submission is not None and not EmailService.send_contact_email(
+        submission
+    ):
+        msg = f"Could not send the email for submission {submission.pk}"
+        raise JobError(msg)
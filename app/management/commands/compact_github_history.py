@@ -0,0 +1,21 @@
+"""Downsample old GitHub stats history and delete expired points."""
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from app.models import GitHubStatsHistory
+from app.services.history import compact_history
+
+
+class Command(BaseCommand):
+    """Compact the GitHub stats history, run daily from cron."""
+
+    help = "Downsample old GitHub stats history and delete expired points."
+
+    def handle(self, *_args: Any, **_options: Any) -> None:  # noqa: ANN401
+        """Called when the command is run."""
+        removed = compact_history()
+        for resolution, count in removed.items():
+            label = GitHubStatsHistory.Resolution(resolution).label
+            self.stdout.write(f"{label}: removed {count} points")
@@ -0,0 +1,28 @@
+"""Show the remaining GitHub API rate limit budget for each bucket."""
+
+from datetime import datetime, timezone
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from app.services.github import GitHubAPIService
+
+
+class Command(BaseCommand):
+    """Print the GitHub rate limit budget, for monitoring."""
+
+    help = "Show the remaining GitHub API rate limit for each bucket."
+
+    def handle(self, *_args: Any, **_options: Any) -> None:  # noqa: ANN401
+        """Called when the command is run."""
+        status = GitHubAPIService().rate_limit_status()
+        if not status:
+            self.stderr.write("Could not fetch the GitHub rate limit.")
+            return
+
+        for resource, bucket in sorted(status.items()):
+            reset = datetime.fromtimestamp(bucket["reset"], tz=timezone.utc)
+            self.stdout.write(
+                f"{resource}: {bucket['remaining']}/{bucket['limit']} "
+                f"remaining, resets at {reset:%H:%M:%S} UTC"
+            )
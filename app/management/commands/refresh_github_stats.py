@@ -0,0 +1,239 @@
+"""Refresh the GitHub stats for every project, outside of any request.
+
+Run this from cron (or with '--daemon' as a long-running process) and set
+'GITHUB_STATS_READ_ONLY=1' so that page views never wait on, or trigger,
+calls to the GitHub API. Add '--leader' to run it on several nodes, with only
+one of them refreshing at a time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+
+from app.services.github import (
+    GRAPHQL_BATCH_SIZE,
+    AsyncGitHubAPIService,
+    GitHubAPIService,
+)
+from app.services.leader import acquire_lease, release_lease
+
+if TYPE_CHECKING:  # pragma: no cover
+    from app.models import Project
+
+# Only the process holding this lease refreshes in '--leader' mode
+LEADER_LEASE = "refresh_github_stats"
+
+
+class Command(BaseCommand):
+    """Refresh stale GitHub stats for all projects with a repo."""
+
+    help = "Refresh the GitHub stats for every project with a repository."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the command line arguments."""
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of refreshes to run in parallel (default: 4).",
+        )
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=None,
+            help=(
+                "Refresh stats older than this many minutes, 0 to refresh "
+                "everything (default: refresh each project when its own, "
+                "adaptive TTL runs out)."
+            ),
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=0.0,
+            help=(
+                "Wait a random time of up to this many seconds before each "
+                "refresh, to spread the calls out (default: 0)."
+            ),
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="use_async",
+            help=(
+                "Fetch with the async client, sending the calls for each "
+                "repository concurrently. '--workers' then limits how many "
+                "repositories are fetched at once."
+            ),
+        )
+        parser.add_argument(
+            "--sweep",
+            action="store_true",
+            help=(
+                "First refresh every repository of the site owner "
+                "('github_username' in the site configuration) from one "
+                "listing of their repositories."
+            ),
+        )
+        parser.add_argument(
+            "--daemon",
+            action="store_true",
+            help="Keep running, refreshing stats every '--interval' seconds.",
+        )
+        parser.add_argument(
+            "--leader",
+            action="store_true",
+            help=(
+                "Only refresh while this process holds the leader lease, so "
+                "one process in the deployment runs the scheduled refreshes "
+                "however many are started."
+            ),
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=300,
+            help="Seconds between refresh runs in daemon mode (default: 300).",
+        )
+
+    def handle(self, *_args: Any, **options: Any) -> None:  # noqa: ANN401
+        """Called when the command is run."""
+        service = GitHubAPIService()
+
+        workers = max(options["workers"], 1)
+        max_age = (
+            None
+            if options["max_age"] is None
+            else timedelta(minutes=options["max_age"])
+        )
+
+        # The lease outlives a missed run, so a leader is only replaced once
+        # it has stopped
+        lease_seconds = 2 * options["interval"]
+
+        while True:
+            if options["leader"] and not acquire_lease(
+                LEADER_LEASE, lease_seconds
+            ):
+                self.stdout.write("Another process is the leader, skipping.")
+            else:
+                self.run_once(service, options, workers, max_age)
+
+            if not options["daemon"]:
+                break
+            try:
+                time.sleep(options["interval"])
+            except KeyboardInterrupt:
+                break
+
+        if options["leader"]:
+            release_lease(LEADER_LEASE)
+
+    def run_once(
+        self,
+        service: GitHubAPIService,
+        options: dict[str, Any],
+        workers: int,
+        max_age: timedelta | None,
+    ) -> None:
+        """Sweep (if asked to) and refresh every project that is due.
+
+        Args:
+            service: The GitHub API service to refresh with.
+            options: The command line options.
+            workers: The number of refreshes to run in parallel.
+            max_age: How old the stats may be before they are refreshed, or
+                None to use each project's own schedule.
+        """
+        if options["sweep"]:
+            swept = service.sweep_owner()
+            self.stdout.write(f"Swept stats for {swept} projects.")
+
+        if options["use_async"]:
+            refreshed = asyncio.run(
+                self.refresh_once_async(
+                    service.due_for_refresh(max_age),
+                    workers=workers,
+                    only_due=max_age is None,
+                )
+            )
+        else:
+            refreshed = self.refresh_once(
+                service,
+                workers=workers,
+                max_age=max_age,
+                jitter=options["jitter"],
+            )
+        self.stdout.write(f"Refreshed stats for {refreshed} projects.")
+
+    def refresh_once(
+        self,
+        service: GitHubAPIService,
+        *,
+        workers: int,
+        max_age: timedelta | None,
+        jitter: float,
+    ) -> int:
+        """Refresh every project that is due, in parallel.
+
+        The due projects are split into one batch per worker, so each worker
+        can still fetch its whole batch with a single GraphQL query.
+
+        Args:
+            service: The GitHub API service to refresh with.
+            workers: The number of refreshes to run in parallel.
+            max_age: How old the stats may be before they are refreshed, or
+                None to use each project's own schedule.
+            jitter: The maximum random delay before each refresh, in seconds.
+
+        Returns:
+            The number of projects that were refreshed.
+        """
+        projects = service.due_for_refresh(max_age)
+        if not projects:
+            return 0
+
+        batch_size = min(-(-len(projects) // workers), GRAPHQL_BATCH_SIZE)
+        batches = [
+            projects[start : start + batch_size]
+            for start in range(0, len(projects), batch_size)
+        ]
+
+        def refresh(batch: list[Project]) -> int:
+            if jitter:
+                time.sleep(random.uniform(0, jitter))  # noqa: S311
+            try:
+                return service.refresh_projects(batch, only_due=max_age is None)
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return sum(executor.map(refresh, batches))
+
+    async def refresh_once_async(
+        self, projects: list[Project], *, workers: int, only_due: bool = False
+    ) -> int:
+        """Refresh the given projects using the async GitHub service.
+
+        Args:
+            projects: The projects to refresh.
+            workers: The maximum number of repositories fetched at once.
+            only_due: Skip projects that another worker has refreshed since
+                they were found to be due.
+
+        Returns:
+            The number of projects whose stats were updated.
+        """
+        if not projects:
+            return 0
+
+        async with AsyncGitHubAPIService(concurrency=workers) as service:
+            return await service.arefresh_projects(projects, only_due=only_due)
@@ -0,0 +1,68 @@
+"""Run the background jobs queued in the database.
+
+Set 'JOB_QUEUE_ENABLED=1' so that stats refreshes and contact emails are
+queued for this command instead of being run by the web processes. Any number
+of workers can run at once.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+
+from app.services.jobs import run_pending
+
+
+class Command(BaseCommand):
+    """Run queued background jobs."""
+
+    help = "Run the background jobs queued in the database."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the command line arguments."""
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=10,
+            help="Number of jobs to claim at a time (default: 10).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help=(
+                "Seconds to wait before checking again when there are no "
+                "jobs ready (default: 5)."
+            ),
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs that are ready now, then exit.",
+        )
+
+    def handle(self, *_args: Any, **options: Any) -> None:  # noqa: ANN401
+        """Called when the command is run."""
+        batch = max(options["batch"], 1)
+        total = 0
+
+        while True:
+            try:
+                ran = run_pending(batch)
+            finally:
+                close_old_connections()
+            total += ran
+
+            if ran:
+                continue
+            if options["once"]:
+                break
+            try:
+                time.sleep(options["interval"])
+            except KeyboardInterrupt:
+                break
+
+        self.stdout.write(f"Ran {total} jobs.")
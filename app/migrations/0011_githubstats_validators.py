@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_aboutsection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubstats',
+            name='validators',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='aboutsection',
+            name='content',
+            field=models.TextField(help_text='Content can include limited HTML tags.'),
+        ),
+    ]
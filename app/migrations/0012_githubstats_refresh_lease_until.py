@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_githubstats_validators'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubstats',
+            name='refresh_lease_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_githubstats_refresh_lease_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubstats',
+            name='last_webhook_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
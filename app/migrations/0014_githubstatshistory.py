@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_githubstats_last_webhook_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GitHubStatsHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('resolution', models.CharField(choices=[('raw', 'Raw'), ('hour', 'Hourly'), ('day', 'Daily'), ('week', 'Weekly')], default='raw', max_length=4)),
+                ('stars', models.IntegerField(default=0)),
+                ('forks', models.IntegerField(default=0)),
+                ('open_issues', models.IntegerField(default=0)),
+                ('open_prs', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats_history', to='app.project')),
+            ],
+            options={
+                'verbose_name_plural': 'GitHub Stats History',
+                'ordering': ('recorded_at',),
+                'indexes': [models.Index(fields=['project', 'recorded_at'], name='app_githubs_project_067d91_idx'), models.Index(fields=['resolution', 'recorded_at'], name='app_githubs_resolut_42890c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_githubstatshistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GitHubCircuitBreaker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('failures', models.PositiveIntegerField(default=0, help_text='Consecutive failed calls when the breaker last opened')),
+                ('opened_until', models.DateTimeField(blank=True, help_text='No calls are made to GitHub until this time', null=True)),
+                ('last_failure_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'verbose_name': 'GitHub Circuit Breaker',
+            },
+        ),
+        migrations.AddField(
+            model_name='githubstats',
+            name='failure_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='githubstats',
+            name='retry_after',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:08
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+from django.db.models import F
+
+
+def schedule_existing_stats(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """Schedule the next refresh of every existing stats row.
+
+    Rows are due ``GITHUB_STATS_TTL_MINUTES`` after they were last updated,
+    or later if they are fed by webhooks or backing off after failures.
+    """
+    GitHubStats = apps.get_model("app", "GitHubStats")
+    ttl = timedelta(minutes=settings.GITHUB_STATS_TTL_MINUTES)
+    webhook_stale = timedelta(hours=settings.GITHUB_WEBHOOK_STALE_HOURS)
+    GitHubStats.objects.update(next_due_at=F("last_updated") + ttl)
+    GitHubStats.objects.filter(
+        last_webhook_at__gt=F("next_due_at") - webhook_stale
+    ).update(next_due_at=F("last_webhook_at") + webhook_stale)
+    GitHubStats.objects.filter(retry_after__gt=F("next_due_at")).update(
+        next_due_at=F("retry_after")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_github_failure_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubstats',
+            name='next_due_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='githubstats',
+            name='ttl_minutes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(
+            schedule_existing_stats, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:17
+
+from urllib.parse import urlparse
+
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+# A copy of 'app.models.parse_github_repo' as it was when this migration was
+# written, so that later changes to the model code do not change it.
+GITHUB_HOSTS = frozenset({"github.com", "www.github.com"})
+
+
+def parse_github_repo(url: str) -> tuple[str, str]:
+    """Extract the normalized owner and name of a GitHub repository URL."""
+    parsed = urlparse(url)
+    if parsed.hostname not in GITHUB_HOSTS:
+        return "", ""
+    parts = parsed.path.strip("/").split("/")
+    if len(parts) < 2 or not parts[0] or not parts[1]:  # noqa: PLR2004
+        return "", ""
+    return parts[0].lower(), parts[1].lower().removesuffix(".git")
+
+
+def fill_github_repo(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """Parse the GitHub repository of every existing project."""
+    Project = apps.get_model("app", "Project")
+    projects = list(Project.objects.exclude(repo=""))
+    for project in projects:
+        project.github_owner, project.github_repo = parse_github_repo(
+            project.repo
+        )
+    Project.objects.bulk_update(projects, ["github_owner", "github_repo"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0017_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='github_owner',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='github_repo',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['github_owner', 'github_repo'], name='app_project_github__08984b_idx'),
+        ),
+        migrations.RunPython(fill_github_repo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:27
+
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+from django.db.models import F
+
+
+def fill_sort_key(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    """Copy the priority of every existing project to its sort key."""
+    Project = apps.get_model("app", "Project")
+    Project.objects.filter(priority__isnull=False).update(
+        sort_key=F("priority")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='sort_key',
+            field=models.IntegerField(default=999999, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['sort_key', 'created_at'], name='app_project_sort_ke_6c594d_idx'),
+        ),
+        migrations.RunPython(fill_sort_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_project_sort_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='githubstats',
+            name='refresh_lease_token',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -3,14 +3,19 @@
 from __future__ import annotations
 
 from datetime import timedelta
-from typing import Any
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlparse
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
 from django.utils.text import slugify
 from solo.models import SingletonModel
 
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Collection, Iterable
+
 
 class ContactSubmission(models.Model):
     """Store contact form submissions."""
@@ -30,6 +35,71 @@ class ContactSubmission(models.Model):
         return f"Message from {self.name} ({self.email})"
 
 
+class Job(models.Model):
+    """Store a unit of background work for the 'run_worker' command.
+
+    Jobs that succeed are deleted. Jobs that fail are retried with an
+    exponential backoff, and kept as failed once they run out of attempts.
+    """
+
+    class Status(models.TextChoices):
+        """Where a job is in its lifecycle."""
+
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        FAILED = "failed", "Failed"
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    # Only one pending job may have a given key, so duplicates are dropped
+    dedup_key = models.CharField(max_length=255, blank=True, default="")
+    status = models.CharField(
+        max_length=7, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    # A running job whose worker died is picked up again after this
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta class for Job model."""
+
+        indexes = (
+            # Finding the jobs that are ready to run
+            models.Index(fields=("status", "run_at")),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=("dedup_key",),
+                condition=models.Q(status="pending") & ~models.Q(dedup_key=""),
+                name="unique_pending_job_dedup_key",
+            ),
+        )
+
+    def __str__(self) -> str:
+        """Return the string representation of the Job."""
+        return f"{self.name} ({self.status})"
+
+
+class Lease(models.Model):
+    """Record which process holds a named, expiring lease.
+
+    Used to elect a single leader among all the processes in a deployment.
+    A lease that is not renewed before 'expires_at' can be taken over.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    holder = models.CharField(max_length=255)
+    expires_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        """Return the string representation of the Lease."""
+        return f"{self.name} held by {self.holder}"
+
+
 class UserProfile(AbstractUser):
     """Define the user profile model."""
 
@@ -46,6 +116,27 @@ class GitHubStats(models.Model):
     open_issues = models.IntegerField(default=0)
     open_prs = models.IntegerField(default=0)
     last_updated = models.DateTimeField(default=timezone.now)
+    # HTTP cache validators (ETag / Last-Modified) for each API endpoint, so
+    # that refreshes can be sent as conditional requests.
+    validators = models.JSONField(default=dict, blank=True)
+    # Set while a worker is refreshing these stats, so that other workers do
+    # not start the same refresh. Expires on its own if the worker dies.
+    refresh_lease_until = models.DateTimeField(null=True, blank=True)
+    # Identifies the claim that took the lease, so a worker claiming many
+    # rows at once can tell which ones it got.
+    refresh_lease_token = models.UUIDField(null=True, blank=True)
+    # When the last GitHub webhook for this repo was received. Stats kept up
+    # to date by webhooks are not polled.
+    last_webhook_at = models.DateTimeField(null=True, blank=True)
+    # Consecutive failed refreshes (repo deleted or private, GitHub errors).
+    # Refreshes are backed off exponentially until 'retry_after'.
+    failure_count = models.PositiveIntegerField(default=0)
+    retry_after = models.DateTimeField(null=True, blank=True)
+    # How long these stats stay fresh. This grows while the repo is quiet and
+    # resets when it changes, and 'next_due_at' is when the next refresh is
+    # due. Both are set when the row is created.
+    ttl_minutes = models.PositiveIntegerField(null=True, blank=True)
+    next_due_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     class Meta:
         """Meta class for GitHubStats model."""
@@ -56,12 +147,180 @@ class GitHubStats(models.Model):
         """Return the string representation of the GitHubStats."""
         return f"Stats for {self.project.title}"
 
+    def save(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        """Save the stats, scheduling the first refresh of a new row."""
+        if self._state.adding and self.next_due_at is None:
+            self.schedule_next(changed=True)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def for_projects(cls, projects: Iterable[Project]) -> list[GitHubStats]:
+        """Build new stats rows for projects, for a bulk insert.
+
+        Like `save`, each row has its first refresh scheduled.
+
+        Args:
+            projects: The projects to build stats rows for.
+
+        Returns:
+            The unsaved stats rows.
+        """
+        rows = [cls(project=project) for project in projects]
+        for row in rows:
+            row.schedule_next(changed=True)
+        return rows
+
+    @staticmethod
+    def due_filter(prefix: str = "") -> models.Q:
+        """Return a filter for the stats that are due, like `needs_update`.
+
+        Stats fed by webhooks or backing off after failures already have
+        'next_due_at' pushed back to match.
+
+        Args:
+            prefix: The path to the stats from the model being filtered, for
+                example ``"github_stats__"`` when filtering projects.
+
+        Returns:
+            A Q object matching the stats that are due for a refresh.
+        """
+        return models.Q(**{f"{prefix}next_due_at__lte": timezone.now()})
+
     def needs_update(self) -> bool:
-        """Check if stats need updating (older than 10 minutes)."""
-        if not self.last_updated:
-            return True
-        age = timezone.now() - self.last_updated
-        return age > timedelta(minutes=30)
+        """Check if stats need updating.
+
+        Stats are due at 'next_due_at', which is set when the row is created
+        and pushed back by every refresh, webhook and failure.
+        """
+        return (
+            self.next_due_at is not None and timezone.now() >= self.next_due_at
+        )
+
+    def schedule_next(self, *, changed: bool) -> None:
+        """Work out when the next refresh is due, without saving.
+
+        The TTL doubles after each refresh that found nothing had changed, up
+        to ``GITHUB_STATS_MAX_TTL_MINUTES``, and goes back to
+        ``GITHUB_STATS_TTL_MINUTES`` as soon as something does change.
+
+        Args:
+            changed: Whether the refresh that was just made changed any stats.
+        """
+        if changed or not self.ttl_minutes:
+            self.ttl_minutes = settings.GITHUB_STATS_TTL_MINUTES
+        else:
+            self.ttl_minutes = min(
+                self.ttl_minutes * 2, settings.GITHUB_STATS_MAX_TTL_MINUTES
+            )
+        self.next_due_at = self.last_updated + timedelta(
+            minutes=self.ttl_minutes
+        )
+
+    def record_failure(self) -> None:
+        """Record a failed refresh and back off exponentially, without saving.
+
+        The first failure waits ``GITHUB_FAILURE_BACKOFF_SECONDS`` before the
+        next attempt, doubling with each further failure up to
+        ``GITHUB_FAILURE_BACKOFF_MAX_SECONDS``.
+        """
+        self.failure_count += 1
+        delay = min(
+            settings.GITHUB_FAILURE_BACKOFF_SECONDS
+            * 2 ** min(self.failure_count - 1, 30),
+            settings.GITHUB_FAILURE_BACKOFF_MAX_SECONDS,
+        )
+        self.retry_after = timezone.now() + timedelta(seconds=delay)
+        self.next_due_at = self.retry_after
+
+
+class GitHubStatsHistory(models.Model):
+    """Store a point-in-time snapshot of a project's GitHub statistics.
+
+    A raw point is appended on every refresh. Older points are downsampled to
+    hourly, daily and then weekly points by the 'compact_github_history'
+    management command.
+    """
+
+    class Resolution(models.TextChoices):
+        """How much time a history point stands for."""
+
+        RAW = "raw", "Raw"
+        HOURLY = "hour", "Hourly"
+        DAILY = "day", "Daily"
+        WEEKLY = "week", "Weekly"
+
+    project = models.ForeignKey(
+        "Project", on_delete=models.CASCADE, related_name="stats_history"
+    )
+    recorded_at = models.DateTimeField(default=timezone.now)
+    resolution = models.CharField(
+        max_length=4, choices=Resolution.choices, default=Resolution.RAW
+    )
+    stars = models.IntegerField(default=0)
+    forks = models.IntegerField(default=0)
+    open_issues = models.IntegerField(default=0)
+    open_prs = models.IntegerField(default=0)
+
+    class Meta:
+        """Meta class for GitHubStatsHistory model."""
+
+        verbose_name_plural = "GitHub Stats History"
+        ordering = ("recorded_at",)
+        indexes = (
+            # Range queries for a single project (trends, sparklines)
+            models.Index(fields=("project", "recorded_at")),
+            # Finding old points to compact
+            models.Index(fields=("resolution", "recorded_at")),
+        )
+
+    def __str__(self) -> str:
+        """Return the string representation of the GitHubStatsHistory."""
+        return f"Stats for {self.project.title} at {self.recorded_at}"
+
+
+GITHUB_HOSTS = frozenset({"github.com", "www.github.com"})
+
+
+def parse_github_repo(url: str) -> tuple[str, str]:
+    """Extract the normalized owner and name of a GitHub repository URL.
+
+    Args:
+        url: The repository URL.
+
+    Returns:
+        The lowercased owner and repository name, or two empty strings if the
+        URL does not point at a repository on GitHub.
+    """
+    parsed = urlparse(url)
+    if parsed.hostname not in GITHUB_HOSTS:
+        return "", ""
+    parts = parsed.path.strip("/").split("/")
+    if len(parts) < 2 or not parts[0] or not parts[1]:  # noqa: PLR2004
+        return "", ""
+    return parts[0].lower(), parts[1].lower().removesuffix(".git")
+
+
+# The sort key of projects without a priority, which puts them after the rest
+UNPRIORITIZED_SORT_KEY = 999999
+
+# The number of projects shown on each page of the project grid
+PROJECT_PAGE_SIZE = 6
+
+
+class ProjectManager(models.Manager["Project"]):
+    """Manager for the Project model."""
+
+    def ordered(self) -> models.QuerySet[Project]:
+        """Return all projects in the order they are displayed.
+
+        1. First, projects with priority field set, ordered by priority
+        2. Then, projects without priority, ordered by creation date
+
+        Projects created at the same moment are ordered by primary key, so
+        the order is stable for paging through. This is served by the index
+        on ``(sort_key, created_at)``.
+        """
+        return self.order_by("sort_key", "created_at", "pk")
 
 
 class Project(models.Model):
@@ -73,6 +332,13 @@ class Project(models.Model):
     title = models.CharField(max_length=100)
     details = models.TextField(blank=True, default="")
     repo = models.URLField(blank=True)
+    # Parsed from 'repo' on save, and empty unless it is a GitHub repository
+    github_owner = models.CharField(
+        max_length=100, blank=True, default="", editable=False
+    )
+    github_repo = models.CharField(
+        max_length=100, blank=True, default="", editable=False
+    )
     website = models.URLField(blank=True)
     tags: models.ManyToManyField[Tag, Project] = models.ManyToManyField(
         "Tag", blank=True, related_name="projects"
@@ -80,14 +346,90 @@ class Project(models.Model):
     priority = models.IntegerField(
         blank=True, null=True, help_text="Lower numbers appear first"
     )
+    # Copied from 'priority' on save, so the display order can use an index
+    sort_key = models.IntegerField(
+        default=UNPRIORITIZED_SORT_KEY, editable=False
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectManager()
+
+    # The repo as last loaded or saved, or None if that is not known
+    _loaded_repo: str | None = None
+
+    class Meta:
+        """Meta class for Project model."""
+
+        indexes = (
+            # Finding the projects for a repository, or all of an owner's
+            models.Index(fields=("github_owner", "github_repo")),
+            # Listing projects in display order
+            models.Index(fields=("sort_key", "created_at")),
+        )
+
     def __str__(self) -> str:
         """Return the string representation of the Project."""
         return self.title
 
+    def save(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        """Save the project, keeping the fields derived from others in step.
+
+        The values are set by `set_derived_fields`, from a ``pre_save``
+        receiver so that ``loaddata`` sets them too. This only makes sure
+        they are written along with the fields they come from.
+        """
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if "repo" in update_fields:
+                update_fields |= {"github_owner", "github_repo"}
+            if "priority" in update_fields:
+                update_fields.add("sort_key")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+        self._loaded_repo = self.repo
+
+    def set_derived_fields(self) -> None:
+        """Work out the fields copied or parsed from others, without saving."""
+        self.github_owner, self.github_repo = parse_github_repo(self.repo)
+        self.sort_key = (
+            UNPRIORITIZED_SORT_KEY if self.priority is None else self.priority
+        )
+
+    @classmethod
+    def from_db(
+        cls,
+        db: str | None,
+        field_names: Collection[str],
+        values: Collection[Any],
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Project:
+        """Load a project from the database, remembering its repo."""
+        project: Project = super().from_db(db, field_names, values, **kwargs)
+        # A deferred repo is not read, which would cost a query per project
+        project._loaded_repo = project.__dict__.get("repo")
+        return project
+
+    def repo_changed(self, update_fields: Collection[str] | None) -> bool:
+        """Return True if the repo differs from when it was loaded or saved.
+
+        If the repo was deferred when the project was loaded, it only counts
+        as changed when it is saved by name in `update_fields`.
+
+        Args:
+            update_fields: The fields being saved, or None for all of them.
+        """
+        if self._loaded_repo is None:
+            return update_fields is not None and "repo" in update_fields
+        return self.repo != self._loaded_repo
+
+    @property
+    def on_github(self) -> bool:
+        """Return True if the project's repo is a GitHub repository."""
+        return bool(self.github_owner and self.github_repo)
+
     def get_or_create_stats(self) -> GitHubStats:
         """Get or create GitHub stats for this project."""
         stats, _ = GitHubStats.objects.get_or_create(project=self)
@@ -146,6 +488,40 @@ class SiteConfiguration(SingletonModel):
         verbose_name = "Site Configuration"
 
 
+class GitHubCircuitBreaker(SingletonModel):
+    """Record the state of the GitHub API circuit breaker.
+
+    After ``GITHUB_BREAKER_THRESHOLD`` consecutive failures (server errors or
+    network problems) the breaker opens, and no calls are made to GitHub
+    until ``opened_until``. Clear that field in the admin to close it early.
+    """
+
+    failures = models.PositiveIntegerField(
+        default=0,
+        help_text="Consecutive failed calls when the breaker last opened",
+    )
+    opened_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="No calls are made to GitHub until this time",
+    )
+    last_failure_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.CharField(max_length=255, blank=True)
+
+    def __str__(self) -> str:
+        """String representation of this model."""
+        return "GitHub Circuit Breaker"
+
+    class Meta:
+        """Configure the GitHubCircuitBreaker model."""
+
+        verbose_name = "GitHub Circuit Breaker"
+
+    def is_open(self) -> bool:
+        """Check if calls to GitHub are currently blocked."""
+        return bool(self.opened_until and self.opened_until > timezone.now())
+
+
 class Language(models.Model):
     """Model to contain the coding languages we can use."""
 
@@ -0,0 +1,115 @@
+"""Stop calling the GitHub API while it is failing."""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.utils import timezone
+
+from app.models import GitHubCircuitBreaker
+
+if TYPE_CHECKING:  # pragma: no cover
+    from datetime import datetime
+
+# How long the stored state is trusted before it is read again
+STATE_CACHE_SECONDS = 5
+
+
+class CircuitBreaker:
+    """A circuit breaker for the GitHub API.
+
+    Each process counts its own consecutive failures (server errors and
+    network problems) in memory. Once ``GITHUB_BREAKER_THRESHOLD`` is reached
+    the breaker opens for ``GITHUB_BREAKER_COOLDOWN_SECONDS`` and the state is
+    written to the ``GitHubCircuitBreaker`` singleton, where it is shown in
+    the admin. Every process follows the stored state, read at most once
+    every ``STATE_CACHE_SECONDS``, so a breaker opened by one worker pauses
+    them all, and clearing it in the admin closes it early.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a closed breaker."""
+        self._failures = 0
+        self._opened_until: datetime | None = None
+        self._checked_until = 0.0
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """Return True if calls to GitHub are currently blocked."""
+        with self._lock:
+            cached = time.monotonic() < self._checked_until
+            opened_until = self._opened_until
+
+        if not cached:
+            opened_until = (
+                GitHubCircuitBreaker.objects.filter(
+                    pk=GitHubCircuitBreaker.singleton_instance_id
+                )
+                .values_list("opened_until", flat=True)
+                .first()
+            )
+            self._remember(opened_until)
+
+        return opened_until is not None and opened_until > timezone.now()
+
+    def _remember(self, opened_until: datetime | None) -> None:
+        """Cache the stored state for the next ``STATE_CACHE_SECONDS``."""
+        with self._lock:
+            self._opened_until = opened_until
+            self._checked_until = time.monotonic() + STATE_CACHE_SECONDS
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call to GitHub."""
+        with self._lock:
+            was_open = self._opened_until is not None
+            self._failures = 0
+
+        if was_open:
+            self._remember(None)
+            GitHubCircuitBreaker.objects.filter(
+                pk=GitHubCircuitBreaker.singleton_instance_id
+            ).update(failures=0, opened_until=None)
+            print("GitHub API recovered, resuming calls")
+
+    def record_failure(self, error: str) -> None:
+        """Record a failed call, opening the breaker if there are too many.
+
+        A failure after the breaker has expired (the first call made to check
+        if GitHub has recovered) opens it again straight away.
+
+        Args:
+            error: A short description of the failure.
+        """
+        now = timezone.now()
+        cooldown = timedelta(seconds=settings.GITHUB_BREAKER_COOLDOWN_SECONDS)
+        with self._lock:
+            self._failures += 1
+            failures = self._failures
+            if failures < settings.GITHUB_BREAKER_THRESHOLD:
+                return
+
+        self._remember(now + cooldown)
+        GitHubCircuitBreaker.objects.update_or_create(
+            pk=GitHubCircuitBreaker.singleton_instance_id,
+            defaults={
+                "failures": failures,
+                "opened_until": now + cooldown,
+                "last_failure_at": now,
+                "last_error": error[:255],
+            },
+        )
+        print(f"GitHub API failing ({error}), pausing calls for {cooldown}")
+
+    def clear(self) -> None:
+        """Forget any failures, and the cached state, of this process."""
+        with self._lock:
+            self._failures = 0
+            self._opened_until = None
+            self._checked_until = 0.0
+
+
+circuit_breaker = CircuitBreaker()
@@ -2,45 +2,195 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import hashlib
 import os
 import re
-import threading
-from typing import TYPE_CHECKING
-from urllib.parse import urlparse
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
 
 import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F, Q
 from django.utils import timezone
-from response_codes import HTTP_200_OK
+from response_codes import (
+    HTTP_200_OK,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_401_UNAUTHORIZED,
+    HTTP_403_FORBIDDEN,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+)
+
+from app.models import GitHubStats, Project, SiteConfiguration
+from app.services.breaker import circuit_breaker
+from app.services.history import record_history
+from app.services.http import client_options, get_http_client
+from app.services.jobs import REFRESH_STATS_JOB, enqueue
+from app.services.rate_limit import rate_limits
+from app.services.refresh import refresh_executor, refresh_guard
 
 if TYPE_CHECKING:  # pragma: no cover
-    from app.models import GitHubStats, Project
+    from typing_extensions import Self
+
+
+# GitHub limits the cost of a single GraphQL query, so very large pages are
+# split into several queries of at most this many repositories each.
+GRAPHQL_BATCH_SIZE = 50
+
+# The GitHubStats fields written when a refresh completes.
+STATS_FIELDS = [
+    "stars",
+    "forks",
+    "open_issues",
+    "open_prs",
+    "last_updated",
+    "validators",
+    "failure_count",
+    "retry_after",
+    "ttl_minutes",
+    "next_due_at",
+]
+
+# A token that GitHub rejects is not tried again for this many seconds, the
+# length of a rate limit window.
+BAD_TOKEN_SKIP_SECONDS = 3600
+
+# The largest page size GitHub allows when listing repositories.
+REPO_LIST_PAGE_SIZE = 100
+
+# The GitHubStats fields written when a refresh fails.
+FAILURE_FIELDS = ["failure_count", "retry_after", "next_due_at"]
+
+GRAPHQL_REPO_FIELDS = """
+    stargazerCount
+    forkCount
+    issues(states: OPEN) { totalCount }
+    pullRequests(states: OPEN) { totalCount }
+"""
+
+
+class RateLimitedError(Exception):
+    """Raised when no more requests can be sent until a rate limit resets.
+
+    Either the recorded budget is used up, or GitHub refused a request
+    because of its rate limit. The work is deferred, rather than counted as a
+    failure of the repositories it was for.
+    """
+
+
+class NoTokenError(RateLimitedError):
+    """Raised when tokens are configured, but none can be used right now.
+
+    Every token has been rejected by GitHub or has used up its budget. The
+    request is not sent anonymously, so the work is deferred instead.
+    """
 
 
 class GitHubAPIService:
     """Service for interacting with GitHub API."""
 
     def __init__(self) -> None:
-        """Initialize the GitHub API service."""
-        self.token = os.getenv("GITHUB_PAT")
-        self.headers = (
-            {"Authorization": f"token {self.token}"} if self.token else {}
-        )
+        """Initialize the GitHub API service.
+
+        ``GITHUB_PAT`` can hold several comma-separated tokens, each with its
+        own rate limit budget. Every request is sent with the token that has
+        the most budget left.
+        """
+        self.tokens = [
+            token.strip()
+            for token in os.getenv("GITHUB_PAT", "").split(",")
+            if token.strip()
+        ]
+        self.api_url = settings.GITHUB_API_URL.rstrip("/")
+
+    @property
+    def token_labels(self) -> list[str]:
+        """Return the labels the rate limit budget of each token is kept by."""
+        return [str(number) for number in range(1, len(self.tokens) + 1)]
 
-    def parse_repo_url(self, url: str) -> tuple[str | None, str | None]:
-        """Extract owner and repo name from GitHub URL.
+    def _auth(self, resource: str) -> tuple[str, dict[str, str]]:
+        """Choose the token to send a request with.
 
         Args:
-            url: The GitHub repository URL.
+            resource: The rate limit bucket the request is charged to.
 
         Returns:
-            A tuple containing the owner and repository name, or (None, None) if
-            parsing fails.
+            The label of the chosen token and the headers to send it in. The
+            label is empty, and no token is sent, when no token is configured.
+
+        Raises:
+            NoTokenError: If tokens are configured, but every one of them is
+                being skipped or has used up its budget.
+            RateLimitedError: If no token is configured, and the anonymous
+                budget is used up.
+        """
+        if not self.tokens:
+            # Anonymous requests have a budget of their own, kept under ""
+            if rate_limits.pick_token(resource, [""]) is None:
+                raise RateLimitedError(resource)
+            return "", {}
+        label = rate_limits.pick_token(resource, self.token_labels)
+        if label is None:
+            raise NoTokenError(resource)
+        token = self.tokens[int(label) - 1]
+        return label, {"Authorization": f"token {token}"}
+
+    def _out_of_budget(self, resource: str = "core") -> bool:
+        """Return True if no request can be sent now, with or without a token.
+
+        Args:
+            resource: The rate limit bucket to check.
         """
-        path = urlparse(url).path.strip("/")
-        parts = path.split("/")
-        if len(parts) >= 2:  # noqa: PLR2004
-            return parts[0], parts[1]
-        return None, None
+        tokens = self.token_labels or [""]
+        return rate_limits.pick_token(resource, tokens) is None
+
+    @classmethod
+    def _record_limits(
+        cls, response: httpx.Response, resource: str, token: str
+    ) -> None:
+        """Record the rate limit budget of a token from a response.
+
+        A token that GitHub rejects is skipped for a while, so the requests
+        move on to the other tokens. A token that GitHub asks to wait with
+        ``Retry-After`` is skipped for as long as it asks.
+
+        Args:
+            response: The HTTP response.
+            resource: The rate limit bucket the request was charged to.
+            token: The label of the token the request was sent with.
+
+        Raises:
+            RateLimitedError: If GitHub refused the request because of its
+                rate limit.
+        """
+        rate_limits.update(response.headers, resource, token)
+        if token and response.status_code == HTTP_401_UNAUTHORIZED:
+            rate_limits.skip_token(token, time.time() + BAD_TOKEN_SKIP_SECONDS)
+
+        if cls._is_rate_limited(response):
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                rate_limits.skip_token(token, time.time() + int(retry_after))
+            raise RateLimitedError(resource)
+
+    @staticmethod
+    def _is_rate_limited(response: httpx.Response) -> bool:
+        """Return True if GitHub refused a request because of a rate limit.
+
+        Args:
+            response: The HTTP response.
+        """
+        return response.status_code in {
+            HTTP_403_FORBIDDEN,
+            HTTP_429_TOO_MANY_REQUESTS,
+        } and (
+            response.headers.get("X-RateLimit-Remaining") == "0"
+            or "Retry-After" in response.headers
+        )
 
     def get_stats_for_projects(
         self, projects: list[Project]
@@ -53,110 +203,1135 @@ class GitHubAPIService:
         Returns:
             A dictionary mapping project IDs to their GitHub statistics.
         """
-        stats_map: dict[int, GitHubStats] = {}
+        repo_projects = [project for project in projects if project.on_github]
+        stats_map = self._load_stats(repo_projects, use_loaded=True)
+        stale_projects = [
+            project
+            for project in repo_projects
+            if stats_map[project.id].needs_update()
+        ]
+
+        # When stats are refreshed by the 'refresh_github_stats' command, views
+        # only ever read what is already stored
+        if settings.GITHUB_STATS_READ_ONLY:
+            return stats_map
+
+        for project in stale_projects:
+            print(f"Triggering update for {project.repo}")
+
+        # Leave the refresh to the 'run_worker' command, which claims the
+        # projects itself when it gets to them
+        if settings.JOB_QUEUE_ENABLED:
+            if stale_projects:
+                ids = [project.id for project in stale_projects]
+                enqueue(
+                    REFRESH_STATS_JOB,
+                    {"project_ids": ids},
+                    dedup_key=self._refresh_key(ids),
+                )
+            return stats_map
+
+        # Refresh all stale projects together as one background task
+        stale_projects = self.claim_for_refresh(stale_projects, only_due=True)
+        if stale_projects:
+            key = self._refresh_key([p.id for p in stale_projects])
+            if not refresh_executor.submit(
+                key, self._refresh_claimed, stale_projects
+            ):
+                for project in stale_projects:
+                    refresh_guard.release(project.id)
+
+        return stats_map
 
+    @staticmethod
+    def _refresh_key(project_ids: list[int]) -> str:
+        """Return the key a refresh of some projects is de-duplicated by.
+
+        The IDs are hashed, so the key fits in ``Job.dedup_key`` however many
+        projects are refreshed together.
+
+        Args:
+            project_ids: The IDs of the projects being refreshed.
+
+        Returns:
+            The same key for the same projects, in any order.
+        """
+        ids = ",".join(map(str, sorted(project_ids)))
+        return "stats:" + hashlib.sha256(ids.encode()).hexdigest()
+
+    @staticmethod
+    def _load_stats(
+        projects: list[Project], *, use_loaded: bool = False
+    ) -> dict[int, GitHubStats]:
+        """Load the stats rows for a list of projects, creating missing ones.
+
+        The existing rows are read with one query, and any missing rows are
+        created together with a single bulk insert.
+
+        Args:
+            projects: The projects to load stats for.
+            use_loaded: Use the rows already loaded on the projects (with
+                ``select_related("github_stats")``) rather than reading them
+                again. Only safe when the rows are not written back.
+
+        Returns:
+            A dictionary mapping project IDs to their stats.
+        """
+        stats_map: dict[int, GitHubStats] = {}
+        unloaded: list[Project] = []
+        relation = Project.github_stats.related
         for project in projects:
-            if project.repo:
-                # Get or create stats for this project
-                stats = project.get_or_create_stats()
+            if not use_loaded or not relation.is_cached(project):
+                unloaded.append(project)
+            elif isinstance(
+                stats := relation.get_cached_value(project), GitHubStats
+            ):
                 stats_map[project.id] = stats
 
-                # If stats need updating, do it in a thread
-                if stats.needs_update():
-                    print(f"Triggering update for {project.repo}")
+        if unloaded:
+            stats_map.update(
+                (stats.project_id, stats)
+                for stats in GitHubStats.objects.filter(project__in=unloaded)
+            )
 
-                    threading.Thread(
-                        target=self._update_stats_sync,
-                        args=(project,),
-                        daemon=True,
-                    ).start()
-                else:
-                    print(f"Using current stats for {project.repo}")
+        missing = [
+            project for project in projects if project.id not in stats_map
+        ]
+        if missing:
+            # Another request may be creating the same rows, so ignore any
+            # conflicts and read back what is actually stored.
+            GitHubStats.objects.bulk_create(
+                GitHubStats.for_projects(missing), ignore_conflicts=True
+            )
+            stats_map.update(
+                (stats.project_id, stats)
+                for stats in GitHubStats.objects.filter(project__in=missing)
+            )
 
         return stats_map
 
-    def _update_stats_sync(self, project: Project) -> None:
-        """Update GitHub stats synchronously.
+    def due_for_refresh(
+        self, max_age: timedelta | None = None
+    ) -> list[Project]:
+        """Return every project with a repo whose stats are due for a refresh.
+
+        By default this uses the indexed ``next_due_at`` of each project's
+        stats, which follows its adaptive TTL and is pushed back for projects
+        fed by webhooks or backing off after failures. Projects that have no
+        stats yet are included.
+
+        Args:
+            max_age: Instead of each project's own schedule, refresh all stats
+                older than this. Projects fed by webhooks or backing off are
+                still skipped.
+
+        Returns:
+            A list of projects that need refreshing, most overdue first.
+        """
+        projects = Project.objects.exclude(github_repo="")
+        if max_age is None:
+            due = GitHubStats.due_filter("github_stats__")
+            order = F("github_stats__next_due_at").asc(nulls_first=True)
+        else:
+            now = timezone.now()
+            due = Q(github_stats__last_updated__lte=now - max_age)
+            order = F("github_stats__last_updated").asc(nulls_first=True)
+            webhook_cutoff = now - timedelta(
+                hours=settings.GITHUB_WEBHOOK_STALE_HOURS
+            )
+            projects = projects.exclude(
+                github_stats__last_webhook_at__gt=webhook_cutoff
+            ).exclude(github_stats__retry_after__gt=now)
+
+        return list(
+            projects.filter(Q(github_stats__isnull=True) | due).order_by(order)
+        )
+
+    def projects_for_repo(self, owner: str, name: str) -> list[Project]:
+        """Find the projects whose repo URL points at a GitHub repository.
 
         Args:
-            project: The project to update stats for.
+            owner: The repository owner.
+            name: The repository name.
+
+        Returns:
+            A list of matching projects (usually just one).
         """
-        owner, repo = self.parse_repo_url(project.repo)
-        if not owner or not repo:
-            return
+        return list(
+            Project.objects.filter(
+                github_owner=owner.lower(), github_repo=name.lower()
+            )
+        )
+
+    def claim_for_refresh(
+        self,
+        projects: list[Project],
+        *,
+        only_due: bool = False,
+        sweep: bool = False,
+    ) -> list[Project]:
+        """Claim as many projects for refreshing as we are allowed to.
+
+        Projects beyond the remaining API budget, and projects that are
+        already being refreshed by this or any other worker process, are left
+        out, and nothing is claimed while the circuit breaker is open. The
+        caller must refresh the claimed projects with `_refresh_claimed` (or
+        release them from the refresh guard).
+
+        Args:
+            projects: The projects that need refreshing.
+            only_due: Skip projects that another worker has refreshed since
+                they were found to be due.
+            sweep: The projects are refreshed by an owner sweep, which has
+                its own cost.
+
+        Returns:
+            The projects that were claimed.
+        """
+        if not projects or circuit_breaker.is_open():
+            return []
+
+        # Only refresh as many projects as the remaining API budget allows. The
+        # rest stay stale and are picked up later.
+        if sweep:
+            projects = self._limit_sweep_to_budget(projects)
+        else:
+            projects = self._limit_to_budget(projects)
+
+        claimed = refresh_guard.acquire_many(
+            [project.id for project in projects], only_due=only_due
+        )
+        return [project for project in projects if project.id in claimed]
+
+    def sweep_owner(self, owner: str | None = None) -> int:
+        """Refresh every project owned by one GitHub user or organization.
+
+        Instead of one call per repository, the owner's repositories are
+        listed 100 at a time, which gives the stars, forks and open issue
+        count (including pull requests) for each. Only the open pull request
+        count needs a call per repository.
+
+        Args:
+            owner: The GitHub user or organization. Defaults to the
+                ``github_username`` in the site configuration.
+
+        Returns:
+            The number of projects that were refreshed.
+        """
+        owner = owner or SiteConfiguration.get_solo().github_username
+        if not owner:
+            return 0
+
+        projects = list(
+            Project.objects.filter(github_owner=owner.lower()).exclude(
+                github_repo=""
+            )
+        )
+        if not projects or circuit_breaker.is_open():
+            return 0
+
+        # The listing is fetched first, so the pages it took, however many
+        # repositories the owner has, are charged before the budget is split
+        listing = self._list_owner_repos(owner)
+        if listing is None:
+            return 0
+        projects = [p for p in projects if p.github_repo in listing]
+        claimed = self.claim_for_refresh(projects, sweep=True)
+        if not claimed:
+            return 0
+
+        try:
+            return self._apply_listing(claimed, listing)
+        finally:
+            for project in claimed:
+                refresh_guard.release(project.id)
+
+    def _list_owner_repos(self, owner: str) -> dict[str, dict[str, Any]] | None:
+        """List every public repository of a user or organization.
+
+        Each page is charged to the rate limit as it is fetched, and the
+        listing stops once the budget is used up.
+
+        Args:
+            owner: The GitHub user or organization.
+
+        Returns:
+            The repository data from GitHub keyed by lower-cased repository
+            name, or None if the listing failed.
+        """
+        client = get_http_client()
+        url: str | None = (
+            f"{self.api_url}/users/{owner}/repos"
+            f"?per_page={REPO_LIST_PAGE_SIZE}&type=owner"
+        )
+        repos: dict[str, dict[str, Any]] = {}
+        while url:
+            try:
+                response = self._get(client, url)
+            except RateLimitedError:
+                return None
+            except httpx.HTTPError as exc:
+                circuit_breaker.record_failure(repr(exc))
+                return None
+
+            if not self._record_outcome(response):
+                return None
+            if response.status_code != HTTP_200_OK:
+                return None
+
+            for repo_data in response.json():
+                repos[repo_data["name"].lower()] = repo_data
+            url = response.links.get("next", {}).get("url")
+        return repos
+
+    def _apply_listing(
+        self, projects: list[Project], listing: dict[str, dict[str, Any]]
+    ) -> int:
+        """Update projects from a repository listing, in bulk.
+
+        Projects whose repository is not in the listing (private or renamed)
+        are left for the normal refresh.
+
+        Args:
+            projects: The claimed projects to update.
+            listing: The owner's repositories, keyed by lower-cased name.
+
+        Returns:
+            The number of projects that were updated.
+        """
+        client = get_http_client()
+        rows = self._load_stats(projects)
+
+        updated: list[GitHubStats] = []
+        for project in projects:
+            owner, repo = project.github_owner, project.github_repo
+            repo_data = listing.get(repo)
+            if not project.on_github or repo_data is None:
+                continue
+
+            row = rows[project.id]
+            try:
+                pr_response = self._get(
+                    client, self._rest_urls(owner, repo)["pulls"]
+                )
+            except RateLimitedError:
+                # The rest are left for the next sweep
+                break
+            except httpx.HTTPError as exc:
+                circuit_breaker.record_failure(repr(exc))
+                break
+            open_prs = self._open_prs_from_response(pr_response)
+            if open_prs is None:
+                continue
+
+            self._apply_stats(
+                row,
+                {
+                    "stars": repo_data.get("stargazers_count", 0),
+                    "forks": repo_data.get("forks_count", 0),
+                    # GitHub counts open pull requests as issues
+                    "open_issues": max(
+                        repo_data.get("open_issues_count", 0) - open_prs, 0
+                    ),
+                    "open_prs": open_prs,
+                },
+            )
+            updated.append(row)
+
+        if updated:
+            GitHubStats.objects.bulk_update(updated, STATS_FIELDS)
+            record_history(updated)
+            print(f"Swept stats for {len(updated)} projects")
+        return len(updated)
+
+    def refresh_projects(
+        self, projects: list[Project], *, only_due: bool = False
+    ) -> int:
+        """Refresh the stats for a list of projects in the calling thread.
+
+        Args:
+            projects: The projects to refresh.
+            only_due: Skip projects that another worker has refreshed since
+                they were found to be due.
+
+        Returns:
+            The number of projects that were refreshed.
+        """
+        claimed = self.claim_for_refresh(projects, only_due=only_due)
+        if claimed:
+            self._refresh_claimed(claimed)
+        return len(claimed)
+
+    def _refresh_claimed(self, projects: list[Project]) -> None:
+        """Refresh projects claimed from the refresh guard, then release them.
+
+        Args:
+            projects: The projects to refresh.
+        """
+        try:
+            self._update_stats_batch(projects)
+        finally:
+            for project in projects:
+                refresh_guard.release(project.id)
+
+    def _limit_to_budget(self, projects: list[Project]) -> list[Project]:
+        """Trim a list of projects to refresh to the available API budget.
+
+        With a token, the whole batch costs a single GraphQL query. Otherwise
+        each project costs two core REST calls, from the combined budget of
+        every token.
+
+        Args:
+            projects: The projects that need refreshing.
+
+        Returns:
+            The projects that can be refreshed now.
+        """
+        if rate_limits.pick_token("graphql", self.token_labels):
+            return projects
+
+        allowed = len(projects)
+        core = rate_limits.total_available("core", self.token_labels or [""])
+        if core is not None:
+            allowed = min(allowed, core // 2)
+
+        if allowed < len(projects):
+            print(
+                f"GitHub rate limit low, deferring "
+                f"{len(projects) - allowed} stats refreshes"
+            )
+        return projects[:allowed]
+
+    def _limit_sweep_to_budget(self, projects: list[Project]) -> list[Project]:
+        """Trim the projects of an owner sweep to the available API budget.
+
+        A sweep only makes core REST calls, whatever the GraphQL budget. The
+        owner's repository listing has already been fetched, and charged, so
+        what is left is one call per project.
+
+        Args:
+            projects: The owner's projects that need refreshing.
+
+        Returns:
+            The projects that can be refreshed now.
+        """
+        core = rate_limits.total_available("core", self.token_labels or [""])
+        if core is None:
+            return projects
+
+        allowed = min(core, len(projects))
+        if allowed < len(projects):
+            print(
+                f"GitHub rate limit low, deferring "
+                f"{len(projects) - allowed} swept stats refreshes"
+            )
+        return projects[:allowed]
+
+    def rate_limit_status(self) -> dict[str, dict[str, Any]]:
+        """Return the GitHub rate limit budget for each bucket.
+
+        The known state of every token is refreshed from the ``/rate_limit``
+        endpoint first. GitHub does not count calls to that endpoint against
+        the rate limit.
+
+        Returns:
+            A dictionary mapping each bucket name to its limit, remaining
+            requests and reset time.
+        """
+        client = get_http_client()
+        tokens = dict(zip(self.token_labels, self.tokens, strict=True))
+        for label, token in (tokens or {"": ""}).items():
+            headers = {"Authorization": f"token {token}"} if token else {}
+            try:
+                response = client.get(
+                    f"{self.api_url}/rate_limit", headers=headers
+                )
+            except httpx.HTTPError:
+                return rate_limits.snapshot()
+
+            if response.status_code != HTTP_200_OK:
+                with contextlib.suppress(RateLimitedError):
+                    self._record_limits(response, "core", label)
+                continue
+            resources = response.json().get("resources", {})
+            for resource, data in resources.items():
+                rate_limits.record(
+                    resource,
+                    data["limit"],
+                    data["remaining"],
+                    data["reset"],
+                    label,
+                )
+
+        return rate_limits.snapshot()
+
+    def _update_stats_batch(self, projects: list[Project]) -> None:
+        """Update GitHub stats for several projects at once.
+
+        A single aliased GraphQL query is used to fetch the stats for every
+        project. Any project that could not be fetched that way (no token
+        configured, or the GraphQL request failed) falls back to the REST API.
+        Projects that could not be fetched at all are backed off, except those
+        left once the rate limit is used up, which stay due for later.
+
+        Args:
+            projects: The projects to update stats for.
+        """
+        repos: dict[int, tuple[str, str]] = {}
+        for project in projects:
+            if project.on_github:
+                repos[project.id] = (project.github_owner, project.github_repo)
 
-        stats = self._fetch_repo_stats(owner, repo)
-        if not stats:
+        graphql_stats = self._fetch_stats_graphql(list(repos.values()))
+        rows = self._load_stats([p for p in projects if p.id in repos])
+
+        updated: list[GitHubStats] = []
+        failed: list[GitHubStats] = []
+        for project_id, (owner, repo) in repos.items():
+            row = rows[project_id]
+            if graphql_stats is None:
+                try:
+                    stats = self._fetch_repo_stats(owner, repo, row)
+                except RateLimitedError:
+                    # The rest stay stale, and are picked up later
+                    print("GitHub rate limit used up, deferring")
+                    break
+            else:
+                stats = graphql_stats.get((owner, repo))
+            if stats:
+                self._apply_stats(row, stats)
+                updated.append(row)
+            elif circuit_breaker.is_open():
+                # GitHub is down, so this is not the repository's fault
+                break
+            else:
+                row.record_failure()
+                failed.append(row)
+
+        # Write every refreshed row back in one query
+        if updated:
+            GitHubStats.objects.bulk_update(updated, STATS_FIELDS)
+            record_history(updated)
+            print(f"Updated stats for {len(updated)} projects")
+        if failed:
+            GitHubStats.objects.bulk_update(failed, FAILURE_FIELDS)
+            print(f"Could not update stats for {len(failed)} projects")
+
+    def _save_stats(
+        self,
+        project: Project,
+        stats: dict[str, int],
+        github_stats: GitHubStats | None = None,
+    ) -> None:
+        """Save freshly fetched stats to the database.
+
+        Args:
+            project: The project the stats belong to.
+            stats: The statistics returned from the GitHub API.
+            github_stats: The stats row to update. This is looked up from the
+                project if not given.
+        """
+        if github_stats is None:
+            github_stats = project.get_or_create_stats()
+        self._apply_stats(github_stats, stats)
+        github_stats.save(update_fields=STATS_FIELDS)
+        record_history([github_stats])
+        print(f"Updated stats for {project.repo}")
+
+    @staticmethod
+    def _save_failure(github_stats: GitHubStats) -> None:
+        """Back off a stats row after a failed refresh.
+
+        Failures while the circuit breaker is open are caused by GitHub, not
+        the repository, so they are not counted.
+
+        Args:
+            github_stats: The stats row that could not be refreshed.
+        """
+        if circuit_breaker.is_open():
             return
+        github_stats.record_failure()
+        github_stats.save(update_fields=FAILURE_FIELDS)
+
+    @staticmethod
+    def _apply_stats(github_stats: GitHubStats, stats: dict[str, int]) -> None:
+        """Copy freshly fetched stats onto a stats row, without saving it.
+
+        The next refresh is scheduled from whether any of the stats changed.
 
-        # Update stats in database
-        github_stats = project.get_or_create_stats()
+        Args:
+            github_stats: The stats row to update.
+            stats: The statistics returned from the GitHub API.
+        """
+        changed = any(
+            getattr(github_stats, field) != stats[field]
+            for field in ("stars", "forks", "open_issues", "open_prs")
+        )
         github_stats.stars = stats["stars"]
         github_stats.forks = stats["forks"]
         github_stats.open_issues = stats["open_issues"]
         github_stats.open_prs = stats["open_prs"]
         github_stats.last_updated = timezone.now()
-        github_stats.save()
-        print(f"Updated stats for {project.repo}")
+        github_stats.failure_count = 0
+        github_stats.retry_after = None
+        github_stats.schedule_next(changed=changed)
 
-    def _fetch_repo_stats(self, owner: str, repo: str) -> dict[str, int] | None:
+    def _fetch_repo_stats(
+        self, owner: str, repo: str, current: GitHubStats | None = None
+    ) -> dict[str, int] | None:
         """Fetch repository and PR statistics from GitHub API.
 
+        If the current stats are passed, the repository is requested with a
+        conditional request using the validators stored from the previous
+        refresh. GitHub does not count a ``304 Not Modified`` response against
+        the rate limit, and the current values are reused. Any new validators
+        are written back to ``current.validators`` (but not saved).
+
+        The open pull requests are always fetched in full. Their count comes
+        from the ``Link`` header, while the ETag only covers the newest pull
+        request, so a ``304`` would hide pull requests opened or closed since.
+
         Args:
             owner: The repository owner.
             repo: The repository name.
+            current: The existing stats for this repository, if any.
 
         Returns:
             A dictionary containing repository statistics, or None if fetching
             fails.
+
+        Raises:
+            RateLimitedError: If the rate limit is used up, so the fetch has
+                to wait.
         """
-        with httpx.Client() as client:
+        client = get_http_client()
+        validators: dict[str, Any] = (
+            current.validators if current is not None else {}
+        )
+        urls = self._rest_urls(owner, repo)
+
+        try:
             # Fetch basic repo stats
-            repo_response = client.get(
-                f"https://api.github.com/repos/{owner}/{repo}",
-                headers=self.headers,
-                timeout=10.0,
+            repo_response = self._conditional_get(
+                client, urls["repo"], validators, "repo"
             )
-
-            if repo_response.status_code != HTTP_200_OK:
+            if not self._record_outcome(repo_response):
                 return None
+            if repo_response.status_code not in {
+                HTTP_200_OK,
+                HTTP_304_NOT_MODIFIED,
+            }:
+                return None
+
+            # Fetch open PRs count
+            pr_response = self._get(client, urls["pulls"])
+        except httpx.HTTPError as exc:
+            circuit_breaker.record_failure(repr(exc))
+            return None
+        if not self._record_outcome(pr_response):
+            return None
+
+        return self._stats_from_responses(current, repo_response, pr_response)
+
+    @staticmethod
+    def _record_outcome(response: httpx.Response) -> bool:
+        """Update the circuit breaker from a GitHub API response.
+
+        Server errors count towards opening the breaker, while any other
+        response shows that GitHub is up (even a 404 for a missing repo).
+
+        Args:
+            response: The HTTP response.
+
+        Returns:
+            False if the response was a server error.
+        """
+        if response.status_code >= HTTP_500_INTERNAL_SERVER_ERROR:
+            circuit_breaker.record_failure(f"HTTP {response.status_code}")
+            return False
+        circuit_breaker.record_success()
+        return True
+
+    def _rest_urls(self, owner: str, repo: str) -> dict[str, str]:
+        """Return the REST API URLs used to fetch a repository's stats.
+
+        Args:
+            owner: The repository owner.
+            repo: The repository name.
+
+        Returns:
+            A dictionary mapping each endpoint name to its URL.
+        """
+        return {
+            "repo": f"{self.api_url}/repos/{owner}/{repo}",
+            "pulls": f"{self.api_url}/repos/{owner}/{repo}/pulls"
+            "?state=open&per_page=1",
+        }
+
+    @staticmethod
+    def _stats_from_responses(
+        current: GitHubStats | None,
+        repo_response: httpx.Response,
+        pr_response: httpx.Response,
+    ) -> dict[str, int] | None:
+        """Build the repository statistics from the REST API responses.
+
+        A ``304 Not Modified`` repository response reuses the current values.
+        GitHub's ``open_issues_count`` includes open pull requests,
+        so the open issue count is worked out by taking those away, without
+        using the search API and its much smaller rate limit.
 
+        Args:
+            current: The existing stats for this repository, if any.
+            repo_response: The response from the repository endpoint.
+            pr_response: The response from the open pull requests endpoint.
+
+        Returns:
+            A dictionary containing repository statistics, or None if the
+            repository or its open pull requests could not be fetched.
+        """
+        if repo_response.status_code == HTTP_304_NOT_MODIFIED and current:
+            stars, forks = current.stars, current.forks
+            issues_and_prs = current.open_issues + current.open_prs
+        elif repo_response.status_code == HTTP_200_OK:
             repo_data = repo_response.json()
+            stars = repo_data.get("stargazers_count", 0)
+            forks = repo_data.get("forks_count", 0)
+            issues_and_prs = repo_data.get("open_issues_count", 0)
+        else:
+            return None
 
-            # Fetch open PRs count
-            pr_response = client.get(
-                f"https://api.github.com/repos/{owner}/{repo}/pulls?state=open&per_page=1",
-                headers=self.headers,
-                timeout=10.0,
+        # Without the pull request count the issue count is wrong too
+        open_prs = GitHubAPIService._open_prs_from_response(pr_response)
+        if open_prs is None:
+            return None
+        open_issues = max(issues_and_prs - open_prs, 0)
+
+        return {
+            "stars": stars,
+            "forks": forks,
+            "open_issues": open_issues,
+            "open_prs": open_prs,
+        }
+
+    @staticmethod
+    def _open_prs_from_response(pr_response: httpx.Response) -> int | None:
+        """Return the open pull request count from a one-per-page listing.
+
+        Args:
+            pr_response: The response from the open pull requests endpoint.
+
+        Returns:
+            The number of open pull requests, or None if the listing could not
+            be fetched.
+        """
+        if pr_response.status_code != HTTP_200_OK:
+            return None
+
+        # Get total count from Link header if available
+        link_header = pr_response.headers.get("Link", "")
+        if 'rel="last"' in link_header:
+            match = re.search(r'page=(\d+)>; rel="last"', link_header)
+            return int(match.group(1)) if match else 0
+        # If no Link header with last page, count from response
+        return len(pr_response.json())
+
+    def _get(
+        self, client: httpx.Client, url: str, resource: str = "core"
+    ) -> httpx.Response:
+        """Send a GET request, without any stored validators.
+
+        Args:
+            client: The HTTP client to send the request with.
+            url: The URL to fetch.
+            resource: The rate limit bucket this request is charged to.
+
+        Returns:
+            The HTTP response.
+        """
+        token, headers = self._auth(resource)
+        response = client.get(url, headers=headers)
+        self._record_limits(response, resource, token)
+        return response
+
+    def _conditional_get(
+        self,
+        client: httpx.Client,
+        url: str,
+        validators: dict[str, Any],
+        endpoint: str,
+        resource: str = "core",
+    ) -> httpx.Response:
+        """Send a GET request using any stored validators for the endpoint.
+
+        Args:
+            client: The HTTP client to send the request with.
+            url: The URL to fetch.
+            validators: The stored validators, keyed by endpoint name. This is
+                updated in place from a successful response.
+            endpoint: The name the validators for this URL are stored under.
+            resource: The rate limit bucket this request is charged to.
+
+        Returns:
+            The HTTP response.
+        """
+        token, headers = self._conditional_headers(
+            validators, endpoint, resource
+        )
+        response = client.get(url, headers=headers)
+        self._record_response(response, validators, endpoint, resource, token)
+        return response
+
+    def _conditional_headers(
+        self, validators: dict[str, Any], endpoint: str, resource: str
+    ) -> tuple[str, dict[str, str]]:
+        """Return the request headers, including any stored validators.
+
+        Args:
+            validators: The stored validators, keyed by endpoint name.
+            endpoint: The name of the endpoint being requested.
+            resource: The rate limit bucket the request is charged to.
+
+        Returns:
+            The label of the token the request is sent with, and the headers
+            to send.
+        """
+        token, headers = self._auth(resource)
+        stored = validators.get(endpoint, {})
+        if stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored.get("last_modified"):
+            headers["If-Modified-Since"] = stored["last_modified"]
+        return token, headers
+
+    @classmethod
+    def _record_response(
+        cls,
+        response: httpx.Response,
+        validators: dict[str, Any],
+        endpoint: str,
+        resource: str,
+        token: str = "",
+    ) -> None:
+        """Record the rate limit and validators from a REST API response.
+
+        Args:
+            response: The HTTP response.
+            validators: The stored validators, updated in place.
+            endpoint: The name the validators for this URL are stored under.
+            resource: The rate limit bucket this request was charged to.
+            token: The label of the token the request was sent with.
+        """
+        cls._record_limits(response, resource, token)
+
+        if response.status_code == HTTP_200_OK:
+            new_validators = {
+                key: value
+                for key, value in (
+                    ("etag", response.headers.get("ETag")),
+                    ("last_modified", response.headers.get("Last-Modified")),
+                )
+                if value
+            }
+            if new_validators:
+                validators[endpoint] = new_validators
+            else:
+                validators.pop(endpoint, None)
+
+    def _fetch_stats_graphql(
+        self, repos: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], dict[str, int]] | None:
+        """Fetch statistics for many repositories using the GraphQL API.
+
+        Every repository is requested through its own alias in one query, so
+        a whole page of projects costs a single round trip instead of three
+        REST calls per repository.
+
+        Args:
+            repos: A list of (owner, repo) tuples.
+
+        Returns:
+            A dictionary mapping (owner, repo) to its statistics, or None if
+            the GraphQL API could not be used. Repositories that GitHub could
+            not resolve are left out of the dictionary.
+        """
+        if not repos or not rate_limits.pick_token(
+            "graphql", self.token_labels
+        ):
+            return None
+
+        results: dict[tuple[str, str], dict[str, int]] = {}
+
+        client = get_http_client()
+        for start in range(0, len(repos), GRAPHQL_BATCH_SIZE):
+            batch = repos[start : start + GRAPHQL_BATCH_SIZE]
+            query, variables = self._build_graphql_query(batch)
+
+            # Each batch is sent with the token that has the most budget left,
+            # and GraphQL cannot be used once no token is left
+            try:
+                token, headers = self._auth("graphql")
+                response = client.post(
+                    f"{self.api_url}/graphql",
+                    json={"query": query, "variables": variables},
+                    headers=headers,
+                )
+                self._record_limits(response, "graphql", token)
+            except RateLimitedError:
+                return None
+            except httpx.HTTPError as exc:
+                circuit_breaker.record_failure(repr(exc))
+                return None
+
+            if (
+                not self._record_outcome(response)
+                or response.status_code != HTTP_200_OK
+            ):
+                return None
+
+            data = response.json().get("data")
+            if not data:
+                return None
+
+            for index, key in enumerate(batch):
+                repo_data = data.get(f"r{index}")
+                if repo_data:
+                    results[key] = {
+                        "stars": repo_data["stargazerCount"],
+                        "forks": repo_data["forkCount"],
+                        "open_issues": repo_data["issues"]["totalCount"],
+                        "open_prs": repo_data["pullRequests"]["totalCount"],
+                    }
+
+        return results
+
+    @staticmethod
+    def _build_graphql_query(
+        repos: list[tuple[str, str]],
+    ) -> tuple[str, dict[str, str]]:
+        """Build an aliased GraphQL query for a batch of repositories.
+
+        Owner and repository names are passed as variables rather than being
+        interpolated into the query text.
+
+        Args:
+            repos: A list of (owner, repo) tuples.
+
+        Returns:
+            A tuple containing the query string and its variables.
+        """
+        params: list[str] = []
+        fields: list[str] = []
+        variables: dict[str, str] = {}
+
+        for index, (owner, repo) in enumerate(repos):
+            params.append(f"$o{index}: String!, $n{index}: String!")
+            fields.append(
+                f"r{index}: repository(owner: $o{index}, name: $n{index}) "
+                f"{{{GRAPHQL_REPO_FIELDS}}}"
             )
+            variables[f"o{index}"] = owner
+            variables[f"n{index}"] = repo
+
+        query = f"query({', '.join(params)}) {{ {' '.join(fields)} }}"
+        return query, variables
+
 
-            open_prs = 0
-            if pr_response.status_code == HTTP_200_OK:
-                # Get total count from Link header if available
-                link_header = pr_response.headers.get("Link", "")
-                if 'rel="last"' in link_header:
-                    match = re.search(r'page=(\d+)>; rel="last"', link_header)
-                    if match:
-                        open_prs = int(match.group(1))
-                else:
-                    # If no Link header with last page, count from response
-                    open_prs = len(pr_response.json())
-
-            # Fetch actual open issues count (excluding PRs)
-            issues_response = client.get(
-                f"https://api.github.com/search/issues?q=repo:{owner}/{repo}+is:issue+is:open&per_page=1",
-                headers=self.headers,
-                timeout=10.0,
+class AsyncGitHubAPIService(GitHubAPIService):
+    """Fetch GitHub stats concurrently using an ``httpx.AsyncClient``.
+
+    The REST calls for one repository are sent at the same time rather than
+    one after another, and many repositories are fetched at once under a
+    concurrency limit. Use it as an async context manager so the client is
+    closed afterwards::
+
+        async with AsyncGitHubAPIService() as service:
+            await service.arefresh_projects(projects)
+    """
+
+    def __init__(self, concurrency: int | None = None) -> None:
+        """Initialize the async GitHub API service.
+
+        Args:
+            concurrency: The maximum number of repositories fetched at once.
+                Defaults to the ``GITHUB_ASYNC_CONCURRENCY`` setting.
+        """
+        super().__init__()
+        self.concurrency = concurrency or settings.GITHUB_ASYNC_CONCURRENCY
+        self._client: httpx.AsyncClient | None = None
+
+    async def __aenter__(self) -> Self:
+        """Open the async HTTP client."""
+        self._client = httpx.AsyncClient(**client_options())
+        return self
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        """Close the async HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the open async client."""
+        if self._client is None:
+            msg = "AsyncGitHubAPIService must be used with 'async with'"
+            raise RuntimeError(msg)
+        return self._client
+
+    async def afetch_repo_stats(
+        self, owner: str, repo: str, current: GitHubStats | None = None
+    ) -> dict[str, int] | None:
+        """Fetch the statistics for one repository, with concurrent calls.
+
+        This is the async equivalent of `_fetch_repo_stats`.
+
+        Args:
+            owner: The repository owner.
+            repo: The repository name.
+            current: The existing stats for this repository, if any.
+
+        Returns:
+            A dictionary containing repository statistics, or None if fetching
+            fails.
+        """
+        validators: dict[str, Any] = (
+            current.validators if current is not None else {}
+        )
+        urls = self._rest_urls(owner, repo)
+
+        try:
+            repo_response, pr_response = await asyncio.gather(
+                self._aconditional_get(urls["repo"], validators, "repo"),
+                self._aget(urls["pulls"]),
             )
+        except RateLimitedError:
+            return None
+        except httpx.HTTPError as exc:
+            await sync_to_async(circuit_breaker.record_failure)(repr(exc))
+            return None
+        for response in (repo_response, pr_response):
+            if not await sync_to_async(self._record_outcome)(response):
+                return None
 
-            open_issues = 0
-            if issues_response.status_code == HTTP_200_OK:
-                issues_data = issues_response.json()
-                open_issues = issues_data.get("total_count", 0)
+        return self._stats_from_responses(current, repo_response, pr_response)
 
-            return {
-                "stars": repo_data.get("stargazers_count", 0),
-                "forks": repo_data.get("forks_count", 0),
-                "open_issues": open_issues,
-                "open_prs": open_prs,
-            }
+    async def afetch_many(
+        self, repos: list[tuple[str, str, GitHubStats | None]]
+    ) -> list[dict[str, int] | None]:
+        """Fetch the statistics for many repositories concurrently.
+
+        Args:
+            repos: A list of (owner, repo, current stats) tuples.
+
+        Returns:
+            The statistics for each repository, in the same order. An entry
+            is None if that repository could not be fetched.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(
+            owner: str, repo: str, current: GitHubStats | None
+        ) -> dict[str, int] | None:
+            async with semaphore:
+                return await self.afetch_repo_stats(owner, repo, current)
+
+        return await asyncio.gather(
+            *(fetch(owner, repo, current) for owner, repo, current in repos)
+        )
+
+    async def arefresh_projects(
+        self, projects: list[Project], *, only_due: bool = False
+    ) -> int:
+        """Refresh the stats for a list of projects concurrently.
+
+        Projects are claimed from the refresh guard exactly as for
+        `refresh_projects`, so this can safely run alongside other workers.
+
+        Args:
+            projects: The projects to refresh.
+            only_due: Skip projects that another worker has refreshed since
+                they were found to be due.
+
+        Returns:
+            The number of projects whose stats were updated.
+        """
+        claimed = await sync_to_async(self.claim_for_refresh)(
+            projects, only_due=only_due
+        )
+        try:
+            targets: list[tuple[Project, str, str, GitHubStats]] = []
+            for project in claimed:
+                if project.on_github:
+                    row = await sync_to_async(project.get_or_create_stats)()
+                    targets.append(
+                        (
+                            project,
+                            project.github_owner,
+                            project.github_repo,
+                            row,
+                        )
+                    )
+
+            results = await self.afetch_many(
+                [(owner, repo, row) for _, owner, repo, row in targets]
+            )
+
+            # Repositories that could not be fetched because the rate limit
+            # ran out are not the repositories' fault, so they are not backed
+            # off
+            out_of_budget = self._out_of_budget()
+            updated = 0
+            for (project, _, _, row), stats in zip(
+                targets, results, strict=True
+            ):
+                if stats:
+                    await sync_to_async(self._save_stats)(project, stats, row)
+                    updated += 1
+                elif not out_of_budget:
+                    await sync_to_async(self._save_failure)(row)
+            return updated
+        finally:
+            for project in claimed:
+                await sync_to_async(refresh_guard.release)(project.id)
+
+    async def _aget(self, url: str, resource: str = "core") -> httpx.Response:
+        """Send an async GET request, without any stored validators.
+
+        Args:
+            url: The URL to fetch.
+            resource: The rate limit bucket this request is charged to.
+
+        Returns:
+            The HTTP response.
+        """
+        token, headers = self._auth(resource)
+        response = await self.client.get(url, headers=headers)
+        self._record_limits(response, resource, token)
+        return response
+
+    async def _aconditional_get(
+        self,
+        url: str,
+        validators: dict[str, Any],
+        endpoint: str,
+        resource: str = "core",
+    ) -> httpx.Response:
+        """Send an async GET request using any stored validators.
+
+        Args:
+            url: The URL to fetch.
+            validators: The stored validators, keyed by endpoint name. This is
+                updated in place from a successful response.
+            endpoint: The name the validators for this URL are stored under.
+            resource: The rate limit bucket this request is charged to.
+
+        Returns:
+            The HTTP response.
+        """
+        token, headers = self._conditional_headers(
+            validators, endpoint, resource
+        )
+        response = await self.client.get(url, headers=headers)
+        self._record_response(response, validators, endpoint, resource, token)
+        return response
@@ -0,0 +1,174 @@
+"""Record and compact the history of each project's GitHub stats."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from app.models import GitHubStatsHistory
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable
+
+    from django.db.models import QuerySet
+
+    from app.models import GitHubStats, Project
+
+Resolution = GitHubStatsHistory.Resolution
+
+HISTORY_FIELDS = ("stars", "forks", "open_issues", "open_prs")
+
+
+def record_history(rows: Iterable[GitHubStats]) -> int:
+    """Append a raw history point for each refreshed stats row.
+
+    Args:
+        rows: The stats rows that were just refreshed.
+
+    Returns:
+        The number of history points written.
+    """
+    points = [
+        GitHubStatsHistory(
+            project_id=row.project_id,
+            recorded_at=row.last_updated,
+            **{field: getattr(row, field) for field in HISTORY_FIELDS},
+        )
+        for row in rows
+    ]
+    GitHubStatsHistory.objects.bulk_create(points)
+    return len(points)
+
+
+def stats_history(
+    project: Project,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> QuerySet[GitHubStatsHistory]:
+    """Return the history points for a project, oldest first.
+
+    Points of every resolution are returned, so the whole time range is
+    covered however much of it has been compacted.
+
+    Args:
+        project: The project to get the history for.
+        since: Only return points recorded at or after this time.
+        until: Only return points recorded before this time.
+
+    Returns:
+        A queryset of history points, ordered by time.
+    """
+    points = GitHubStatsHistory.objects.filter(project=project)
+    if since is not None:
+        points = points.filter(recorded_at__gte=since)
+    if until is not None:
+        points = points.filter(recorded_at__lt=until)
+    return points.order_by("recorded_at")
+
+
+def bucket_start(moment: datetime, resolution: str) -> datetime:
+    """Return the start of the hour, day or week that a time falls in.
+
+    Args:
+        moment: The time to find the bucket for.
+        resolution: One of the hourly, daily or weekly resolutions.
+
+    Returns:
+        The start of the bucket. Weeks start on Monday.
+    """
+    start = moment.replace(minute=0, second=0, microsecond=0)
+    if resolution == Resolution.HOURLY:
+        return start
+    start = start.replace(hour=0)
+    if resolution == Resolution.DAILY:
+        return start
+    return start - timedelta(days=start.weekday())
+
+
+def compact_history(now: datetime | None = None) -> dict[str, int]:
+    """Downsample old history points and delete expired ones.
+
+    Raw points older than ``GITHUB_HISTORY_RAW_DAYS`` are merged into hourly
+    points, hourly points older than ``GITHUB_HISTORY_HOURLY_DAYS`` into daily
+    points and daily points older than ``GITHUB_HISTORY_DAILY_DAYS`` into
+    weekly points. Each merged point keeps the last values seen in its bucket.
+    Weekly points older than ``GITHUB_HISTORY_RETENTION_DAYS`` are deleted,
+    unless that is 0.
+
+    Args:
+        now: The current time, mainly for testing.
+
+    Returns:
+        The number of points removed at each step, by source resolution.
+    """
+    now = now or timezone.now()
+    steps = (
+        (Resolution.RAW, Resolution.HOURLY, settings.GITHUB_HISTORY_RAW_DAYS),
+        (
+            Resolution.HOURLY,
+            Resolution.DAILY,
+            settings.GITHUB_HISTORY_HOURLY_DAYS,
+        ),
+        (
+            Resolution.DAILY,
+            Resolution.WEEKLY,
+            settings.GITHUB_HISTORY_DAILY_DAYS,
+        ),
+    )
+
+    removed: dict[str, int] = {}
+    for source, target, days in steps:
+        removed[source] = _downsample(
+            source, target, now - timedelta(days=days)
+        )
+
+    removed[Resolution.WEEKLY] = 0
+    if settings.GITHUB_HISTORY_RETENTION_DAYS:
+        cutoff = now - timedelta(days=settings.GITHUB_HISTORY_RETENTION_DAYS)
+        removed[Resolution.WEEKLY], _ = GitHubStatsHistory.objects.filter(
+            resolution=Resolution.WEEKLY, recorded_at__lt=cutoff
+        ).delete()
+    return removed
+
+
+def _downsample(source: str, target: str, older_than: datetime) -> int:
+    """Merge the points of one resolution into buckets of a coarser one.
+
+    Only whole buckets before the cutoff are merged, so a bucket is never
+    written twice by later runs.
+
+    Args:
+        source: The resolution of the points to merge.
+        target: The resolution of the merged points.
+        older_than: Only merge points recorded before this time.
+
+    Returns:
+        The number of source points removed.
+    """
+    cutoff = bucket_start(older_than, target)
+    old_points = GitHubStatsHistory.objects.filter(
+        resolution=source, recorded_at__lt=cutoff
+    )
+
+    # Keep the latest values in each bucket for each project
+    merged: dict[tuple[int, datetime], GitHubStatsHistory] = {}
+    for point in old_points.order_by("recorded_at").iterator():
+        start = bucket_start(point.recorded_at, target)
+        merged[point.project_id, start] = GitHubStatsHistory(
+            project_id=point.project_id,
+            recorded_at=start,
+            resolution=target,
+            **{field: getattr(point, field) for field in HISTORY_FIELDS},
+        )
+
+    if not merged:
+        return 0
+
+    with transaction.atomic():
+        GitHubStatsHistory.objects.bulk_create(merged.values())
+        deleted, _ = old_points.delete()
+    return deleted
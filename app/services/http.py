@@ -0,0 +1,101 @@
+"""Shared, pooled HTTP clients for talking to external APIs."""
+
+from __future__ import annotations
+
+import atexit
+import importlib.util
+import os
+import threading
+from typing import Any
+
+import httpx
+from django.conf import settings
+
+
+class SharedHTTPClient:
+    """Lazily create a single pooled ``httpx.Client`` for the process.
+
+    ``httpx.Client`` is thread-safe, so every refresh thread can reuse the same
+    keep-alive connections instead of paying for a new TCP and TLS handshake
+    on each request. The client is re-created after a fork so that worker
+    processes never share sockets with their parent.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the holder without opening any connections."""
+        self._client: httpx.Client | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> httpx.Client:
+        """Return the shared client, creating it on first use."""
+        with self._lock:
+            if (
+                self._client is None
+                or self._client.is_closed
+                or self._pid != os.getpid()
+            ):
+                self._client = httpx.Client(**client_options())
+                self._pid = os.getpid()
+            return self._client
+
+    def close(self) -> None:
+        """Close the shared client and release its pooled connections."""
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self._pid = None
+
+
+def client_options() -> dict[str, Any]:
+    """Return the httpx client options for GitHub API calls from settings.
+
+    These are shared by the pooled sync client and any async clients.
+    """
+    return {
+        "http2": http2_enabled(),
+        "limits": httpx.Limits(
+            max_connections=settings.GITHUB_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.GITHUB_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.GITHUB_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(
+            settings.GITHUB_HTTP_TIMEOUT,
+            connect=settings.GITHUB_HTTP_CONNECT_TIMEOUT,
+        ),
+    }
+
+
+def http2_enabled() -> bool:
+    """Return True if HTTP/2 is requested in settings and is available.
+
+    HTTP/2 support in httpx needs the optional ``h2`` package, so we quietly
+    fall back to HTTP/1.1 if it is not installed.
+    """
+    if not settings.GITHUB_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        print("GITHUB_HTTP2 is set but 'h2' is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+_github_client = SharedHTTPClient()
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide pooled client used for GitHub API calls."""
+    return _github_client.get()
+
+
+def close_http_client() -> None:
+    """Close the process-wide client.
+
+    This is registered to run at interpreter exit, and can also be called
+    from a server hook (for example gunicorn's ``worker_exit``).
+    """
+    _github_client.close()
+
+
+atexit.register(close_http_client)
@@ -0,0 +1,198 @@
+"""A small background job queue, stored in the database.
+
+Work is queued with `enqueue` and run by the 'run_worker' management command,
+so it survives restarts and can be spread across any number of workers. On
+databases that support ``SELECT ... FOR UPDATE SKIP LOCKED`` (Postgres)
+workers claim a batch of jobs without waiting on each other. Elsewhere
+(SQLite) each job is claimed with a conditional UPDATE, which only one worker
+can win.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from app.models import Job
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable
+
+    JobHandler = Callable[[dict[str, Any]], object]
+
+logger = logging.getLogger(__name__)
+
+# The jobs queued by the app, which are handled in 'app/jobs.py'
+REFRESH_STATS_JOB = "github.refresh_stats"
+REFRESH_PROJECT_JOB = "github.refresh_project"
+CONTACT_EMAIL_JOB = "email.contact"
+
+_handlers: dict[str, JobHandler] = {}
+
+
+class JobError(Exception):
+    """Raised by a job handler to fail the job and retry it later."""
+
+
+def job_handler(name: str) -> Callable[[JobHandler], JobHandler]:
+    """Register a function to run the jobs queued under a name.
+
+    Args:
+        name: The job name the function handles.
+
+    Returns:
+        A decorator that registers the function, and returns it unchanged.
+    """
+
+    def register(handler: JobHandler) -> JobHandler:
+        _handlers[name] = handler
+        return handler
+
+    return register
+
+
+def enqueue(
+    name: str,
+    payload: dict[str, Any] | None = None,
+    *,
+    dedup_key: str = "",
+    delay: float = 0,
+) -> Job | None:
+    """Queue a job to be run by the 'run_worker' command.
+
+    Inside a transaction the job is only queued if the transaction commits.
+
+    Args:
+        name: The name the job's handler was registered under.
+        payload: JSON data passed to the handler.
+        dedup_key: If given, the job is dropped when a pending job with the
+            same key is already queued.
+        delay: Run the job no sooner than this many seconds from now.
+
+    Returns:
+        The queued job, or None if it was a duplicate.
+    """
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                name=name,
+                payload=payload or {},
+                dedup_key=dedup_key,
+                max_attempts=settings.JOB_MAX_ATTEMPTS,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        return None
+
+
+def claim_jobs(limit: int) -> list[Job]:
+    """Claim up to `limit` jobs that are ready to run.
+
+    Jobs are ready once their `run_at` time has passed. Running jobs whose
+    lock has expired (because their worker died) are claimed again.
+
+    Args:
+        limit: The most jobs to claim.
+
+    Returns:
+        The claimed jobs, which the caller must run with `run_job`.
+    """
+    now = timezone.now()
+    is_ready = Q(status=Job.Status.PENDING, run_at__lte=now) | Q(
+        status=Job.Status.RUNNING, locked_until__lt=now
+    )
+    ready = (
+        Job.objects.filter(is_ready)
+        .order_by("run_at")
+        .values_list("pk", flat=True)
+    )
+    claim = {
+        "status": Job.Status.RUNNING,
+        "attempts": F("attempts") + 1,
+        "locked_until": now + timedelta(seconds=settings.JOB_LOCK_SECONDS),
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            claimed = list(ready.select_for_update(skip_locked=True)[:limit])
+            Job.objects.filter(pk__in=claimed).update(**claim)
+    else:
+        # Only one worker can move each job out of the ready state
+        claimed = [
+            pk
+            for pk in ready[:limit]
+            if Job.objects.filter(is_ready, pk=pk).update(**claim)
+        ]
+    return list(Job.objects.filter(pk__in=claimed).order_by("run_at"))
+
+
+def run_job(job: Job) -> bool:
+    """Run a claimed job, then delete it or schedule a retry.
+
+    Args:
+        job: The job to run, as returned by `claim_jobs`.
+
+    Returns:
+        True if the job succeeded.
+    """
+    handler = _handlers.get(job.name)
+    try:
+        if handler is None:
+            msg = f"No handler for job '{job.name}'"
+            raise JobError(msg)  # noqa: TRY301
+        handler(job.payload)
+    except Exception as exc:
+        logger.exception("Job %s '%s' failed", job.pk, job.name)
+        _fail(job, repr(exc))
+        return False
+
+    job.delete()
+    return True
+
+
+def _fail(job: Job, error: str) -> None:
+    """Schedule a failed job to be retried, or give up on it.
+
+    The wait before each retry doubles, starting at ``JOB_RETRY_SECONDS``.
+
+    Args:
+        job: The job that failed.
+        error: A description of the failure.
+    """
+    job.last_error = error
+    job.locked_until = None
+    if job.attempts >= job.max_attempts:
+        job.status = Job.Status.FAILED
+    else:
+        job.status = Job.Status.PENDING
+        job.run_at = timezone.now() + timedelta(
+            seconds=settings.JOB_RETRY_SECONDS * 2 ** (job.attempts - 1)
+        )
+
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        # The same work has been queued again since, so leave it to that job
+        job.delete()
+
+
+def run_pending(limit: int) -> int:
+    """Claim and run up to `limit` jobs that are ready.
+
+    Args:
+        limit: The most jobs to run.
+
+    Returns:
+        The number of jobs that were run, whether or not they succeeded.
+    """
+    jobs = claim_jobs(limit)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
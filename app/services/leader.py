@@ -0,0 +1,66 @@
+"""Elect a single leader among the processes in a deployment."""
+
+from __future__ import annotations
+
+import os
+import socket
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from app.models import Lease
+
+
+def process_id() -> str:
+    """Return an ID for this process that is unique across the deployment."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lease(name: str, seconds: float, holder: str | None = None) -> bool:
+    """Take or renew a named lease.
+
+    The lease is held until it is released or `seconds` pass without it
+    being renewed, after which any other process may take it. Like the
+    refresh leases, it is moved with one conditional UPDATE, so only one
+    process can win it.
+
+    Args:
+        name: The name of the lease.
+        seconds: How long the lease lasts before it must be renewed.
+        holder: Who is taking the lease. Defaults to this process.
+
+    Returns:
+        True if the caller now holds the lease.
+    """
+    holder = holder or process_id()
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=seconds)
+
+    # Renew our own lease, or take over one that has expired
+    if (
+        Lease.objects.filter(name=name)
+        .filter(Q(holder=holder) | Q(expires_at__lt=now))
+        .update(holder=holder, expires_at=expires_at)
+    ):
+        return True
+
+    try:
+        with transaction.atomic():
+            Lease.objects.create(
+                name=name, holder=holder, expires_at=expires_at
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def release_lease(name: str, holder: str | None = None) -> None:
+    """Give up a lease, if it is still held by the caller.
+
+    Args:
+        name: The name of the lease.
+        holder: Who took the lease. Defaults to this process.
+    """
+    Lease.objects.filter(name=name, holder=holder or process_id()).delete()
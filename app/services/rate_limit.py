@@ -0,0 +1,202 @@
+"""Track the GitHub API rate limit budget from response headers."""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Mapping, Sequence
+
+
+@dataclass
+class RateLimitBucket:
+    """The last known state of one GitHub rate limit bucket."""
+
+    limit: int
+    remaining: int
+    reset: float  # unix timestamp when the bucket is refilled
+
+
+class RateLimitTracker:
+    """Keep track of the remaining budget for each GitHub rate limit bucket.
+
+    GitHub reports the budget for the bucket a request was charged to in the
+    ``X-RateLimit-*`` headers of every response. The core REST API, the search
+    API and the GraphQL API each have their own bucket.
+
+    Every access token has its own set of buckets, so buckets are also keyed
+    by a token label. The empty label is used for anonymous requests.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the tracker with no known buckets."""
+        self._buckets: dict[tuple[str, str], RateLimitBucket] = {}
+        self._skipped: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def update(
+        self,
+        headers: Mapping[str, str],
+        default_resource: str = "core",
+        token: str = "",
+    ) -> None:
+        """Record the rate limit state from a GitHub API response.
+
+        Args:
+            headers: The response headers.
+            default_resource: The bucket to use if the response does not
+                include an ``X-RateLimit-Resource`` header.
+            token: The label of the token the request was sent with.
+        """
+        try:
+            limit = int(headers["X-RateLimit-Limit"])
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset = float(headers["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            return
+
+        resource = headers.get("X-RateLimit-Resource", default_resource)
+        self.record(resource, limit, remaining, reset, token)
+
+    def record(
+        self,
+        resource: str,
+        limit: int,
+        remaining: int,
+        reset: float,
+        token: str = "",
+    ) -> None:
+        """Record the state of a single bucket.
+
+        Args:
+            resource: The rate limit bucket, e.g. 'core' or 'search'.
+            limit: The maximum number of requests in the bucket.
+            remaining: The number of requests left before the reset.
+            reset: The unix timestamp when the bucket is refilled.
+            token: The label of the token the bucket belongs to.
+        """
+        with self._lock:
+            self._buckets[resource, token] = RateLimitBucket(
+                limit, remaining, reset
+            )
+
+    def available(self, resource: str, token: str = "") -> int | None:
+        """Return how many requests can be spent from a bucket.
+
+        A reserve (``GITHUB_RATE_LIMIT_RESERVE_PERCENT`` of the bucket limit)
+        is held back so that a burst of refreshes never drains the budget
+        completely.
+
+        Args:
+            resource: The rate limit bucket, e.g. 'core' or 'search'.
+            token: The label of the token the bucket belongs to.
+
+        Returns:
+            The number of requests available, or None if the budget is not
+            known (nothing recorded yet, or the bucket has since been reset).
+        """
+        with self._lock:
+            bucket = self._buckets.get((resource, token))
+        if bucket is None or bucket.reset <= time.time():
+            return None
+
+        reserve = bucket.limit * settings.GITHUB_RATE_LIMIT_RESERVE_PERCENT
+        return max(bucket.remaining - reserve // 100, 0)
+
+    def total_available(
+        self, resource: str, tokens: Sequence[str]
+    ) -> int | None:
+        """Return the combined budget of a bucket across several tokens.
+
+        Tokens that are being skipped add nothing to the total.
+
+        Args:
+            resource: The rate limit bucket, e.g. 'core' or 'search'.
+            tokens: The labels of the tokens to add up.
+
+        Returns:
+            The number of requests available, or None if the budget of any
+            usable token is not known.
+        """
+        total = 0
+        for token in tokens:
+            if self.is_skipped(token):
+                continue
+            available = self.available(resource, token)
+            if available is None:
+                return None
+            total += available
+        return total
+
+    def pick_token(self, resource: str, tokens: Sequence[str]) -> str | None:
+        """Choose the token with the most budget left in a bucket.
+
+        A token whose budget is not known yet (never used, or since reset) is
+        chosen first. Tokens that are being skipped, or that have used up
+        their budget, are passed over until their reset.
+
+        Args:
+            resource: The rate limit bucket the request is charged to.
+            tokens: The labels of the tokens to choose from.
+
+        Returns:
+            The label of the chosen token, or None if no token can be used.
+        """
+        best: str | None = None
+        best_available = 0
+        for token in tokens:
+            if self.is_skipped(token):
+                continue
+            available = self.available(resource, token)
+            if available is None:
+                return token
+            if available > best_available:
+                best, best_available = token, available
+        return best
+
+    def skip_token(self, token: str, until: float) -> None:
+        """Stop choosing a token until the given time.
+
+        Args:
+            token: The label of the token to skip.
+            until: The unix timestamp when the token can be used again.
+        """
+        with self._lock:
+            self._skipped[token] = until
+
+    def is_skipped(self, token: str) -> bool:
+        """Return True if a token is being skipped."""
+        with self._lock:
+            until = self._skipped.get(token, 0)
+        return until > time.time()
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Return the known state of every bucket, for monitoring.
+
+        Buckets of a token are named after the resource and the token label,
+        e.g. 'core (token 2)'.
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        now = time.time()
+        return {
+            f"{resource} (token {token})" if token else resource: {
+                **asdict(bucket),
+                "seconds_to_reset": max(int(bucket.reset - now), 0),
+            }
+            for (resource, token), bucket in buckets.items()
+        }
+
+    def clear(self) -> None:
+        """Forget every recorded bucket and skipped token."""
+        with self._lock:
+            self._buckets.clear()
+            self._skipped.clear()
+
+
+rate_limits = RateLimitTracker()
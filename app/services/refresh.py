@@ -0,0 +1,313 @@
+"""Coordinate background refreshes of GitHub stats."""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from app.models import GitHubStats, Project
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshGuard:
+    """Make sure each project has at most one stats refresh in flight.
+
+    Refreshes are de-duplicated in two layers. An in-process set stops
+    concurrent requests in the same worker from starting the same refresh,
+    and a lease stored on the ``GitHubStats`` row does the same across every
+    worker process sharing the database. The lease expires on its own after
+    ``GITHUB_REFRESH_LEASE_SECONDS`` so a crashed worker never blocks a
+    project for good.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the guard with nothing in flight."""
+        self._in_flight: set[int] = set()
+        self._lock = threading.Lock()
+
+    def acquire(self, project_id: int, *, only_due: bool = False) -> bool:
+        """Try to claim the refresh for a project.
+
+        Args:
+            project_id: The ID of the project to refresh.
+            only_due: Only claim the refresh if the stats are still due. This
+                is checked with the lease itself, so a project that another
+                worker has just refreshed is not refreshed again.
+
+        Returns:
+            True if the caller now owns the refresh and must call `release`
+            when done, False if a refresh is already in flight.
+        """
+        return bool(self.acquire_many([project_id], only_due=only_due))
+
+    def acquire_many(
+        self, project_ids: Iterable[int], *, only_due: bool = False
+    ) -> set[int]:
+        """Try to claim the refreshes for several projects at once.
+
+        The leases are taken together, so a page of stale projects costs the
+        same few queries however many projects it shows.
+
+        Args:
+            project_ids: The IDs of the projects to refresh.
+            only_due: Only claim the refreshes whose stats are still due.
+
+        Returns:
+            The IDs of the projects the caller now owns the refresh for, each
+            of which must be released with `release` when done.
+        """
+        with self._lock:
+            wanted = set(project_ids) - self._in_flight
+            self._in_flight.update(wanted)
+        if not wanted:
+            return set()
+
+        claimed = self._claim_leases(wanted, only_due=only_due)
+        if unclaimed := wanted - claimed:
+            # Some projects may have no stats row to hold the lease yet
+            existing = GitHubStats.objects.filter(
+                project_id__in=unclaimed
+            ).values_list("project_id", flat=True)
+            if missing := unclaimed - set(existing):
+                GitHubStats.objects.bulk_create(
+                    GitHubStats.for_projects(
+                        Project(pk=project_id) for project_id in missing
+                    ),
+                    ignore_conflicts=True,
+                )
+                claimed |= self._claim_leases(missing)
+
+        if lost := wanted - claimed:
+            with self._lock:
+                self._in_flight -= lost
+        return claimed
+
+    @staticmethod
+    def _claim_leases(
+        project_ids: set[int], *, only_due: bool = False
+    ) -> set[int]:
+        """Take the leases on some projects' stats rows, where they are free.
+
+        A single conditional UPDATE is atomic on every database backend, so
+        only one worker can move each lease forward. Only when some leases
+        were taken by another worker is the unique token read back to find
+        out which.
+        """
+        now = timezone.now()
+        token = uuid.uuid4()
+        rows = GitHubStats.objects.filter(project_id__in=project_ids).filter(
+            Q(refresh_lease_until__isnull=True) | Q(refresh_lease_until__lt=now)
+        )
+        if only_due:
+            rows = rows.filter(GitHubStats.due_filter())
+        updated = rows.update(
+            refresh_lease_until=now
+            + timedelta(seconds=settings.GITHUB_REFRESH_LEASE_SECONDS),
+            refresh_lease_token=token,
+        )
+        if updated in {0, len(project_ids)}:
+            return set(project_ids) if updated else set()
+        return set(
+            GitHubStats.objects.filter(
+                project_id__in=project_ids, refresh_lease_token=token
+            ).values_list("project_id", flat=True)
+        )
+
+    def release(self, project_id: int) -> None:
+        """Release a refresh claimed with `acquire` or `acquire_many`.
+
+        Args:
+            project_id: The ID of the project that was refreshed.
+        """
+        GitHubStats.objects.filter(project_id=project_id).update(
+            refresh_lease_until=None, refresh_lease_token=None
+        )
+        with self._lock:
+            self._in_flight.discard(project_id)
+
+    def in_flight(self) -> int:
+        """Return the number of refreshes in flight in this process."""
+        with self._lock:
+            return len(self._in_flight)
+
+
+refresh_guard = RefreshGuard()
+
+
+class RefreshExecutor:
+    """Run stats refreshes on a bounded pool of worker threads.
+
+    At most ``GITHUB_REFRESH_WORKERS`` refreshes run at once, and at most
+    ``GITHUB_REFRESH_QUEUE_SIZE`` tasks may be queued or running. Work
+    submitted under a key that is already pending is coalesced into the
+    existing task, and work submitted while the queue is full is dropped; in
+    both cases the stats simply stay stale until a later request.
+
+    The worker threads are not copied into a forked process, so a child
+    starts its own pool, and forgets its parent's work, on first use.
+    """
+
+    def __init__(
+        self, max_workers: int | None = None, max_queue: int | None = None
+    ) -> None:
+        """Initialize the executor.
+
+        Args:
+            max_workers: The number of worker threads. Defaults to the
+                ``GITHUB_REFRESH_WORKERS`` setting.
+            max_queue: The maximum number of queued or running tasks.
+                Defaults to the ``GITHUB_REFRESH_QUEUE_SIZE`` setting.
+        """
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+        self._executor: ThreadPoolExecutor | None = None
+        self._pid: int | None = None
+        self._pending: set[str] = set()
+        self._running = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "cancelled": 0,
+        }
+        self._durations = {"last": 0.0, "total": 0.0, "max": 0.0}
+
+    @property
+    def max_queue(self) -> int:
+        """Return the maximum number of queued or running tasks."""
+        return self._max_queue or settings.GITHUB_REFRESH_QUEUE_SIZE
+
+    def submit(
+        self,
+        key: str,
+        fn: Callable[..., object],
+        *args: Any,  # noqa: ANN401
+    ) -> bool:
+        """Queue a refresh to run in the background.
+
+        Args:
+            key: Identifies the work, so duplicate submissions are coalesced.
+            fn: The function to run.
+            *args: Arguments to pass to the function.
+
+        Returns:
+            True if the work was queued, False if it was coalesced with
+            pending work or dropped because the queue is full.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked from the process that started the pool, whose
+                # threads (and the work queued on them) did not come along
+                self._executor = None
+                self._pending.clear()
+                self._running = 0
+                self._pid = os.getpid()
+            if key in self._pending:
+                self._stats["coalesced"] += 1
+                return False
+            if len(self._pending) >= self.max_queue:
+                self._stats["dropped"] += 1
+                logger.warning("Refresh queue full, dropping '%s'", key)
+                return False
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=(
+                        self._max_workers or settings.GITHUB_REFRESH_WORKERS
+                    ),
+                    thread_name_prefix="github-refresh",
+                )
+            self._pending.add(key)
+            self._stats["submitted"] += 1
+            executor = self._executor
+
+        future = executor.submit(self._run, key, fn, args)
+        future.add_done_callback(lambda f: self._on_done(key, f))
+        return True
+
+    def _on_done(self, key: str, future: Future[None]) -> None:
+        """Forget work that was cancelled before it started running."""
+        if future.cancelled():
+            with self._lock:
+                self._pending.discard(key)
+                self._stats["cancelled"] += 1
+
+    def _run(
+        self, key: str, fn: Callable[..., object], args: tuple[Any, ...]
+    ) -> None:
+        """Run one task, recording its outcome and duration."""
+        with self._lock:
+            self._running += 1
+        close_old_connections()
+        start = time.perf_counter()
+        failed = False
+        try:
+            fn(*args)
+        except Exception:
+            failed = True
+            logger.exception("Background refresh '%s' failed", key)
+        finally:
+            close_old_connections()
+            duration = time.perf_counter() - start
+            with self._lock:
+                self._running -= 1
+                self._pending.discard(key)
+                self._stats["failed" if failed else "completed"] += 1
+                self._durations["last"] = duration
+                self._durations["total"] += duration
+                self._durations["max"] = max(self._durations["max"], duration)
+
+    def metrics(self) -> dict[str, Any]:
+        """Return queue and task duration metrics, for monitoring."""
+        with self._lock:
+            finished = self._stats["completed"] + self._stats["failed"]
+            return {
+                **self._stats,
+                "queued": len(self._pending) - self._running,
+                "running": self._running,
+                "last_duration": self._durations["last"],
+                "max_duration": self._durations["max"],
+                "avg_duration": (
+                    self._durations["total"] / finished if finished else 0.0
+                ),
+            }
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Stop the worker threads.
+
+        Refreshes that are already running are allowed to finish so that no
+        stats row is left half-written. Queued work that has not started yet
+        is cancelled.
+
+        Args:
+            wait: Block until the running refreshes have finished.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if self._pid != os.getpid():
+                executor = None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+refresh_executor = RefreshExecutor()
+atexit.register(refresh_executor.shutdown)
@@ -0,0 +1,43 @@
+"""Warm up the GitHub stats shown first when a server process starts."""
+
+from __future__ import annotations
+
+from django.conf import settings
+
+from app.models import PROJECT_PAGE_SIZE, Project
+from app.services.github import GitHubAPIService
+from app.services.refresh import refresh_executor
+
+
+def warm_github_stats(pages: int | None = None) -> bool:
+    """Refresh the due stats on the first pages of projects in the background.
+
+    After a deploy or restart this gets the stats the first visitors will see
+    refreshed before they arrive, rather than each request starting its own
+    refresh. The work runs on the shared refresh executor, so it is subject
+    to the same worker, queue, lease and rate limit budget as any other
+    refresh, and startup is never held up by GitHub or the database.
+
+    Args:
+        pages: The number of pages of projects to warm up. Defaults to the
+            ``GITHUB_WARMUP_PAGES`` setting, and 0 disables the warm-up.
+
+    Returns:
+        True if the warm-up was queued.
+    """
+    pages = settings.GITHUB_WARMUP_PAGES if pages is None else pages
+    if pages <= 0 or settings.GITHUB_STATS_READ_ONLY:
+        return False
+    return refresh_executor.submit("warmup", _warm_pages, pages)
+
+
+def _warm_pages(pages: int) -> None:
+    """Queue a refresh of the due stats on the first pages of projects.
+
+    Args:
+        pages: The number of pages of projects to warm up.
+    """
+    projects = Project.objects.ordered().select_related("github_stats")
+    GitHubAPIService().get_stats_for_projects(
+        list(projects[: pages * PROJECT_PAGE_SIZE])
+    )
@@ -0,0 +1,111 @@
+"""Apply GitHub webhook events to the stored GitHub stats."""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from app.models import GitHubStats
+from app.services.github import GitHubAPIService
+
+# The webhook events we subscribe to. Anything else is acknowledged and
+# ignored.
+SUPPORTED_EVENTS = {"star", "fork", "issues", "pull_request", "repository"}
+
+
+def verify_signature(secret: str, body: bytes, signature: str) -> bool:
+    """Check the 'X-Hub-Signature-256' header of a webhook delivery.
+
+    Args:
+        secret: The webhook secret shared with GitHub.
+        body: The raw request body.
+        signature: The value of the 'X-Hub-Signature-256' header.
+
+    Returns:
+        True if the signature matches the body.
+    """
+    if not secret or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature)
+
+
+def apply_event(event: str, payload: dict[str, Any]) -> int:
+    """Update the stats of every project for the event's repository.
+
+    No calls are made to the GitHub API. Stars and forks are taken from the
+    repository object included in every payload, while open issue and pull
+    request counts are adjusted by one for each opened, closed or reopened
+    event.
+
+    Args:
+        event: The value of the 'X-GitHub-Event' header.
+        payload: The decoded JSON payload.
+
+    Returns:
+        The number of stats rows updated.
+    """
+    repository = payload.get("repository") or {}
+    owner = (repository.get("owner") or {}).get("login")
+    name = repository.get("name")
+    if event not in SUPPORTED_EVENTS or not owner or not name:
+        return 0
+
+    projects = GitHubAPIService().projects_for_repo(owner, name)
+    if not projects:
+        return 0
+
+    now = timezone.now()
+    updates: dict[str, Any] = {
+        "last_webhook_at": now,
+        # Don't poll while webhooks keep the stats up to date
+        "next_due_at": now
+        + timedelta(hours=settings.GITHUB_WEBHOOK_STALE_HOURS),
+    }
+    for field, key in (("stars", "stargazers_count"), ("forks", "forks_count")):
+        if isinstance(repository.get(key), int):
+            updates[field] = repository[key]
+
+    delta = _open_count_delta(event, payload)
+    if delta:
+        field = "open_prs" if event == "pull_request" else "open_issues"
+        updates[field] = Greatest(F(field) + delta, 0)
+
+    # Make sure every project has a row to update
+    GitHubStats.objects.bulk_create(
+        GitHubStats.for_projects(projects), ignore_conflicts=True
+    )
+    return GitHubStats.objects.filter(project__in=projects).update(**updates)
+
+
+def _open_count_delta(event: str, payload: dict[str, Any]) -> int:
+    """Return how an issues or pull_request event changes the open count.
+
+    Args:
+        event: The webhook event name.
+        payload: The decoded JSON payload.
+
+    Returns:
+        +1, -1 or 0.
+    """
+    if event not in {"issues", "pull_request"}:
+        return 0
+
+    action = payload.get("action")
+    if action in {"opened", "reopened"}:
+        return 1
+    if action == "closed":
+        return -1
+
+    # A deleted or transferred issue only changes the count if it was open
+    item = payload.get("issue") or {}
+    if action in {"deleted", "transferred"} and item.get("state") == "open":
+        return -1
+    return 0
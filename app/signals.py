@@ -1,13 +1,31 @@
 """Configure Django signals."""
 
 # ruff: noqa: ARG001, ANN401
+import threading
 from typing import Any
 
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 
+from app.jobs import refresh_project
 from app.models import Project
-from app.services.github import GitHubAPIService
+from app.services.jobs import REFRESH_PROJECT_JOB, JobError, enqueue
+from app.services.refresh import refresh_executor
+
+
+@receiver(pre_save, sender=Project)
+def set_derived_fields(
+    sender: type[Project], instance: Project, **_kwargs: Any
+) -> None:
+    """Keep a project's derived fields in step with the fields they come from.
+
+    This also runs for the raw saves made by ``loaddata``, which skip
+    `Project.save`, so fixtures dumped without these fields still load with
+    their priorities and GitHub repositories.
+    """
+    instance.set_derived_fields()
 
 
 @receiver(post_save, sender=Project)
@@ -16,10 +34,64 @@ def update_github_stats(
     instance: Project,
     *,
     created: bool,
+    update_fields: frozenset[str] | None = None,
     **_kwargs: Any,
 ) -> None:
-    """Update GitHub stats when a project is created or updated."""
-    if instance.repo:  # Only proceed if the project has a GitHub repo URL
-        github_service = GitHubAPIService()
-        # Update stats synchronously for immediate feedback
-        github_service._update_stats_sync(instance)  # noqa: SLF001
+    """Refresh GitHub stats when a project's repo is added or changed.
+
+    The refresh is queued on the job queue when ``JOB_QUEUE_ENABLED`` is set,
+    or otherwise on the background refresh executor once the transaction
+    commits, so saving a project never waits for GitHub. Saves that leave the
+    repo alone do nothing, and repeated saves of the same repo are coalesced
+    into one refresh.
+    """
+    repo_changed = created or instance.repo_changed(update_fields)
+
+    # Repos that are not on GitHub are skipped without calling anything
+    if not instance.on_github or not repo_changed:
+        return
+
+    payload = {"project_id": instance.pk}
+    key = f"project:{instance.pk}:{instance.repo}"
+    if settings.JOB_QUEUE_ENABLED:
+        # Queued in the same transaction, so it is only kept if the save is
+        # committed
+        enqueue(REFRESH_PROJECT_JOB, payload, dedup_key=key)
+    else:
+        transaction.on_commit(
+            lambda: refresh_executor.submit(
+                key, refresh_project_in_background, key, payload
+            )
+        )
+
+
+def refresh_project_in_background(
+    key: str, payload: dict[str, Any], attempt: int = 1
+) -> None:
+    """Run `refresh_project` on the refresh executor, retrying like a job.
+
+    Without the job queue nothing else retries a refresh that could not be
+    claimed, so it is submitted again after the same back-off as a failed
+    job, up to ``JOB_MAX_ATTEMPTS`` times.
+
+    Args:
+        key: The key the refresh was submitted under.
+        payload: The 'project_id' to refresh.
+        attempt: How many times the refresh has been tried, including this.
+
+    Raises:
+        JobError: If the refresh could still not be claimed on the last
+            attempt.
+    """
+    try:
+        refresh_project(payload)
+    except JobError:
+        if attempt >= settings.JOB_MAX_ATTEMPTS:
+            raise
+        timer = threading.Timer(
+            settings.JOB_RETRY_SECONDS * 2 ** (attempt - 1),
+            refresh_executor.submit,
+            (key, refresh_project_in_background, key, payload, attempt + 1),
+        )
+        timer.daemon = True
+        timer.start()
@@ -2,7 +2,12 @@
 
 from django.urls import path
 
-from app.views import ContactSuccessView, ProjectsListView, filter_projects
+from app.views import (
+    ContactSuccessView,
+    ProjectsListView,
+    filter_projects,
+    github_webhook,
+)
 
 urlpatterns = [
     path("", ProjectsListView.as_view(), name="projects"),
@@ -10,4 +15,5 @@ urlpatterns = [
         "contact/success/", ContactSuccessView.as_view(), name="contact_success"
     ),
     path("filter-projects/", filter_projects, name="filter_projects"),
+    path("github/webhook/", github_webhook, name="github_webhook"),
 ]
@@ -1,20 +1,92 @@
 """Setup views for the app application."""
 
 # ruff: noqa: ANN401
+import json
+from datetime import datetime
 from typing import Any
 
+from django.conf import settings
 from django.contrib import messages
+from django.core import signing
 from django.db import models
-from django.db.models import Case, F, Value, When
-from django.http import HttpRequest, HttpResponse
+from django.db.models import Q
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseNotFound,
+)
 from django.shortcuts import redirect, render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.views.generic import ListView, TemplateView
 from html_sanitizer.django import get_sanitizer  # type: ignore
 
 from app.forms import ContactForm
-from app.models import Project, SiteConfiguration, Tag
+from app.models import PROJECT_PAGE_SIZE, Project, SiteConfiguration, Tag
 from app.services.email import EmailService
 from app.services.github import GitHubAPIService
+from app.services.jobs import CONTACT_EMAIL_JOB, enqueue
+from app.services.webhooks import apply_event, verify_signature
+
+# Keeps the "Show More" cursors apart from other signed values
+CURSOR_SALT = "app.views.projects-cursor"
+
+
+def ordered_projects() -> models.QuerySet[Project]:
+    """Return all projects in display order, ready to show on a page.
+
+    The tags and GitHub stats shown on each card are loaded with the page,
+    so rendering it takes the same number of queries whatever its size.
+    """
+    return (
+        Project.objects.ordered()
+        .select_related("github_stats")
+        .prefetch_related("tags")
+    )
+
+
+def paginate_projects(
+    projects: models.QuerySet[Project], cursor: str = ""
+) -> tuple[list[Project], str]:
+    """Return a page of projects, and the cursor of the page after it.
+
+    Pages are found by their position in the display order rather than with
+    an OFFSET, so a page deep in the list costs the same as the first one.
+    One extra project is fetched to tell if there is a next page, so no COUNT
+    query is needed either.
+
+    Args:
+        projects: The projects to page through, in display order.
+        cursor: The cursor of the page to return, or empty for the first.
+
+    Returns:
+        The projects on the page, and the cursor of the next page or an empty
+        string if this is the last page.
+
+    Raises:
+        signing.BadSignature: If the cursor is not one made here.
+    """
+    if cursor:
+        sort_key, created_at, pk = signing.loads(cursor, salt=CURSOR_SALT)
+        created = datetime.fromisoformat(created_at)
+        projects = projects.filter(
+            Q(sort_key__gt=sort_key)
+            | Q(sort_key=sort_key, created_at__gt=created)
+            | Q(sort_key=sort_key, created_at=created, pk__gt=pk)
+        )
+
+    page = list(projects[: PROJECT_PAGE_SIZE + 1])
+    if len(page) <= PROJECT_PAGE_SIZE:
+        return page, ""
+
+    last = page[PROJECT_PAGE_SIZE - 1]
+    next_cursor = signing.dumps(
+        [last.sort_key, last.created_at.isoformat(), last.pk],
+        salt=CURSOR_SALT,
+    )
+    return page[:PROJECT_PAGE_SIZE], next_cursor
 
 
 class ProjectsListView(ListView[Project]):
@@ -25,20 +97,8 @@ class ProjectsListView(ListView[Project]):
     context_object_name = "projects"
 
     def get_queryset(self) -> models.QuerySet[Project]:
-        """Get queryset with custom ordering.
-
-        1. First, projects with priority field set, ordered by priority
-        2. Then, projects without priority, ordered by creation date
-        """
-        # Order by priority (nulls last), then by created_at
-        return Project.objects.order_by(
-            # This puts NULL priority values at the end
-            Case(
-                When(priority__isnull=True, then=Value(999999)),
-                default=F("priority"),
-            ),
-            "created_at",
-        )
+        """Get queryset with custom ordering."""
+        return ordered_projects()
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         """Get context data for the template.
@@ -58,31 +118,21 @@ class ProjectsListView(ListView[Project]):
         if "form" not in context:
             context["form"] = ContactForm()
 
-        # Get paginated projects
-        page = int(self.request.GET.get("page", 1))
-        page_size = 6
-        start = (page - 1) * page_size
-        end = page * page_size
-
-        # Get total count and paginated projects
-        projects = self.get_queryset()
-        total_count = projects.count()
-        paginated_projects = projects[start:end]
-        has_more = total_count > end
+        # Get the first page of projects, later pages are loaded by
+        # 'filter_projects'
+        paginated_projects, next_cursor = paginate_projects(self.get_queryset())
 
         # Get GitHub stats from database and trigger updates if needed
         github_service = GitHubAPIService()
-        github_stats = github_service.get_stats_for_projects(
-            list(paginated_projects)
-        )
+        github_stats = github_service.get_stats_for_projects(paginated_projects)
 
         # Add GitHub stats to context
         context["github_stats"] = github_stats
 
         # Add pagination data to the context
         context["projects"] = paginated_projects
-        context["has_more"] = has_more
-        context["current_page"] = page
+        context["has_more"] = bool(next_cursor)
+        context["next_cursor"] = next_cursor
 
         # Add all tags to context for the filter UI
         context["all_tags"] = Tag.objects.all().order_by("name")
@@ -117,6 +167,12 @@ class ProjectsListView(ListView[Project]):
             # Save to database
             submission = form.save()
 
+            # Leave the email to the 'run_worker' command, which retries it
+            # until it is sent
+            if settings.JOB_QUEUE_ENABLED:
+                enqueue(CONTACT_EMAIL_JOB, {"submission_id": submission.pk})
+                return redirect("contact_success")
+
             # Send email
             email_sent = EmailService.send_contact_email(submission)
 
@@ -167,46 +223,35 @@ def filter_projects(request: HttpRequest) -> HttpResponse:
     """Filter projects by selected tags and handle pagination.
 
     Args:
-        request: The HTTP request containing tag filter parameters
+        request: The HTTP request containing tag filter parameters, and the
+            cursor of the page to show for "Show More" requests
 
     Returns:
         HTTP response with filtered projects
     """
     selected_tags = request.GET.getlist("tags")
-    page = int(request.GET.get("page", 1))
-    page_size = 6
+    cursor = request.GET.get("cursor", "")
 
     # Get projects with custom ordering
-    projects = Project.objects.order_by(
-        Case(
-            When(priority__isnull=True, then=Value(999999)),
-            default=F("priority"),
-        ),
-        "created_at",
-    )
+    projects = ordered_projects()
 
     # Filter by tags if any are selected
     if selected_tags:
         for tag in selected_tags:
             projects = projects.filter(tags__name=tag)
 
-    # Calculate pagination
-    start = (page - 1) * page_size
-    end = page * page_size
-
-    # Get total count and paginated projects
-    total_count = projects.count()
-    paginated_projects = projects[start:end]
-    has_more = total_count > end
+    try:
+        paginated_projects, next_cursor = paginate_projects(projects, cursor)
+    except signing.BadSignature:
+        return HttpResponseBadRequest("Invalid cursor")
+    has_more = bool(next_cursor)
 
     # Get GitHub stats
     github_service = GitHubAPIService()
-    github_stats = github_service.get_stats_for_projects(
-        list(paginated_projects)
-    )
+    github_stats = github_service.get_stats_for_projects(paginated_projects)
 
     # For "Show More" requests, just return the new projects and button
-    if page > 1:
+    if cursor:
         return render(
             request,
             "app/_load_more_section.html",
@@ -214,7 +259,7 @@ def filter_projects(request: HttpRequest) -> HttpResponse:
                 "projects": paginated_projects,
                 "github_stats": github_stats,
                 "selected_tags": selected_tags,
-                "current_page": page,
+                "next_cursor": next_cursor,
                 "has_more": has_more,
             },
         )
@@ -228,7 +273,40 @@ def filter_projects(request: HttpRequest) -> HttpResponse:
             "github_stats": github_stats,
             "all_tags": Tag.objects.all().order_by("name"),
             "selected_tags": selected_tags,
-            "current_page": page,
+            "next_cursor": next_cursor,
             "has_more": has_more,
         },
     )
+
+
+@csrf_exempt
+@require_POST
+def github_webhook(request: HttpRequest) -> HttpResponse:
+    """Receive a GitHub webhook delivery and update the stored stats.
+
+    Deliveries must be signed with ``GITHUB_WEBHOOK_SECRET``. The endpoint is
+    disabled (returns 404) if no secret is configured.
+
+    Args:
+        request: The HTTP request from GitHub
+
+    Returns:
+        An empty HTTP response with a status describing the outcome
+    """
+    if not settings.GITHUB_WEBHOOK_SECRET:
+        return HttpResponseNotFound()
+
+    if not verify_signature(
+        settings.GITHUB_WEBHOOK_SECRET,
+        request.body,
+        request.headers.get("X-Hub-Signature-256", ""),
+    ):
+        return HttpResponseForbidden()
+
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return HttpResponseBadRequest()
+
+    apply_event(request.headers.get("X-GitHub-Event", ""), payload)
+    return HttpResponse(status=204)
@@ -225,6 +225,110 @@ CONTACT_FORM_RECIPIENT = os.getenv(
 )
 EMAIL_TIMEOUT = 10
 
+# Set to 1 to run background work (GitHub stats refreshes and contact emails)
+# from a job queue stored in the database, processed by the 'run_worker'
+# command. Otherwise stats are refreshed in threads in each web process, and
+# lost if it restarts, and emails are sent while the visitor waits.
+JOB_QUEUE_ENABLED = bool(int(os.getenv("JOB_QUEUE_ENABLED", "0")))
+# A failed job is retried up to JOB_MAX_ATTEMPTS times in all, waiting
+# JOB_RETRY_SECONDS before the first retry and doubling the wait each time.
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_SECONDS = int(os.getenv("JOB_RETRY_SECONDS", "60"))
+# A job still running after this many seconds is assumed to have lost its
+# worker, and is run again.
+JOB_LOCK_SECONDS = int(os.getenv("JOB_LOCK_SECONDS", "600"))
+
+# Base URL of the GitHub API. Point this at a local stand-in (see
+# 'tests/fake_github.py') for offline testing and benchmarks.
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+
+# GitHub API HTTP client. A single pooled client is shared by every refresh
+# thread in the process. HTTP/2 needs the optional 'h2' package installed.
+GITHUB_HTTP2 = bool(int(os.getenv("GITHUB_HTTP2", "0")))
+GITHUB_HTTP_TIMEOUT = float(os.getenv("GITHUB_HTTP_TIMEOUT", "10"))
+GITHUB_HTTP_CONNECT_TIMEOUT = float(
+    os.getenv("GITHUB_HTTP_CONNECT_TIMEOUT", "5")
+)
+GITHUB_HTTP_MAX_CONNECTIONS = int(
+    os.getenv("GITHUB_HTTP_MAX_CONNECTIONS", "10")
+)
+GITHUB_HTTP_MAX_KEEPALIVE = int(os.getenv("GITHUB_HTTP_MAX_KEEPALIVE", "5"))
+GITHUB_HTTP_KEEPALIVE_EXPIRY = float(
+    os.getenv("GITHUB_HTTP_KEEPALIVE_EXPIRY", "60")
+)
+
+# Maximum number of repositories fetched at once by the async GitHub service.
+GITHUB_ASYNC_CONCURRENCY = int(os.getenv("GITHUB_ASYNC_CONCURRENCY", "10"))
+
+# Secret shared with GitHub to sign webhook deliveries. The webhook endpoint is
+# disabled while this is empty. Stats kept up to date by webhooks are not
+# polled, unless no webhook has arrived for GITHUB_WEBHOOK_STALE_HOURS.
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+GITHUB_WEBHOOK_STALE_HOURS = int(os.getenv("GITHUB_WEBHOOK_STALE_HOURS", "24"))
+
+# Refresh the due GitHub stats on this many pages of projects in the
+# background when a server process starts, so the first visitors after a
+# deploy see fresh stats. 0 disables the warm-up.
+GITHUB_WARMUP_PAGES = int(os.getenv("GITHUB_WARMUP_PAGES", "0"))
+
+# GitHub stats are refreshed after GITHUB_STATS_TTL_MINUTES. The TTL doubles
+# after each refresh that finds nothing has changed, up to
+# GITHUB_STATS_MAX_TTL_MINUTES, and resets as soon as something changes.
+GITHUB_STATS_TTL_MINUTES = int(os.getenv("GITHUB_STATS_TTL_MINUTES", "30"))
+GITHUB_STATS_MAX_TTL_MINUTES = int(
+    os.getenv("GITHUB_STATS_MAX_TTL_MINUTES", "1440")
+)
+
+# A project whose stats cannot be refreshed (repo deleted or private, GitHub
+# errors) is retried after GITHUB_FAILURE_BACKOFF_SECONDS, doubling with each
+# further failure up to GITHUB_FAILURE_BACKOFF_MAX_SECONDS.
+GITHUB_FAILURE_BACKOFF_SECONDS = int(
+    os.getenv("GITHUB_FAILURE_BACKOFF_SECONDS", "300")
+)
+GITHUB_FAILURE_BACKOFF_MAX_SECONDS = int(
+    os.getenv("GITHUB_FAILURE_BACKOFF_MAX_SECONDS", "86400")
+)
+
+# After GITHUB_BREAKER_THRESHOLD consecutive server errors or network failures
+# no calls are made to GitHub for GITHUB_BREAKER_COOLDOWN_SECONDS.
+GITHUB_BREAKER_THRESHOLD = int(os.getenv("GITHUB_BREAKER_THRESHOLD", "5"))
+GITHUB_BREAKER_COOLDOWN_SECONDS = int(
+    os.getenv("GITHUB_BREAKER_COOLDOWN_SECONDS", "300")
+)
+
+# A history point is kept for every stats refresh. The 'compact_github_history'
+# command merges raw points older than GITHUB_HISTORY_RAW_DAYS into hourly
+# points, hourly points into daily points after GITHUB_HISTORY_HOURLY_DAYS and
+# daily points into weekly points after GITHUB_HISTORY_DAILY_DAYS. Weekly
+# points are deleted after GITHUB_HISTORY_RETENTION_DAYS (0 keeps them).
+GITHUB_HISTORY_RAW_DAYS = int(os.getenv("GITHUB_HISTORY_RAW_DAYS", "2"))
+GITHUB_HISTORY_HOURLY_DAYS = int(os.getenv("GITHUB_HISTORY_HOURLY_DAYS", "30"))
+GITHUB_HISTORY_DAILY_DAYS = int(os.getenv("GITHUB_HISTORY_DAILY_DAYS", "365"))
+GITHUB_HISTORY_RETENTION_DAYS = int(
+    os.getenv("GITHUB_HISTORY_RETENTION_DAYS", "0")
+)
+
+# Percentage of each GitHub rate limit bucket that is held back. Once only this
+# much budget is left, stats refreshes are deferred until the bucket resets.
+GITHUB_RATE_LIMIT_RESERVE_PERCENT = int(
+    os.getenv("GITHUB_RATE_LIMIT_RESERVE_PERCENT", "10")
+)
+
+# Set to 1 when stats are kept fresh by the 'refresh_github_stats' command.
+# Views then only read the stored stats and never start a refresh themselves.
+GITHUB_STATS_READ_ONLY = bool(int(os.getenv("GITHUB_STATS_READ_ONLY", "0")))
+
+# How long a worker may hold the lock on a project's stats refresh before
+# another worker is allowed to take over.
+GITHUB_REFRESH_LEASE_SECONDS = int(
+    os.getenv("GITHUB_REFRESH_LEASE_SECONDS", "120")
+)
+
+# Stats refreshes run on a bounded pool of background threads in each worker.
+# Once the queue is full, further refreshes are dropped until it drains.
+GITHUB_REFRESH_WORKERS = int(os.getenv("GITHUB_REFRESH_WORKERS", "2"))
+GITHUB_REFRESH_QUEUE_SIZE = int(os.getenv("GITHUB_REFRESH_QUEUE_SIZE", "20"))
+
 # Cache configuration for GitHub stats
 CACHES = {
     "default": {
@@ -13,3 +13,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+# Imported once the apps are loaded. This does nothing unless
+# GITHUB_WARMUP_PAGES is set.
+from app.services.warmup import warm_github_stats  # noqa: E402
+
+warm_github_stats()
@@ -2,24 +2,37 @@
 
 from __future__ import annotations
 
+from datetime import timedelta
 from typing import TYPE_CHECKING, cast
 
 import pytest
 from django.contrib.admin.sites import AdminSite
 from django.http import HttpRequest
+from django.urls import reverse
+from django.utils import timezone
 
 from app.admin import (
     ContactSubmissionAdmin,
     CustomAdminSite,
+    GitHubCircuitBreakerAdmin,
     GitHubStatsAdmin,
+    JobAdmin,
     ProjectAdmin,
     admin_site,
 )
-from app.models import ContactSubmission, GitHubStats, Project, Tag
+from app.models import (
+    ContactSubmission,
+    GitHubCircuitBreaker,
+    GitHubStats,
+    Job,
+    Project,
+    Tag,
+)
 
 if TYPE_CHECKING:
     from unittest.mock import MagicMock
 
+    from django.test import Client
     from pytest_django.fixtures import SettingsWrapper
     from pytest_mock import (
         MockerFixture,
@@ -111,6 +124,22 @@ class TestCustomAdminSite:
         mock_project_model.objects.count.assert_called_once()
         mock_tag_model.objects.count.assert_called_once()
 
+    @pytest.mark.django_db
+    def test_refresh_metrics(
+        self, admin_client: Client, client: Client, mocker: MockerFixture
+    ) -> None:
+        """Test staff can see the metrics of the background refreshes."""
+        mocker.patch(
+            "app.admin.refresh_executor.metrics",
+            return_value={"queued": 2, "running": 1},
+        )
+        url = reverse("admin:refresh_metrics")
+
+        response = admin_client.get(url)
+
+        assert response.json() == {"queued": 2, "running": 1}
+        assert client.get(url).status_code == 302
+
 
 class TestProjectAdmin:
     """Tests for the ProjectAdmin configuration."""
@@ -128,6 +157,27 @@ class TestProjectAdmin:
         # Order might vary depending on retrieval, so check both possibilities
         assert tag_list_output in ("Python, Django", "Django, Python")
 
+    def test_list_editable_priority_updates_sort_key(
+        self, admin_client: Client
+    ) -> None:
+        """Test editing the priority in the list keeps the sort key in step."""
+        project = Project.objects.create(title="Test Project")
+
+        response = admin_client.post(
+            reverse("admin:app_project_changelist"),
+            {
+                "form-TOTAL_FORMS": "1",
+                "form-INITIAL_FORMS": "1",
+                "form-0-id": str(project.pk),
+                "form-0-priority": "2",
+                "_save": "Save",
+            },
+        )
+
+        assert response.status_code == 302
+        project.refresh_from_db()
+        assert project.sort_key == 2
+
 
 class TestContactSubmissionAdmin:
     """Tests for the ContactSubmissionAdmin configuration."""
@@ -206,3 +256,38 @@ class TestGitHubStatsAdmin:
         assert not github_stats_admin.has_change_permission(
             mock_request, _obj=stats
         )
+
+
+class TestGitHubCircuitBreakerAdmin:
+    """Tests for the GitHubCircuitBreakerAdmin configuration."""
+
+    def test_breaker_open(self) -> None:
+        """Test the breaker state is shown as a boolean."""
+        breaker_admin = GitHubCircuitBreakerAdmin(
+            GitHubCircuitBreaker, admin_site
+        )
+        breaker = GitHubCircuitBreaker.get_solo()
+        assert not breaker_admin.breaker_open(breaker)
+
+        breaker.opened_until = timezone.now() + timedelta(minutes=5)
+        assert breaker_admin.breaker_open(breaker)
+
+
+class TestJobAdmin:
+    """Tests for the JobAdmin configuration."""
+
+    def test_retry_jobs(self, mocker: MockerFixture) -> None:
+        """Test only failed jobs are queued to run again."""
+        job_admin = JobAdmin(Job, admin_site)
+        message_user = mocker.patch.object(job_admin, "message_user")
+        failed = Job.objects.create(
+            name="test", status=Job.Status.FAILED, attempts=5
+        )
+        Job.objects.create(name="test", status=Job.Status.RUNNING)
+
+        job_admin.retry_jobs(mocker.MagicMock(), Job.objects.all())
+
+        failed.refresh_from_db()
+        assert failed.status == Job.Status.PENDING
+        assert failed.attempts == 0
+        message_user.assert_called_once()
@@ -1,11 +1,72 @@
 """Set up some pytest defaults."""
 
+from __future__ import annotations
+
 import os
+from typing import TYPE_CHECKING
 
 import pytest
 
+from app.models import GitHubStats, Project
+from app.services.breaker import circuit_breaker
+from app.services.rate_limit import rate_limits
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from pytest_mock import MockerFixture
+
+    from app.models import Tag
+
+DEFAULT_REPO = "https://github.com/owner/repo"
+
 
 @pytest.hookimpl(tryfirst=True)
 def pytest_configure(config) -> None:
     """Clear the screen before running tests."""
     os.system("cls" if os.name == "nt" else "clear")  # noqa: S605
+
+
+@pytest.fixture(autouse=True)
+def _clear_rate_limits() -> None:
+    """Forget any GitHub rate limit state recorded by a previous test."""
+    rate_limits.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_circuit_breaker() -> None:
+    """Forget any GitHub failures recorded by a previous test."""
+    circuit_breaker.clear()
+
+
+@pytest.fixture
+def project_with_repo(
+    request: pytest.FixtureRequest, mocker: MockerFixture
+) -> Project:
+    """Create a project with a GitHub repo, without calling the API.
+
+    The repo URL can be changed by parametrizing the fixture indirectly.
+    """
+    mocker.patch("app.jobs.GitHubAPIService")
+    return Project.objects.create(
+        title="Repo Project", repo=getattr(request, "param", DEFAULT_REPO)
+    )
+
+
+@pytest.fixture
+def add_projects(mocker: MockerFixture) -> Callable[..., None]:
+    """Return a helper that creates tagged projects with stats.
+
+    The helper takes the number of projects, their tag, and optionally a
+    GitHub repo URL for all of them, which is never called.
+    """
+    mocker.patch("app.jobs.GitHubAPIService")
+
+    def add(count: int, tag: Tag, repo: str = "") -> None:
+        start = Project.objects.count()
+        for i in range(start, start + count):
+            project = Project.objects.create(title=f"Tagged {i}", repo=repo)
+            project.tags.add(tag)
+            GitHubStats.objects.create(project=project)
+
+    return add
@@ -0,0 +1,458 @@
+r"""A local stand-in for the parts of the GitHub API used by the site.
+
+`FakeGitHub` answers the REST, GraphQL and rate limit endpoints called by
+`GitHubAPIService`, with configurable latency, error rate and rate limits.
+Responses carry ``ETag`` and ``Link`` headers like the real API, so that
+conditional requests and pagination are exercised too.
+
+It can be used in two ways:
+
+- In process, as an ``httpx.MockTransport``, by passing ``fake.transport()``
+  to an ``httpx.Client`` or ``httpx.AsyncClient``.
+- As a real HTTP server on localhost, to measure connection pooling and
+  concurrency. Use ``with fake.serve() as url:`` in tests, or run it from the
+  command line for benchmarks::
+
+      python -m tests.fake_github --latency 0.05 --port 8765
+      GITHUB_API_URL=http://127.0.0.1:8765 python manage.py \\
+          refresh_github_stats --max-age 0
+
+  From the command line every repository exists, with made up stats derived
+  from its name.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# The rate limit buckets and their sizes, as for an authenticated user
+DEFAULT_LIMITS = {"core": 5000, "search": 30, "graphql": 5000}
+
+
+@dataclass
+class FakeRepo:
+    """The stats served for one fake repository."""
+
+    stars: int = 0
+    forks: int = 0
+    open_issues: int = 0
+    open_prs: int = 0
+
+
+@dataclass
+class FakeGitHub:
+    """An in-memory fake of the GitHub API.
+
+    Attributes:
+        repos: The served repositories, keyed by lower-cased (owner, name).
+            Unknown repositories return 404, unless ``any_repo`` is set.
+        latency: Seconds to wait before answering each request.
+        error_rate: The fraction of requests (0 to 1) answered with a 502.
+        limits: The size of each rate limit bucket.
+        any_repo: Serve made up stats for every repository name.
+        seed: Seed for the random errors, so that runs are repeatable.
+        requests: Every request received, as (method, path) tuples.
+    """
+
+    repos: dict[tuple[str, str], FakeRepo] = field(default_factory=dict)
+    latency: float = 0.0
+    error_rate: float = 0.0
+    limits: dict[str, int] = field(default_factory=lambda: dict(DEFAULT_LIMITS))
+    any_repo: bool = False
+    seed: int = 0
+    requests: list[tuple[str, str]] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        """Set up the rate limit buckets and random errors."""
+        self._lock = threading.Lock()
+        self._random = random.Random(self.seed)  # noqa: S311
+        self.reset_rate_limits()
+
+    def add_repo(self, owner: str, name: str, **stats: int) -> FakeRepo:
+        """Add a repository to serve, returning its (mutable) stats."""
+        repo = FakeRepo(**stats)
+        self.repos[owner.lower(), name.lower()] = repo
+        return repo
+
+    def reset_rate_limits(self) -> None:
+        """Refill every rate limit bucket, resetting in an hour."""
+        with self._lock:
+            self.remaining = dict(self.limits)
+            self.reset_at = int(time.time()) + 3600
+
+    def count(self, path_prefix: str = "/") -> int:
+        """Return how many requests were received for a path prefix."""
+        with self._lock:
+            return sum(
+                1 for _, path in self.requests if path.startswith(path_prefix)
+            )
+
+    def transport(self) -> httpx.MockTransport:
+        """Return an httpx transport that answers from this fake."""
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """Answer a request, as the GitHub API would.
+
+        Args:
+            request: The request to answer.
+
+        Returns:
+            The response.
+        """
+        status, headers, body = self.respond(
+            request.method,
+            request.url.raw_path.decode(),
+            dict(request.headers),
+            request.content,
+        )
+        return httpx.Response(status, headers=headers, content=body)
+
+    def respond(
+        self,
+        method: str,
+        target: str,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Answer a request, independent of how it was received.
+
+        Args:
+            method: The HTTP method.
+            target: The request path, including any query string.
+            headers: The request headers.
+            body: The request body.
+
+        Returns:
+            A (status, headers, body) tuple.
+        """
+        url = urlsplit(target)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        with self._lock:
+            self.requests.append((method, url.path))
+            fail = self._random.random() < self.error_rate
+
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            return 502, {}, b'{"message": "Server Error"}'
+
+        if url.path == "/rate_limit":
+            # Not charged against any bucket, as on GitHub
+            return 200, {}, json.dumps(self._rate_limit_body()).encode()
+        # Links in the Link header are absolute, as on GitHub
+        link_base = f"http://{headers.get('host', '127.0.0.1')}{url.path}"
+        resource, result = self._route(method, link_base, url.path, query, body)
+        return self._charge(resource, headers, result)
+
+    def _route(
+        self,
+        method: str,
+        link_base: str,
+        path: str,
+        query: dict[str, str],
+        body: bytes,
+    ) -> tuple[str, tuple[int, dict[str, str], Any]]:
+        """Find the endpoint for a request and answer it.
+
+        Returns:
+            The rate limit bucket the request is charged to, and the (status,
+            headers, JSON data) to send.
+        """
+        if method == "POST" and path == "/graphql":
+            return "graphql", self._graphql(body)
+        if method == "GET" and path == "/search/issues":
+            return "search", self._search(query)
+        if method == "GET" and (
+            match := re.fullmatch(r"/repos/([^/]+)/([^/]+)", path)
+        ):
+            return "core", self._repo(*match.groups())
+        if method == "GET" and (
+            match := re.fullmatch(r"/repos/([^/]+)/([^/]+)/pulls", path)
+        ):
+            return "core", self._pulls(link_base, query, *match.groups())
+        if method == "GET" and (
+            match := re.fullmatch(r"/users/([^/]+)/repos", path)
+        ):
+            return "core", self._owner_repos(link_base, query, match.group(1))
+        return "core", (404, {}, {"message": "Not Found"})
+
+    def _find(self, owner: str, name: str) -> FakeRepo | None:
+        """Return the stats for a repository, if it is served."""
+        repo = self.repos.get((owner.lower(), name.lower()))
+        if repo is None and self.any_repo:
+            seed = int(
+                hashlib.sha256(f"{owner}/{name}".encode()).hexdigest(), 16
+            )
+            repo = FakeRepo(
+                stars=seed % 1000,
+                forks=seed % 100,
+                open_issues=seed % 40,
+                open_prs=seed % 7,
+            )
+        return repo
+
+    def _charge(
+        self,
+        resource: str,
+        request_headers: dict[str, str],
+        result: tuple[int, dict[str, str], Any],
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Apply ETags and the rate limit to a response.
+
+        A request whose ``If-None-Match`` matches the response's ETag gets a
+        ``304 Not Modified``, which is not counted against the rate limit.
+
+        Args:
+            resource: The rate limit bucket the request is charged to.
+            request_headers: The request headers.
+            result: The (status, headers, JSON data) to send.
+
+        Returns:
+            A (status, headers, body) tuple.
+        """
+        status, headers, data = result
+        body = json.dumps(data).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:20]}"'
+        not_modified = status == 200 and (
+            request_headers.get("if-none-match") == etag
+        )
+
+        with self._lock:
+            if not not_modified:
+                if self.remaining[resource] <= 0:
+                    status, headers = 403, {}
+                    body = b'{"message": "API rate limit exceeded"}'
+                else:
+                    self.remaining[resource] -= 1
+            remaining = self.remaining[resource]
+
+        headers = {
+            **headers,
+            "X-RateLimit-Limit": str(self.limits[resource]),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(self.reset_at),
+            "X-RateLimit-Resource": resource,
+        }
+        if not_modified:
+            return 304, {**headers, "ETag": etag}, b""
+        if status == 200:
+            headers["ETag"] = etag
+        return status, headers, body
+
+    def _repo(self, owner: str, name: str) -> tuple[int, dict[str, str], Any]:
+        """Answer ``GET /repos/{owner}/{name}``."""
+        repo = self._find(owner, name)
+        if repo is None:
+            return 404, {}, {"message": "Not Found"}
+        return 200, {}, self._repo_data(owner, name, repo)
+
+    @staticmethod
+    def _repo_data(owner: str, name: str, repo: FakeRepo) -> dict[str, Any]:
+        """Return the JSON for a repository, as in GitHub's REST API."""
+        return {
+            "name": name,
+            "full_name": f"{owner}/{name}",
+            "stargazers_count": repo.stars,
+            "forks_count": repo.forks,
+            # Like GitHub, this includes open pull requests
+            "open_issues_count": repo.open_issues + repo.open_prs,
+        }
+
+    def _owner_repos(
+        self, link_base: str, query: dict[str, str], owner: str
+    ) -> tuple[int, dict[str, str], Any]:
+        """Answer ``GET /users/{owner}/repos``, with pagination."""
+        items = [
+            self._repo_data(repo_owner, name, repo)
+            for (repo_owner, name), repo in sorted(self.repos.items())
+            if repo_owner == owner.lower()
+        ]
+        page, headers = self._paginate(link_base, query, len(items))
+        return 200, headers, items[page]
+
+    def _pulls(
+        self, link_base: str, query: dict[str, str], owner: str, name: str
+    ) -> tuple[int, dict[str, str], Any]:
+        """Answer ``GET /repos/{owner}/{name}/pulls``, with pagination."""
+        repo = self._find(owner, name)
+        if repo is None:
+            return 404, {}, {"message": "Not Found"}
+
+        page, headers = self._paginate(link_base, query, repo.open_prs)
+        items = [{"number": number + 1} for number in range(repo.open_prs)]
+        return 200, headers, items[page]
+
+    @staticmethod
+    def _paginate(
+        link_base: str, query: dict[str, str], total: int
+    ) -> tuple[slice, dict[str, str]]:
+        """Work out the requested page of a listing and its Link header.
+
+        Args:
+            link_base: The absolute URL of the listing, without a query.
+            query: The parsed query string.
+            total: The number of items in the whole listing.
+
+        Returns:
+            The slice of items on the requested page, and the headers to send.
+        """
+        per_page = max(int(query.get("per_page", "30")), 1)
+        page = max(int(query.get("page", "1")), 1)
+        last = max(-(-total // per_page), 1)
+
+        headers = {}
+        if last > 1:
+            url = f"{link_base}?per_page={per_page}&page="
+            links = []
+            if page < last:
+                links.append(f'<{url}{page + 1}>; rel="next"')
+            links.append(f'<{url}{last}>; rel="last"')
+            headers["Link"] = ", ".join(links)
+        start = (page - 1) * per_page
+        return slice(start, start + per_page), headers
+
+    def _search(self, query: dict[str, str]) -> tuple[int, dict[str, str], Any]:
+        """Answer ``GET /search/issues`` for 'repo:owner/name is:issue'."""
+        match = re.search(r"repo:([^/\s]+)/(\S+)", query.get("q", ""))
+        repo = self._find(*match.groups()) if match else None
+        if repo is None:
+            return 422, {}, {"message": "Validation Failed"}
+        return 200, {}, {"total_count": repo.open_issues, "items": []}
+
+    def _graphql(self, body: bytes) -> tuple[int, dict[str, str], Any]:
+        """Answer an aliased repository query, as built by the service.
+
+        Each ``r{i}`` alias is answered from the ``o{i}``/``n{i}`` variables.
+        """
+        variables = json.loads(body or b"{}").get("variables", {})
+        data: dict[str, Any] = {}
+        index = 0
+        while f"o{index}" in variables:
+            repo = self._find(variables[f"o{index}"], variables[f"n{index}"])
+            data[f"r{index}"] = repo and {
+                "stargazerCount": repo.stars,
+                "forkCount": repo.forks,
+                "issues": {"totalCount": repo.open_issues},
+                "pullRequests": {"totalCount": repo.open_prs},
+            }
+            index += 1
+        return 200, {}, {"data": data}
+
+    def _rate_limit_body(self) -> dict[str, Any]:
+        """Return the body of ``GET /rate_limit``."""
+        with self._lock:
+            return {
+                "resources": {
+                    resource: {
+                        "limit": limit,
+                        "remaining": self.remaining[resource],
+                        "reset": self.reset_at,
+                        "used": limit - self.remaining[resource],
+                    }
+                    for resource, limit in self.limits.items()
+                }
+            }
+
+    @contextmanager
+    def serve(self, port: int = 0) -> Iterator[str]:
+        """Serve this fake over HTTP on localhost in a background thread.
+
+        Args:
+            port: The port to listen on, or 0 to pick a free one.
+
+        Yields:
+            The base URL of the server, to use as ``GITHUB_API_URL``.
+        """
+        server = ThreadingHTTPServer(("127.0.0.1", port), _handler_for(self))
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{server.server_port}"
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+
+def _handler_for(fake: FakeGitHub) -> type[BaseHTTPRequestHandler]:
+    """Return a request handler class that answers from a fake."""
+
+    class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.1 so that clients can keep connections alive
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            self._answer()
+
+        def do_POST(self) -> None:
+            self._answer()
+
+        def _answer(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            status, headers, body = fake.respond(
+                self.command,
+                self.path,
+                {key.lower(): value for key, value in self.headers.items()},
+                self.rfile.read(length),
+            )
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args: object) -> None:
+            """Keep the test output quiet."""
+
+    return Handler
+
+
+def main() -> None:
+    """Run the fake GitHub API from the command line, for benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--core-limit", type=int, default=5000)
+    parser.add_argument("--search-limit", type=int, default=30)
+    args = parser.parse_args()
+
+    fake = FakeGitHub(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        limits={
+            "core": args.core_limit,
+            "search": args.search_limit,
+            "graphql": 5000,
+        },
+        any_repo=True,
+    )
+    with fake.serve(args.port) as url:
+        print(f"Fake GitHub API listening on {url}, Ctrl-C to stop")
+        with suppress(KeyboardInterrupt):
+            threading.Event().wait()
+        print(f"Served {fake.count()} requests")
+
+
+if __name__ == "__main__":
+    main()
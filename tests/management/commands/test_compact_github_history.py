@@ -0,0 +1,25 @@
+"""Tests for the 'compact_github_history' management command."""
+
+from __future__ import annotations
+
+from io import StringIO
+from typing import TYPE_CHECKING
+
+from django.core.management import call_command
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+def test_compact_github_history_prints_counts(mocker: MockerFixture) -> None:
+    """Test the number of points removed at each resolution is printed."""
+    mocker.patch(
+        "app.management.commands.compact_github_history.compact_history",
+        return_value={"raw": 12, "week": 0},
+    )
+    out = StringIO()
+
+    call_command("compact_github_history", stdout=out)
+
+    assert "Raw: removed 12 points" in out.getvalue()
+    assert "Weekly: removed 0 points" in out.getvalue()
@@ -0,0 +1,45 @@
+"""Tests for the 'github_rate_limit' management command."""
+
+from __future__ import annotations
+
+import time
+from io import StringIO
+from typing import TYPE_CHECKING
+
+from django.core.management import call_command
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+def test_github_rate_limit_prints_buckets(mocker: MockerFixture) -> None:
+    """Test each rate limit bucket is printed."""
+    mocker.patch(
+        "app.services.github.GitHubAPIService.rate_limit_status",
+        return_value={
+            "core": {
+                "limit": 5000,
+                "remaining": 4321,
+                "reset": time.time() + 60,
+                "seconds_to_reset": 60,
+            }
+        },
+    )
+    out = StringIO()
+
+    call_command("github_rate_limit", stdout=out)
+
+    assert "core: 4321/5000 remaining" in out.getvalue()
+
+
+def test_github_rate_limit_unavailable(mocker: MockerFixture) -> None:
+    """Test a message is shown when the rate limit cannot be fetched."""
+    mocker.patch(
+        "app.services.github.GitHubAPIService.rate_limit_status",
+        return_value={},
+    )
+    err = StringIO()
+
+    call_command("github_rate_limit", stderr=err)
+
+    assert "Could not fetch" in err.getvalue()
@@ -0,0 +1,190 @@
+"""Tests for the 'refresh_github_stats' management command."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from io import StringIO
+from typing import TYPE_CHECKING
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from app.models import GitHubStats, Lease, Project
+from app.services.leader import acquire_lease, release_lease
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def projects(mocker: MockerFixture) -> list[Project]:
+    """Create projects with fresh, stale and missing stats."""
+    # Don't let the post_save signal call the GitHub API
+    mocker.patch("app.jobs.GitHubAPIService")
+
+    fresh = Project.objects.create(
+        title="Fresh", repo="https://github.com/owner/fresh"
+    )
+    GitHubStats.objects.create(project=fresh)
+
+    stale = Project.objects.create(
+        title="Stale", repo="https://github.com/owner/stale"
+    )
+    GitHubStats.objects.create(
+        project=stale, last_updated=timezone.now() - timedelta(hours=2)
+    )
+
+    missing = Project.objects.create(
+        title="Missing", repo="https://github.com/owner/missing"
+    )
+    Project.objects.create(title="No Repo")
+
+    return [fresh, stale, missing]
+
+
+def count_projects(projects: list[Project], **_kwargs: object) -> int:
+    """Stand in for refresh_projects, refreshing every project given."""
+    return len(projects)
+
+
+def test_refresh_only_due_projects(
+    projects: list[Project], mocker: MockerFixture
+) -> None:
+    """Test only projects with stale or missing stats are refreshed."""
+    mock_refresh = mocker.patch(
+        "app.services.github.GitHubAPIService.refresh_projects",
+        side_effect=count_projects,
+    )
+    out = StringIO()
+
+    call_command("refresh_github_stats", "--workers", "1", stdout=out)
+
+    refreshed = {
+        p.title for call in mock_refresh.call_args_list for p in call[0][0]
+    }
+    assert refreshed == {"Stale", "Missing"}
+    assert "Refreshed stats for 2 projects." in out.getvalue()
+
+
+def test_refresh_max_age_zero_refreshes_all(
+    projects: list[Project], mocker: MockerFixture
+) -> None:
+    """Test a max age of 0 refreshes every project with a repo."""
+    mock_refresh = mocker.patch(
+        "app.services.github.GitHubAPIService.refresh_projects",
+        side_effect=count_projects,
+    )
+
+    call_command(
+        "refresh_github_stats",
+        "--max-age",
+        "0",
+        "--workers",
+        "3",
+        stdout=StringIO(),
+    )
+
+    # Three projects over three workers is one project per batch
+    assert mock_refresh.call_count == 3
+
+
+def test_refresh_nothing_due(mocker: MockerFixture) -> None:
+    """Test nothing is refreshed when no project is due."""
+    mock_refresh = mocker.patch(
+        "app.services.github.GitHubAPIService.refresh_projects"
+    )
+    out = StringIO()
+
+    call_command("refresh_github_stats", stdout=out)
+
+    mock_refresh.assert_not_called()
+    assert "Refreshed stats for 0 projects." in out.getvalue()
+
+
+def test_refresh_daemon_loops_until_interrupted(
+    mocker: MockerFixture,
+) -> None:
+    """Test daemon mode keeps refreshing until it is interrupted."""
+    mock_once = mocker.patch(
+        "app.management.commands.refresh_github_stats.Command.refresh_once",
+        return_value=0,
+    )
+    mocker.patch(
+        "app.management.commands.refresh_github_stats.time.sleep",
+        side_effect=[None, KeyboardInterrupt],
+    )
+
+    call_command("refresh_github_stats", "--daemon", stdout=StringIO())
+
+    assert mock_once.call_count == 2
+
+
+def test_refresh_async(projects: list[Project], mocker: MockerFixture) -> None:
+    """Test the '--async' option refreshes with the async client."""
+    mock_refresh = mocker.patch(
+        "app.services.github.AsyncGitHubAPIService.arefresh_projects",
+        return_value=2,
+    )
+    out = StringIO()
+
+    call_command("refresh_github_stats", "--async", stdout=out)
+
+    refreshed = {p.title for p in mock_refresh.call_args[0][0]}
+    assert refreshed == {"Stale", "Missing"}
+    assert "Refreshed stats for 2 projects." in out.getvalue()
+
+
+@pytest.mark.usefixtures("projects")
+def test_refresh_sweeps_owner_first(mocker: MockerFixture) -> None:
+    """Test '--sweep' sweeps the owner's repos before the normal refresh."""
+    calls: list[str] = []
+
+    def sweep_owner() -> int:
+        calls.append("sweep")
+        return 2
+
+    def refresh_projects(projects: list[Project], **_kwargs: object) -> int:
+        calls.append("refresh")
+        return len(projects)
+
+    mocker.patch(
+        "app.services.github.GitHubAPIService.sweep_owner",
+        side_effect=sweep_owner,
+    )
+    mocker.patch(
+        "app.services.github.GitHubAPIService.refresh_projects",
+        side_effect=refresh_projects,
+    )
+    out = StringIO()
+
+    call_command(
+        "refresh_github_stats", "--workers", "1", "--sweep", stdout=out
+    )
+
+    assert calls == ["sweep", "refresh"]
+    assert "Swept stats for 2 projects." in out.getvalue()
+
+
+def test_refresh_leader_mode(mocker: MockerFixture) -> None:
+    """Test only the process holding the leader lease refreshes."""
+    mock_once = mocker.patch(
+        "app.management.commands.refresh_github_stats.Command.refresh_once",
+        return_value=0,
+    )
+    acquire_lease("refresh_github_stats", 600, holder="other-node")
+    out = StringIO()
+
+    call_command("refresh_github_stats", "--leader", stdout=out)
+
+    mock_once.assert_not_called()
+    assert "Another process is the leader" in out.getvalue()
+
+    release_lease("refresh_github_stats", holder="other-node")
+    call_command("refresh_github_stats", "--leader", stdout=StringIO())
+
+    mock_once.assert_called_once()
+    # The lease is given up when the command exits
+    assert not Lease.objects.exists()
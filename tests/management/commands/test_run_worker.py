@@ -0,0 +1,45 @@
+"""Tests for the 'run_worker' management command."""
+
+from __future__ import annotations
+
+from io import StringIO
+from typing import TYPE_CHECKING
+
+import pytest
+from django.core.management import call_command
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+pytestmark = pytest.mark.django_db
+
+
+def test_run_worker_once_runs_until_empty(mocker: MockerFixture) -> None:
+    """Test '--once' keeps claiming batches until no jobs are ready."""
+    run_pending = mocker.patch(
+        "app.management.commands.run_worker.run_pending",
+        side_effect=[10, 3, 0],
+    )
+    out = StringIO()
+
+    call_command("run_worker", "--once", "--batch", "10", stdout=out)
+
+    assert run_pending.call_count == 3
+    run_pending.assert_called_with(10)
+    assert "Ran 13 jobs." in out.getvalue()
+
+
+def test_run_worker_polls_until_interrupted(mocker: MockerFixture) -> None:
+    """Test the worker sleeps between polls and stops on Ctrl+C."""
+    mocker.patch(
+        "app.management.commands.run_worker.run_pending", return_value=0
+    )
+    sleep = mocker.patch(
+        "app.management.commands.run_worker.time.sleep",
+        side_effect=[None, KeyboardInterrupt],
+    )
+
+    call_command("run_worker", "--interval", "2", stdout=StringIO())
+
+    assert sleep.call_count == 2
+    sleep.assert_called_with(2.0)
@@ -60,27 +60,97 @@ def test_github_stats_needs_update(mocker: MockerFixture) -> None:
 
     # Case 1: Updated exactly "now" - should not need update
     stats.last_updated = mock_now
-    stats.save()
+    stats.schedule_next(changed=True)
     assert not stats.needs_update()
 
     # Case 2: Older than 30 minutes - should need update
     stats.last_updated = mock_now - timedelta(minutes=30, seconds=1)
-    stats.save()
+    stats.schedule_next(changed=True)
     assert stats.needs_update()
 
-    # Case 3: Exactly 30 minutes old - should not need update
+    # Case 3: Exactly 30 minutes old - due from then on
     stats.last_updated = mock_now - timedelta(minutes=30)
-    stats.save()
-    assert not stats.needs_update()
+    stats.schedule_next(changed=True)
+    assert stats.needs_update()
 
     # Case 4: Slightly less than 30 minutes old - should not need update
     stats.last_updated = mock_now - timedelta(minutes=29, seconds=59)
-    stats.save()
+    stats.schedule_next(changed=True)
+    assert not stats.needs_update()
+
+    # Case 5: Never scheduled - not due, like `due_filter`
+    stats.next_due_at = None
+    assert not stats.needs_update()
+    assert not GitHubStats.objects.filter(
+        GitHubStats.due_filter(), pk=stats.pk
+    ).exists()
+
+
+def test_github_stats_scheduled_when_created(settings) -> None:
+    """Tests new rows have their first refresh scheduled from last_updated."""
+    settings.GITHUB_STATS_TTL_MINUTES = 30
+    last_updated = datetime(2024, 1, 1, 12, 0, 0, tzinfo=dt_timezone.utc)
+    created = GitHubStats.objects.create(
+        project=Project.objects.create(title="Created"),
+        last_updated=last_updated,
+    )
+    (built,) = GitHubStats.for_projects([Project.objects.create(title="Built")])
+
+    assert created.next_due_at == last_updated + timedelta(minutes=30)
+    assert created.ttl_minutes == 30
+    assert built.next_due_at == built.last_updated + timedelta(minutes=30)
+    assert built.ttl_minutes == 30
+
+
+def test_github_stats_record_failure_backs_off(
+    mocker: MockerFixture, settings
+) -> None:
+    """Tests failed refreshes back off exponentially, up to the maximum."""
+    settings.GITHUB_FAILURE_BACKOFF_SECONDS = 60
+    settings.GITHUB_FAILURE_BACKOFF_MAX_SECONDS = 200
+    mock_now = datetime(2024, 1, 1, 12, 0, 0, tzinfo=dt_timezone.utc)
+    mocker.patch("django.utils.timezone.now", return_value=mock_now)
+    mocker.patch("app.jobs.GitHubAPIService")
+    project = Project.objects.create(title="Failing Project", repo="x")
+    stats = GitHubStats(
+        project=project, last_updated=mock_now - timedelta(days=1)
+    )
+
+    delays = []
+    for _ in range(3):
+        stats.record_failure()
+        assert stats.retry_after is not None
+        delays.append(stats.retry_after - mock_now)
+
+    assert delays == [
+        timedelta(seconds=60),
+        timedelta(seconds=120),
+        timedelta(seconds=200),
+    ]
+    assert stats.failure_count == 3
     assert not stats.needs_update()
 
-    # Case 5: Test the `if not self.last_updated:` branch directly in memory
-    stats.last_updated = mock_now  # Reset to a known non-None value first
-    stats.save()
 
-    stats.last_updated = None  # type: ignore [assignment]
+def test_github_stats_schedule_next_adapts_ttl(
+    mocker: MockerFixture, settings
+) -> None:
+    """Tests the TTL doubles while nothing changes and resets on a change."""
+    settings.GITHUB_STATS_TTL_MINUTES = 30
+    settings.GITHUB_STATS_MAX_TTL_MINUTES = 100
+    mock_now = datetime(2024, 1, 1, 12, 0, 0, tzinfo=dt_timezone.utc)
+    mocker.patch("django.utils.timezone.now", return_value=mock_now)
+    mocker.patch("app.jobs.GitHubAPIService")
+    project = Project.objects.create(title="Quiet Project", repo="x")
+    stats = GitHubStats(project=project, last_updated=mock_now)
+
+    ttls = []
+    for changed in (False, False, False, False, True):
+        stats.schedule_next(changed=changed)
+        ttls.append(stats.ttl_minutes)
+
+    assert ttls == [30, 60, 100, 100, 30]
+    assert stats.next_due_at == mock_now + timedelta(minutes=30)
+    assert not stats.needs_update()
+
+    stats.next_due_at = mock_now
     assert stats.needs_update()
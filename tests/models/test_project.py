@@ -1,8 +1,20 @@
 """Tests for the Project model."""
 
+import json
+
 import pytest
+from django.core.management import call_command
 
-from app.models import GitHubStats, Project, Tag
+from app import signals
+from app.models import (
+    UNPRIORITIZED_SORT_KEY,
+    GitHubStats,
+    Job,
+    Project,
+    Tag,
+    parse_github_repo,
+)
+from app.services.jobs import REFRESH_PROJECT_JOB
 
 pytestmark = pytest.mark.django_db
 
@@ -115,3 +127,192 @@ def test_get_or_create_stats_gets_existing_stats() -> None:
     assert stats.forks == 5
     assert stats.open_issues == 2
     assert stats.open_prs == 1
+
+
+def test_save_queues_stats_refresh_after_commit(
+    mocker, django_capture_on_commit_callbacks
+) -> None:
+    """Test saving a project only queues a refresh when its repo changes."""
+    submit = mocker.patch.object(signals.refresh_executor, "submit")
+    repo = "https://github.com/owner/repo"
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        project = Project.objects.create(title="Queued", repo=repo)
+    assert len(callbacks) == 1
+    key = f"project:{project.pk}:{repo}"
+    submit.assert_called_once_with(
+        key,
+        signals.refresh_project_in_background,
+        key,
+        {"project_id": project.pk},
+    )
+
+    # Saves that leave the repo alone, from any instance, do nothing
+    with django_capture_on_commit_callbacks() as callbacks:
+        project.priority = 1
+        project.save()
+        Project.objects.get(pk=project.pk).save()
+    assert callbacks == []
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        project.repo = "https://github.com/owner/other"
+        project.save()
+    assert len(callbacks) == 1
+
+
+def test_background_refresh_resubmitted_when_not_claimed(
+    mocker, settings
+) -> None:
+    """Test a refresh that could not be claimed is submitted again later."""
+    settings.JOB_MAX_ATTEMPTS = 2
+    settings.JOB_RETRY_SECONDS = 60
+    mocker.patch.object(
+        signals, "refresh_project", side_effect=signals.JobError
+    )
+    timer = mocker.patch("app.signals.threading.Timer")
+    payload = {"project_id": 1}
+
+    signals.refresh_project_in_background("key", payload)
+
+    timer.assert_called_once_with(
+        60,
+        signals.refresh_executor.submit,
+        ("key", signals.refresh_project_in_background, "key", payload, 2),
+    )
+    timer.return_value.start.assert_called_once()
+
+    # The last attempt fails for good
+    with pytest.raises(signals.JobError):
+        signals.refresh_project_in_background("key", payload, 2)
+    timer.assert_called_once()
+
+
+def test_save_queues_job_when_queue_enabled(
+    settings, django_capture_on_commit_callbacks
+) -> None:
+    """Test the refresh is queued with the save when the job queue is on."""
+    settings.JOB_QUEUE_ENABLED = True
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        project = Project.objects.create(
+            title="Durable", repo="https://github.com/owner/repo"
+        )
+
+    assert callbacks == []
+    job = Job.objects.get()
+    assert job.name == REFRESH_PROJECT_JOB
+    assert job.payload == {"project_id": project.pk}
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("https://github.com/Owner/Repo", ("owner", "repo")),
+        ("https://www.github.com/owner/repo.git/", ("owner", "repo")),
+        ("https://github.com/owner/repo/issues", ("owner", "repo")),
+        ("https://github.com/owner", ("", "")),
+        ("https://gitlab.com/owner/repo", ("", "")),
+        ("not_a_url", ("", "")),
+        ("", ("", "")),
+    ],
+)
+def test_parse_github_repo(url: str, expected: tuple[str, str]) -> None:
+    """Test only GitHub repository URLs are parsed, and are normalized."""
+    assert parse_github_repo(url) == expected
+
+
+def test_save_stores_parsed_github_repo() -> None:
+    """Test the parsed repository follows the repo URL on every save."""
+    project = Project.objects.create(
+        title="Parsed", repo="https://github.com/Owner/Repo"
+    )
+    assert (project.github_owner, project.github_repo) == ("owner", "repo")
+    assert project.on_github
+
+    project.repo = "https://gitlab.com/owner/repo"
+    project.save(update_fields=["repo"])
+
+    project.refresh_from_db()
+    assert (project.github_owner, project.github_repo) == ("", "")
+    assert not project.on_github
+
+
+def test_ordered_puts_projects_without_priority_last() -> None:
+    """Test projects are listed by priority, then by creation date."""
+    unprioritized = Project.objects.create(title="No Priority")
+    low = Project.objects.create(title="Low Priority", priority=10)
+    later = Project.objects.create(title="Also No Priority")
+    high = Project.objects.create(title="High Priority", priority=1)
+
+    assert list(Project.objects.ordered()) == [
+        high,
+        low,
+        unprioritized,
+        later,
+    ]
+
+
+def test_save_keeps_sort_key_in_step() -> None:
+    """Test the sort key follows the priority, including partial saves."""
+    project = Project.objects.create(title="Sorted", priority=3)
+    assert project.sort_key == 3
+
+    project.priority = None
+    project.save(update_fields=["priority"])
+
+    project.refresh_from_db()
+    assert project.sort_key == UNPRIORITIZED_SORT_KEY
+
+
+def test_loaddata_sets_derived_fields(tmp_path) -> None:
+    """Test a fixture dumped without the derived fields still loads them."""
+    fixture = tmp_path / "seed.json"
+    fixture.write_text(
+        json.dumps(
+            [
+                {
+                    "model": "app.project",
+                    "pk": 1,
+                    "fields": {
+                        "title": "Seeded",
+                        "details": "",
+                        "repo": "https://github.com/Owner/Repo",
+                        "priority": 2,
+                        "created_at": "2024-01-01T00:00:00Z",
+                        "updated_at": "2024-01-01T00:00:00Z",
+                    },
+                }
+            ]
+        )
+    )
+
+    call_command("loaddata", str(fixture), verbosity=0)
+
+    project = Project.objects.get(pk=1)
+    assert project.sort_key == 2
+    assert (project.github_owner, project.github_repo) == ("owner", "repo")
+
+
+def test_loading_deferred_repo_costs_no_queries(
+    django_assert_num_queries,
+) -> None:
+    """Test the repo is not read for each project when it is deferred."""
+    for i in range(5):
+        Project.objects.create(title=f"Deferred {i}")
+
+    with django_assert_num_queries(1):
+        list(Project.objects.only("id", "title"))
+
+
+def test_repo_changed() -> None:
+    """Test a repo change is spotted against the repo as loaded."""
+    Project.objects.create(title="Changed", repo="https://github.com/o/a")
+    project = Project.objects.get()
+    assert not project.repo_changed(None)
+
+    project.repo = "https://github.com/o/b"
+    assert project.repo_changed(None)
+
+    deferred = Project.objects.only("id").get()
+    assert not deferred.repo_changed(None)
+    assert deferred.repo_changed({"repo"})
@@ -0,0 +1,95 @@
+"""Test the GitHub API circuit breaker."""
+
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from app.models import GitHubCircuitBreaker
+from app.services.breaker import STATE_CACHE_SECONDS, CircuitBreaker
+
+
+@pytest.fixture
+def breaker(settings) -> CircuitBreaker:
+    """Create a breaker that opens after three failures."""
+    settings.GITHUB_BREAKER_THRESHOLD = 3
+    return CircuitBreaker()
+
+
+@pytest.mark.django_db
+def test_failures_below_threshold_stay_in_memory(
+    breaker: CircuitBreaker, django_assert_num_queries
+) -> None:
+    """Test failures below the threshold are never written to the database."""
+    with django_assert_num_queries(0):
+        breaker.record_failure("HTTP 502")
+        breaker.record_failure("HTTP 502")
+        breaker.record_success()
+
+    assert not breaker.is_open()
+    assert not GitHubCircuitBreaker.objects.exists()
+
+
+@pytest.mark.django_db
+def test_breaker_opened_by_another_process(
+    breaker: CircuitBreaker, mocker, django_assert_num_queries
+) -> None:
+    """Test the stored state is followed, and only read every few seconds."""
+    now = time.monotonic()
+    monotonic = mocker.patch(
+        "app.services.breaker.time.monotonic", return_value=now
+    )
+    with django_assert_num_queries(1):
+        assert not breaker.is_open()
+        assert not breaker.is_open()
+
+    GitHubCircuitBreaker.objects.create(
+        opened_until=timezone.now() + timedelta(minutes=5)
+    )
+    assert not breaker.is_open()
+
+    monotonic.return_value = now + STATE_CACHE_SECONDS
+    assert breaker.is_open()
+
+
+@pytest.mark.django_db
+def test_breaker_opens_after_threshold(breaker: CircuitBreaker) -> None:
+    """Test the breaker opens, and records its state, after the threshold."""
+    for _ in range(3):
+        breaker.record_failure("HTTP 503")
+
+    assert breaker.is_open()
+    state = GitHubCircuitBreaker.get_solo()
+    assert state.failures == 3
+    assert state.last_error == "HTTP 503"
+    assert state.is_open()
+
+
+@pytest.mark.django_db
+def test_success_closes_breaker(breaker: CircuitBreaker) -> None:
+    """Test a successful call closes an open breaker."""
+    for _ in range(3):
+        breaker.record_failure("HTTP 503")
+
+    breaker.record_success()
+
+    assert not breaker.is_open()
+    assert not GitHubCircuitBreaker.get_solo().is_open()
+
+
+@pytest.mark.django_db
+def test_breaker_closed_from_admin(breaker: CircuitBreaker, mocker) -> None:
+    """Test clearing the stored state closes the breaker early."""
+    for _ in range(3):
+        breaker.record_failure("HTTP 503")
+
+    GitHubCircuitBreaker.objects.update(opened_until=None)
+    mocker.patch(
+        "app.services.breaker.time.monotonic",
+        return_value=time.monotonic() + STATE_CACHE_SECONDS,
+    )
+
+    assert not breaker.is_open()
@@ -0,0 +1,128 @@
+"""Test the async GitHub API service."""
+
+# ruff: noqa: SLF001
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import httpx
+import pytest
+
+from app.models import GitHubStats, Project
+from app.services.github import AsyncGitHubAPIService
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+def _mock_api(request: httpx.Request) -> httpx.Response:
+    """Answer the REST calls used to fetch a repository's stats."""
+    if request.url.path.endswith("/pulls"):
+        return httpx.Response(200, json=[{"id": 1}, {"id": 2}])
+    if request.url.path.endswith("/missing"):
+        return httpx.Response(404)
+    return httpx.Response(
+        200,
+        json={"stargazers_count": 9, "forks_count": 3, "open_issues_count": 9},
+    )
+
+
+def _service(handler: object, concurrency: int = 10) -> AsyncGitHubAPIService:
+    """Create a service whose client uses a mock transport."""
+    service = AsyncGitHubAPIService(concurrency=concurrency)
+    service._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler)  # type: ignore[arg-type]
+    )
+    return service
+
+
+def test_afetch_repo_stats() -> None:
+    """Test the stats for one repository are fetched from all endpoints."""
+    service = _service(_mock_api)
+
+    stats = asyncio.run(service.afetch_repo_stats("owner", "repo"))
+
+    assert stats == {"stars": 9, "forks": 3, "open_issues": 7, "open_prs": 2}
+
+
+def test_afetch_repo_stats_failure() -> None:
+    """Test None is returned when the repository cannot be fetched."""
+    service = _service(_mock_api)
+
+    assert asyncio.run(service.afetch_repo_stats("owner", "missing")) is None
+
+
+def test_afetch_repo_stats_pull_requests_failed() -> None:
+    """Test None is returned when the pull requests cannot be fetched."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/pulls"):
+            return httpx.Response(404)
+        return _mock_api(request)
+
+    service = _service(handler)
+
+    assert asyncio.run(service.afetch_repo_stats("owner", "repo")) is None
+
+
+def test_afetch_many_limits_concurrency() -> None:
+    """Test no more than 'concurrency' repositories are fetched at once."""
+    active = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        if request.url.path.count("/") == 3:
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+        return _mock_api(request)
+
+    service = _service(handler, concurrency=2)
+    repos: list[tuple[str, str, GitHubStats | None]] = [
+        ("owner", f"repo{i}", None) for i in range(6)
+    ]
+
+    results = asyncio.run(service.afetch_many(repos))
+
+    assert len(results) == 6
+    assert all(result is not None for result in results)
+    assert peak == 2
+
+
+def test_client_requires_context_manager() -> None:
+    """Test the client cannot be used outside of 'async with'."""
+    with pytest.raises(RuntimeError):
+        _ = AsyncGitHubAPIService().client
+
+
+def test_context_manager_closes_client() -> None:
+    """Test the client is opened and closed by the context manager."""
+
+    async def run() -> httpx.AsyncClient:
+        async with AsyncGitHubAPIService() as service:
+            client = service.client
+            assert not client.is_closed
+        return client
+
+    assert asyncio.run(run()).is_closed
+
+
+@pytest.mark.django_db(transaction=True)
+def test_arefresh_projects(mocker: MockerFixture) -> None:
+    """Test claimed projects are fetched, saved and released."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    project = Project.objects.create(
+        title="Async", repo="https://github.com/owner/repo"
+    )
+    service = _service(_mock_api)
+
+    updated = asyncio.run(service.arefresh_projects([project]))
+
+    assert updated == 1
+    stats = GitHubStats.objects.get(project=project)
+    assert stats.stars == 9
+    assert stats.open_prs == 2
+    assert stats.refresh_lease_until is None
@@ -0,0 +1,287 @@
+"""Test the GitHub API service end to end against a fake GitHub API."""
+
+# ruff: noqa: SLF001
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+import httpx
+import pytest
+
+from app.models import GitHubStats, Project, SiteConfiguration
+from app.services.breaker import circuit_breaker
+from app.services.github import (
+    AsyncGitHubAPIService,
+    GitHubAPIService,
+    RateLimitedError,
+)
+from app.services.rate_limit import rate_limits
+from tests.fake_github import FakeGitHub
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from pytest_mock import MockerFixture
+
+
+@pytest.fixture
+def fake() -> FakeGitHub:
+    """Create a fake GitHub API serving one repository."""
+    fake = FakeGitHub()
+    fake.add_repo("owner", "repo", stars=42, forks=7, open_issues=5, open_prs=3)
+    return fake
+
+
+@pytest.fixture
+def client(fake: FakeGitHub, mocker: MockerFixture) -> Iterator[httpx.Client]:
+    """Send the service's requests to the fake, in process."""
+    with httpx.Client(transport=fake.transport()) as client:
+        mocker.patch("app.services.github.get_http_client", return_value=client)
+        yield client
+
+
+@pytest.mark.usefixtures("client")
+def test_fetch_repo_stats(fake: FakeGitHub) -> None:
+    """Test the stats are read from the repo and pulls endpoints only."""
+    stats = GitHubAPIService()._fetch_repo_stats("owner", "repo")
+
+    assert stats == {"stars": 42, "forks": 7, "open_issues": 5, "open_prs": 3}
+    assert fake.count("/repos/") == 2
+    assert fake.count("/search/") == 0
+    assert rate_limits.available("core") is not None
+
+
+@pytest.mark.usefixtures("client")
+def test_fetch_repo_stats_not_modified(fake: FakeGitHub) -> None:
+    """Test unchanged stats cost no rate limit on the second refresh."""
+    current = GitHubStats()
+    service = GitHubAPIService()
+    service._apply_stats(
+        current, service._fetch_repo_stats("owner", "repo", current) or {}
+    )
+    remaining = dict(fake.remaining)
+
+    stats = service._fetch_repo_stats("owner", "repo", current)
+
+    assert stats is not None
+    assert stats["stars"] == 42
+    # Only the open pull requests count is fetched again
+    assert fake.remaining["core"] == remaining["core"] - 1
+
+
+@pytest.mark.usefixtures("client")
+def test_fetch_repo_stats_pull_requests_changed(fake: FakeGitHub) -> None:
+    """Test new pull requests are counted, though the newest is unchanged."""
+    current = GitHubStats()
+    service = GitHubAPIService()
+    service._apply_stats(
+        current, service._fetch_repo_stats("owner", "repo", current) or {}
+    )
+    fake.repos["owner", "repo"].open_prs = 5
+
+    stats = service._fetch_repo_stats("owner", "repo", current)
+
+    assert stats is not None
+    assert (stats["open_issues"], stats["open_prs"]) == (5, 5)
+
+
+@pytest.mark.usefixtures("client")
+def test_fetch_repo_stats_missing_repo() -> None:
+    """Test a missing repository is reported as a failure."""
+    assert GitHubAPIService()._fetch_repo_stats("owner", "gone") is None
+
+
+@pytest.mark.usefixtures("client")
+def test_fetch_stats_graphql(fake: FakeGitHub) -> None:
+    """Test a batch of repositories is fetched with one GraphQL query."""
+    fake.add_repo("owner", "other", stars=1)
+    service = GitHubAPIService()
+    service.tokens = ["token"]
+
+    stats = service._fetch_stats_graphql(
+        [("owner", "repo"), ("owner", "other"), ("owner", "gone")]
+    )
+
+    assert stats is not None
+    assert stats["owner", "repo"]["open_prs"] == 3
+    assert stats["owner", "other"]["stars"] == 1
+    assert ("owner", "gone") not in stats
+    assert fake.count("/graphql") == 1
+
+
+@pytest.mark.usefixtures("client")
+def test_server_errors_open_breaker(
+    fake: FakeGitHub, settings, mocker: MockerFixture
+) -> None:
+    """Test a failing API opens the circuit breaker."""
+    settings.GITHUB_BREAKER_THRESHOLD = 3
+    mocker.patch("app.services.breaker.GitHubCircuitBreaker")
+    fake.error_rate = 1.0
+    service = GitHubAPIService()
+
+    for _ in range(3):
+        assert service._fetch_repo_stats("owner", "repo") is None
+
+    assert circuit_breaker._opened_until is not None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_refresh_over_http(
+    fake: FakeGitHub, settings, mocker: MockerFixture
+) -> None:
+    """Test a real refresh over HTTP, with the async and sync clients."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    projects = [
+        Project.objects.create(
+            title=f"Project {i}", repo=f"https://github.com/owner/repo{i}"
+        )
+        for i in range(6)
+    ]
+    fake.any_repo = True
+    fake.latency = 0.01
+
+    with fake.serve() as url:
+        settings.GITHUB_API_URL = url
+
+        async def refresh() -> int:
+            async with AsyncGitHubAPIService(concurrency=3) as service:
+                return await service.arefresh_projects(projects[:3])
+
+        assert asyncio.run(refresh()) == 3
+        assert GitHubAPIService().refresh_projects(projects[3:]) == 3
+
+    assert GitHubStats.objects.filter(stars__gt=0).count() == 6
+    assert fake.count("/repos/") == 12
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("client")
+def test_sweep_owner(fake: FakeGitHub, mocker: MockerFixture) -> None:
+    """Test an owner's repos are refreshed from a paginated listing."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    mocker.patch("app.services.github.REPO_LIST_PAGE_SIZE", 2)
+    for i in range(4):
+        fake.add_repo("owner", f"extra{i}", stars=i)
+    SiteConfiguration.objects.create(github_username="Owner")
+    swept = Project.objects.create(
+        title="Swept", repo="https://github.com/owner/repo"
+    )
+    Project.objects.create(
+        title="Private", repo="https://github.com/owner/private"
+    )
+    Project.objects.create(title="Other", repo="https://github.com/other/repo")
+
+    assert GitHubAPIService().sweep_owner() == 1
+
+    stats = GitHubStats.objects.get(project=swept)
+    assert (stats.stars, stats.forks, stats.open_issues, stats.open_prs) == (
+        42,
+        7,
+        5,
+        3,
+    )
+    # Three pages of repos, and one pulls call for the matching project
+    assert fake.count("/users/Owner/repos") == 3
+    assert fake.count("/repos/") == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("client")
+def test_sweep_owner_respects_core_budget(
+    fake: FakeGitHub, mocker: MockerFixture
+) -> None:
+    """Test a sweep is skipped without core budget, whatever GraphQL has."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    Project.objects.create(title="Swept", repo="https://github.com/owner/repo")
+    service = GitHubAPIService()
+    service.tokens = ["token"]
+    rate_limits.record("core", 5000, 0, time.time() + 600, "1")
+    rate_limits.record("graphql", 5000, 5000, time.time() + 600, "1")
+
+    assert service.sweep_owner("owner") == 0
+    assert fake.count() == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("client")
+def test_sweep_owner_charges_listing_pages(
+    fake: FakeGitHub, mocker: MockerFixture
+) -> None:
+    """Test the listing pages actually fetched are taken from the budget."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    mocker.patch("app.services.github.REPO_LIST_PAGE_SIZE", 2)
+    for i in range(4):
+        fake.add_repo("owner", f"extra{i}", stars=i)
+    fake.limits["core"] = 5
+    fake.reset_rate_limits()
+    for name in ("repo", "extra0", "extra1"):
+        Project.objects.create(
+            title=f"Project {name}", repo=f"https://github.com/owner/{name}"
+        )
+
+    claim = mocker.spy(GitHubAPIService, "claim_for_refresh")
+
+    # Three pages for five repos leave two calls, for two of three projects
+    assert GitHubAPIService().sweep_owner("owner") == 2
+    assert len(claim.spy_return) == 2
+    assert fake.count("/users/owner/repos") == 3
+    assert fake.count("/repos/") == 2
+    assert not GitHubStats.objects.filter(failure_count__gt=0).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("client")
+def test_refresh_defers_once_rate_limited(
+    fake: FakeGitHub, mocker: MockerFixture
+) -> None:
+    """Test stats are never guessed or backed off when the budget runs out."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    fake.add_repo("owner", "busy", stars=1, forks=1, open_issues=28, open_prs=5)
+    fake.limits["core"] = 3
+    fake.reset_rate_limits()
+    projects = [
+        Project.objects.create(
+            title=f"Project {name}", repo=f"https://github.com/owner/{name}"
+        )
+        for name in ("repo", "busy", "repo", "busy")
+    ]
+
+    GitHubAPIService()._update_stats_batch(projects)
+
+    rows = [GitHubStats.objects.get(project=project) for project in projects]
+    assert (rows[0].open_issues, rows[0].open_prs) == (5, 3)
+    # The second repo was fetched, but its pull requests could not be
+    assert all(row.open_prs == 0 for row in rows[1:])
+    assert all(row.failure_count == 0 for row in rows)
+    assert fake.count("/repos/") == 3
+
+
+@pytest.mark.usefixtures("client")
+def test_rate_limited_response_defers(fake: FakeGitHub) -> None:
+    """Test a request refused for the rate limit stops the fetches."""
+    fake.remaining["core"] = 0
+    service = GitHubAPIService()
+
+    with pytest.raises(RateLimitedError):
+        service._fetch_repo_stats("owner", "repo")
+    # Nothing more is sent until the rate limit resets
+    with pytest.raises(RateLimitedError):
+        service._fetch_repo_stats("owner", "repo")
+    assert fake.count("/repos/") == 1
+
+
+def test_retry_after_skips_requests(mocker: MockerFixture) -> None:
+    """Test a secondary rate limit holds requests back as long as asked."""
+    client = mocker.MagicMock(spec=httpx.Client)
+    client.get.return_value = httpx.Response(
+        429, headers={"Retry-After": "60"}, json={"message": "Slow down"}
+    )
+    service = GitHubAPIService()
+
+    with pytest.raises(RateLimitedError):
+        service._get(client, "https://api.github.com/repos/owner/repo")
+    with pytest.raises(RateLimitedError):
+        service._auth("core")
+    assert client.get.call_count == 1
@@ -3,13 +3,25 @@
 # ruff: noqa: SLF001
 from __future__ import annotations
 
+import time
+from datetime import timedelta
+
 import httpx
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from response_codes import HTTP_200_OK
+from response_codes import (
+    HTTP_200_OK,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_401_UNAUTHORIZED,
+)
 
-from app.models import GitHubStats, Project
-from app.services.github import GitHubAPIService
+from app.models import GitHubStats, GitHubStatsHistory, Job, Project
+from app.services.github import GitHubAPIService, NoTokenError
+from app.services.jobs import REFRESH_STATS_JOB
+from app.services.rate_limit import rate_limits
+from app.services.refresh import RefreshGuard
 
 
 @pytest.fixture
@@ -18,60 +30,22 @@ def github_service() -> GitHubAPIService:
     return GitHubAPIService()
 
 
-def test_parse_repo_url_valid(github_service: GitHubAPIService) -> None:
-    """Test parsing valid GitHub repository URLs."""
-    # Test standard GitHub URL
-    owner, repo = github_service.parse_repo_url("https://github.com/owner/repo")
-    assert owner == "owner"
-    assert repo == "repo"
-
-    # Test URL with trailing slash
-    owner, repo = github_service.parse_repo_url(
-        "https://github.com/owner/repo/"
-    )
-    assert owner == "owner"
-    assert repo == "repo"
-
-    # Test URL with additional path components
-    owner, repo = github_service.parse_repo_url(
-        "https://github.com/owner/repo/issues"
-    )
-    assert owner == "owner"
-    assert repo == "repo"
-
-
-def test_parse_repo_url_invalid(github_service: GitHubAPIService) -> None:
-    """Test parsing invalid GitHub repository URLs."""
-    # Test empty URL
-    owner, repo = github_service.parse_repo_url("")
-    assert owner is None
-    assert repo is None
-
-    # Test malformed URL
-    owner, repo = github_service.parse_repo_url("not_a_url")
-    assert owner is None
-    assert repo is None
-
-    # Test incomplete URL
-    owner, repo = github_service.parse_repo_url("https://github.com/owner")
-    assert owner is None
-    assert repo is None
-
-
 def test_fetch_repo_stats_success(
     github_service: GitHubAPIService, mocker
 ) -> None:
     """Test fetching repository stats with successful API responses."""
-    # Mock httpx.Client
-    mock_client = mocker.MagicMock()
-    mock_client.__enter__.return_value = mock_client
+    # Mock the shared client
+    mock_client = mocker.MagicMock(spec=httpx.Client)
 
     # Mock responses
     mock_client.get.side_effect = [
         # First call - repo stats
         httpx.Response(
             status_code=HTTP_200_OK.status_code,
-            content=b'{"stargazers_count": 100, "forks_count": 50}',
+            content=(
+                b'{"stargazers_count": 100, "forks_count": 50, '
+                b'"open_issues_count": 30}'
+            ),
             request=httpx.Request(
                 "GET", "https://api.github.com/repos/owner/repo"
             ),
@@ -90,18 +64,12 @@ def test_fetch_repo_stats_success(
                 "GET", "https://api.github.com/repos/owner/repo/pulls"
             ),
         ),
-        # Third call - issues
-        httpx.Response(
-            status_code=HTTP_200_OK.status_code,
-            content=b'{"total_count": 25}',
-            request=httpx.Request(
-                "GET", "https://api.github.com/search/issues"
-            ),
-        ),
     ]
 
-    # Mock httpx.Client creation
-    mocker.patch("httpx.Client", return_value=mock_client)
+    # Use the mock in place of the shared pooled client
+    mocker.patch(
+        "app.services.github.get_http_client", return_value=mock_client
+    )
 
     # Test fetching stats
     stats = github_service._fetch_repo_stats("owner", "repo")
@@ -110,9 +78,11 @@ def test_fetch_repo_stats_success(
     assert stats["stars"] == 100
     assert stats["forks"] == 50
     assert stats["open_prs"] == 5  # From Link header
-    assert stats["open_issues"] == 25  # From issues search
+    assert stats["open_issues"] == 25  # Open issues and PRs, less the PRs
+    assert mock_client.get.call_count == 2
 
 
+@pytest.mark.django_db
 def test_get_stats_for_projects(
     github_service: GitHubAPIService, mocker
 ) -> None:
@@ -121,14 +91,21 @@ def test_get_stats_for_projects(
     mock_project1 = mocker.MagicMock(spec=Project)
     mock_project1.id = 1
     mock_project1.repo = "https://github.com/owner1/repo1"
+    mock_project1.github_owner = "owner1"
+    mock_project1.github_repo = "repo1"
+    mock_project1.on_github = True
 
     mock_project2 = mocker.MagicMock(spec=Project)
     mock_project2.id = 2
     mock_project2.repo = None  # Project without repo
+    mock_project2.on_github = False
 
     mock_project3 = mocker.MagicMock(spec=Project)
     mock_project3.id = 3
     mock_project3.repo = "https://github.com/owner3/repo3"
+    mock_project3.github_owner = "owner3"
+    mock_project3.github_repo = "repo3"
+    mock_project3.on_github = True
 
     # Create mock stats
     mock_stats1 = mocker.MagicMock(spec=GitHubStats)
@@ -139,108 +116,77 @@ def test_get_stats_for_projects(
     mock_stats3.last_updated = timezone.now() - timezone.timedelta(hours=2)
     mock_stats3.needs_update.return_value = True
 
-    # Set up project.get_or_create_stats() returns
-    mock_project1.get_or_create_stats.return_value = mock_stats1
-    mock_project3.get_or_create_stats.return_value = mock_stats3
+    # Stats are loaded for all projects with a repo in one go
+    mock_load = mocker.patch.object(
+        github_service,
+        "_load_stats",
+        return_value={1: mock_stats1, 3: mock_stats3},
+    )
 
-    # Mock Thread to prevent actual thread creation
-    mock_thread = mocker.patch("threading.Thread")
+    # Mock the executor to prevent actual background work
+    mock_submit = mocker.patch(
+        "app.services.github.refresh_executor.submit", return_value=True
+    )
+    mocker.patch(
+        "app.services.github.refresh_guard.acquire_many", return_value={1, 3}
+    )
 
     # Test getting stats for all projects
     stats_map = github_service.get_stats_for_projects(
         [mock_project1, mock_project2, mock_project3]
     )
 
-    # Verify results
-    assert len(stats_map) == 2  # Only projects with repos should be in map
+    # Verify results, only projects with repos should be in the map
+    mock_load.assert_called_once_with(
+        [mock_project1, mock_project3], use_loaded=True
+    )
+    assert len(stats_map) == 2
     assert stats_map[1] == mock_stats1
     assert stats_map[3] == mock_stats3
 
-    # Verify thread creation for project3 (needs update)
-    mock_thread.assert_called_once()
-    assert mock_thread.call_args[1]["args"] == (mock_project3,)
-    assert mock_thread.call_args[1]["daemon"] is True
-
-    # Verify no thread creation for project1 (doesn't need update)
-    assert mock_thread.call_count == 1
-
-
-def test_update_stats_sync(github_service: GitHubAPIService, mocker) -> None:
-    """Test synchronous update of GitHub stats."""
-    # Create mock project and stats
-    mock_project = mocker.MagicMock(spec=Project)
-    mock_project.repo = "https://github.com/owner/repo"
-    mock_stats = mocker.MagicMock(spec=GitHubStats)
-    mock_project.get_or_create_stats.return_value = mock_stats
-
-    # Mock _fetch_repo_stats to return test data
-    mock_stats_data = {
-        "stars": 100,
-        "forks": 50,
-        "open_issues": 25,
-        "open_prs": 5,
-    }
-    mocker.patch.object(
-        github_service, "_fetch_repo_stats", return_value=mock_stats_data
-    )
-
-    # Test updating stats
-    github_service._update_stats_sync(mock_project)
+    # Verify a single batch task is queued for project3 (needs update), and
+    # nothing for project1 (doesn't need update)
+    mock_submit.assert_called_once()
+    assert mock_submit.call_args[0][0] == github_service._refresh_key([3])
+    assert mock_submit.call_args[0][2] == [mock_project3]
 
-    # Verify stats were updated
-    assert mock_stats.stars == 100
-    assert mock_stats.forks == 50
-    assert mock_stats.open_issues == 25
-    assert mock_stats.open_prs == 5
-    mock_stats.save.assert_called_once()
 
+def test_refresh_key_fits_job_dedup_key() -> None:
+    """Test the key stays short however many projects are refreshed."""
+    ids = list(range(10000, 12000))
 
-def test_update_stats_sync_invalid_repo(
-    github_service: GitHubAPIService, mocker
-) -> None:
-    """Test synchronous update with invalid repository URL."""
-    # Create mock project with invalid repo URL
-    mock_project = mocker.MagicMock(spec=Project)
-    mock_project.repo = "invalid_url"
+    key = GitHubAPIService._refresh_key(ids)
 
-    # Mock _fetch_repo_stats (shouldn't be called)
-    mock_fetch = mocker.patch.object(github_service, "_fetch_repo_stats")
+    Job(name="refresh", dedup_key=key).clean_fields()
+    assert key == GitHubAPIService._refresh_key(ids[::-1])
+    assert key != GitHubAPIService._refresh_key(ids[1:])
 
-    # Test updating stats
-    github_service._update_stats_sync(mock_project)
 
-    # Verify _fetch_repo_stats was not called
-    mock_fetch.assert_not_called()
-
-
-def test_update_stats_sync_fetch_failure(
+@pytest.mark.django_db
+def test_update_stats_batch_skips_projects_off_github(
     github_service: GitHubAPIService, mocker
 ) -> None:
-    """Test synchronous update when fetching stats fails."""
-    # Create mock project and stats
-    mock_project = mocker.MagicMock(spec=Project)
-    mock_project.repo = "https://github.com/owner/repo"
-    mock_stats = mocker.MagicMock(spec=GitHubStats)
-    mock_project.get_or_create_stats.return_value = mock_stats
-
-    # Mock _fetch_repo_stats to return None (failure)
-    mocker.patch.object(github_service, "_fetch_repo_stats", return_value=None)
+    """Test projects without a GitHub repository are never fetched."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    project = Project.objects.create(title="Elsewhere", repo="invalid_url")
+    mock_graphql = mocker.patch.object(
+        github_service, "_fetch_stats_graphql", return_value=None
+    )
+    mock_rest = mocker.patch.object(github_service, "_fetch_repo_stats")
 
-    # Test updating stats
-    github_service._update_stats_sync(mock_project)
+    github_service._update_stats_batch([project])
 
-    # Verify stats were not updated
-    mock_stats.save.assert_not_called()
+    mock_graphql.assert_called_once_with([])
+    mock_rest.assert_not_called()
+    assert not GitHubStats.objects.filter(project=project).exists()
 
 
 def test_fetch_repo_stats_failure(
     github_service: GitHubAPIService, mocker
 ) -> None:
     """Test fetching repository stats with failed API response."""
-    # Mock httpx.Client
-    mock_client = mocker.MagicMock(spec=httpx.Client)
+    # Mock the shared client
     mock_client_instance = mocker.MagicMock(spec=httpx.Client)
-    mock_client.__enter__.return_value = mock_client_instance
 
     # Mock failed repo response
     mock_response = mocker.MagicMock(spec=httpx.Response)
@@ -248,8 +194,11 @@ def test_fetch_repo_stats_failure(
     mock_response.headers = {}
     mock_client_instance.get.return_value = mock_response
 
-    # Mock httpx.Client creation
-    mocker.patch("httpx.Client", return_value=mock_client)
+    # Use the mock in place of the shared pooled client
+    mocker.patch(
+        "app.services.github.get_http_client",
+        return_value=mock_client_instance,
+    )
 
     # Test fetching stats
     stats = github_service._fetch_repo_stats("owner", "repo")
@@ -262,16 +211,18 @@ def test_fetch_repo_stats_no_link_header(
     github_service: GitHubAPIService, mocker
 ) -> None:
     """Test fetching repository stats when PR response has no Link header."""
-    # Mock httpx.Client
-    mock_client = mocker.MagicMock()
-    mock_client.__enter__.return_value = mock_client
+    # Mock the shared client
+    mock_client = mocker.MagicMock(spec=httpx.Client)
 
     # Mock responses
     mock_client.get.side_effect = [
         # First call - repo stats
         httpx.Response(
             status_code=HTTP_200_OK.status_code,
-            content=b'{"stargazers_count": 100, "forks_count": 50}',
+            content=(
+                b'{"stargazers_count": 100, "forks_count": 50, '
+                b'"open_issues_count": 30}'
+            ),
             request=httpx.Request(
                 "GET", "https://api.github.com/repos/owner/repo"
             ),
@@ -285,18 +236,12 @@ def test_fetch_repo_stats_no_link_header(
                 "GET", "https://api.github.com/repos/owner/repo/pulls"
             ),
         ),
-        # Third call - issues
-        httpx.Response(
-            status_code=HTTP_200_OK.status_code,
-            content=b'{"total_count": 25}',
-            request=httpx.Request(
-                "GET", "https://api.github.com/search/issues"
-            ),
-        ),
     ]
 
-    # Mock httpx.Client creation
-    mocker.patch("httpx.Client", return_value=mock_client)
+    # Use the mock in place of the shared pooled client
+    mocker.patch(
+        "app.services.github.get_http_client", return_value=mock_client
+    )
 
     # Test fetching stats
     stats = github_service._fetch_repo_stats("owner", "repo")
@@ -305,4 +250,764 @@ def test_fetch_repo_stats_no_link_header(
     assert stats["stars"] == 100
     assert stats["forks"] == 50
     assert stats["open_prs"] == 2  # From response length
-    assert stats["open_issues"] == 25  # From issues search
+    assert stats["open_issues"] == 28  # Open issues and PRs, less the PRs
+
+
+@pytest.mark.parametrize("status_code", [404, 502])
+def test_fetch_repo_stats_pull_requests_failed(
+    github_service: GitHubAPIService, mocker, status_code: int
+) -> None:
+    """Test the stats are not guessed when the pull requests are missing."""
+    mock_client = mocker.MagicMock(spec=httpx.Client)
+    mock_client.get.side_effect = [
+        httpx.Response(
+            status_code=HTTP_200_OK.status_code,
+            json={
+                "stargazers_count": 100,
+                "forks_count": 50,
+                "open_issues_count": 33,
+            },
+        ),
+        httpx.Response(status_code=status_code, json={"message": "Error"}),
+    ]
+    mocker.patch(
+        "app.services.github.get_http_client", return_value=mock_client
+    )
+    record_failure = mocker.patch(
+        "app.services.github.circuit_breaker.record_failure"
+    )
+
+    assert github_service._fetch_repo_stats("owner", "repo") is None
+    assert record_failure.called == (status_code == 502)
+
+
+def test_build_graphql_query() -> None:
+    """Test building an aliased GraphQL query for several repositories."""
+    query, variables = GitHubAPIService._build_graphql_query(
+        [("owner1", "repo1"), ("owner2", "repo2")]
+    )
+
+    assert "r0: repository(owner: $o0, name: $n0)" in query
+    assert "r1: repository(owner: $o1, name: $n1)" in query
+    assert "$o1: String!, $n1: String!" in query
+    assert variables == {
+        "o0": "owner1",
+        "n0": "repo1",
+        "o1": "owner2",
+        "n1": "repo2",
+    }
+
+
+def test_fetch_stats_graphql_success(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test fetching stats for several repositories in one GraphQL query."""
+    github_service.tokens = ["test-token"]
+
+    mock_client = mocker.MagicMock(spec=httpx.Client)
+    mock_client.post.return_value = httpx.Response(
+        status_code=HTTP_200_OK.status_code,
+        json={
+            "data": {
+                "r0": {
+                    "stargazerCount": 100,
+                    "forkCount": 50,
+                    "issues": {"totalCount": 25},
+                    "pullRequests": {"totalCount": 5},
+                },
+                "r1": None,
+            }
+        },
+        request=httpx.Request("POST", "https://api.github.com/graphql"),
+    )
+    mocker.patch(
+        "app.services.github.get_http_client", return_value=mock_client
+    )
+
+    stats = github_service._fetch_stats_graphql(
+        [("owner", "repo"), ("owner", "missing")]
+    )
+
+    assert stats == {
+        ("owner", "repo"): {
+            "stars": 100,
+            "forks": 50,
+            "open_issues": 25,
+            "open_prs": 5,
+        }
+    }
+    mock_client.post.assert_called_once()
+
+
+def test_fetch_stats_graphql_no_token(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test the GraphQL path is skipped when no token is configured."""
+    github_service.tokens = []
+    mock_client = mocker.patch("app.services.github.get_http_client")
+
+    assert github_service._fetch_stats_graphql([("owner", "repo")]) is None
+    mock_client.assert_not_called()
+
+
+def test_fetch_stats_graphql_failure(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test a failed GraphQL request returns None."""
+    github_service.tokens = ["test-token"]
+
+    mock_client = mocker.MagicMock(spec=httpx.Client)
+    mock_client.post.return_value = httpx.Response(
+        status_code=502,
+        request=httpx.Request("POST", "https://api.github.com/graphql"),
+    )
+    mocker.patch(
+        "app.services.github.get_http_client", return_value=mock_client
+    )
+
+    assert github_service._fetch_stats_graphql([("owner", "repo")]) is None
+
+
+def test_tokens_read_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test several comma-separated tokens can be configured."""
+    monkeypatch.setenv("GITHUB_PAT", "first, second,")
+
+    service = GitHubAPIService()
+
+    assert service.tokens == ["first", "second"]
+    assert service.token_labels == ["1", "2"]
+
+
+def test_request_uses_token_with_most_budget(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test each request is sent with the token that has most budget left."""
+    github_service.tokens = ["first", "second"]
+    rate_limits.record("core", 5000, 10, time.time() + 600, "1")
+    rate_limits.record("core", 5000, 4000, time.time() + 600, "2")
+    mock_client = mocker.MagicMock(spec=httpx.Client)
+    mock_client.get.return_value = httpx.Response(
+        status_code=HTTP_200_OK.status_code,
+        json={},
+        request=httpx.Request("GET", "https://api.github.com/repos/o/r"),
+    )
+
+    github_service._conditional_get(mock_client, "url", {}, "repo")
+
+    headers = mock_client.get.call_args.kwargs["headers"]
+    assert headers["Authorization"] == "token second"
+
+
+def test_rejected_token_is_skipped(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test a token that GitHub rejects is not used again until later."""
+    github_service.tokens = ["bad", "good"]
+    mock_client = mocker.MagicMock(spec=httpx.Client)
+    mock_client.get.return_value = httpx.Response(
+        status_code=HTTP_401_UNAUTHORIZED.status_code,
+        request=httpx.Request("GET", "https://api.github.com/repos/o/r"),
+    )
+
+    github_service._conditional_get(mock_client, "url", {}, "repo")
+
+    assert rate_limits.is_skipped("1")
+    assert github_service._auth("core") == (
+        "2",
+        {"Authorization": "token good"},
+    )
+
+
+def test_auth_never_anonymous_with_tokens(
+    github_service: GitHubAPIService,
+) -> None:
+    """Test requests are only sent anonymously when no token is configured."""
+    github_service.tokens = ["spent"]
+    rate_limits.record("core", 5000, 0, time.time() + 600, "1")
+
+    with pytest.raises(NoTokenError):
+        github_service._auth("core")
+
+    github_service.tokens = []
+    assert github_service._auth("core") == ("", {})
+
+
+@pytest.mark.django_db
+def test_update_stats_batch_defers_without_token(
+    github_service: GitHubAPIService, mocker, project_with_repo: Project
+) -> None:
+    """Test a refresh is deferred, not failed, once every token is spent."""
+    github_service.tokens = ["spent"]
+    rate_limits.record("core", 5000, 0, time.time() + 600, "1")
+    rate_limits.record("graphql", 5000, 0, time.time() + 600, "1")
+    mock_client = mocker.patch("app.services.github.get_http_client")
+
+    github_service._update_stats_batch([project_with_repo])
+
+    mock_client.return_value.get.assert_not_called()
+    stats = GitHubStats.objects.get(project=project_with_repo)
+    assert stats.failure_count == 0
+
+
+@pytest.mark.django_db
+def test_update_stats_batch_uses_graphql(
+    github_service: GitHubAPIService, mocker, project_with_repo: Project
+) -> None:
+    """Test batch updates save the GraphQL results without REST calls."""
+    stats_data = {"stars": 1, "forks": 2, "open_issues": 3, "open_prs": 4}
+    mocker.patch.object(
+        github_service,
+        "_fetch_stats_graphql",
+        return_value={("owner", "repo"): stats_data},
+    )
+    mock_rest = mocker.patch.object(github_service, "_fetch_repo_stats")
+
+    github_service._update_stats_batch([project_with_repo])
+
+    stats = GitHubStats.objects.get(project=project_with_repo)
+    assert stats.stars == 1
+    assert stats.open_prs == 4
+    mock_rest.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_update_stats_batch_falls_back_to_rest(
+    github_service: GitHubAPIService, mocker, project_with_repo: Project
+) -> None:
+    """Test batch updates fall back to REST when GraphQL is unavailable."""
+    mocker.patch.object(
+        github_service, "_fetch_stats_graphql", return_value=None
+    )
+    mock_rest = mocker.patch.object(
+        github_service,
+        "_fetch_repo_stats",
+        return_value={"stars": 5, "forks": 6, "open_issues": 7, "open_prs": 8},
+    )
+
+    github_service._update_stats_batch([project_with_repo])
+
+    assert mock_rest.call_args[0][:2] == ("owner", "repo")
+    assert GitHubStats.objects.get(project=project_with_repo).forks == 6
+
+
+@pytest.mark.django_db
+def test_update_stats_batch_writes_in_bulk(
+    github_service: GitHubAPIService,
+    mocker,
+    django_assert_num_queries,
+    project_with_repo: Project,
+) -> None:
+    """Test refreshed rows are loaded and written back in single queries."""
+    other = Project.objects.create(
+        title="Other", repo="https://github.com/owner/other"
+    )
+    GitHubStats.objects.create(project=project_with_repo)
+    GitHubStats.objects.create(project=other)
+    stats_data = {"stars": 1, "forks": 2, "open_issues": 3, "open_prs": 4}
+    mocker.patch.object(
+        github_service,
+        "_fetch_stats_graphql",
+        return_value={
+            ("owner", "repo"): stats_data,
+            ("owner", "other"): stats_data,
+        },
+    )
+
+    # One SELECT for the rows, one UPDATE for the bulk_update and one INSERT
+    # for the history
+    with django_assert_num_queries(3):
+        github_service._update_stats_batch([project_with_repo, other])
+
+    assert set(GitHubStats.objects.values_list("stars", flat=True)) == {1}
+    assert GitHubStatsHistory.objects.filter(stars=1).count() == 2
+
+
+@pytest.mark.django_db
+def test_load_stats_creates_missing_rows(
+    github_service: GitHubAPIService, mocker, django_assert_num_queries
+) -> None:
+    """Test stats are read in one query and missing rows bulk created."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    existing = Project.objects.create(title="Existing", repo="https://a.b/c/d")
+    GitHubStats.objects.create(project=existing, stars=3)
+    missing = [
+        Project.objects.create(title=f"Missing {i}", repo="https://a.b/c/d")
+        for i in range(3)
+    ]
+
+    # SELECT existing, bulk INSERT missing, SELECT the new rows
+    with django_assert_num_queries(3):
+        stats_map = github_service._load_stats([existing, *missing])
+
+    assert stats_map[existing.id].stars == 3
+    assert all(stats_map[p.id].pk for p in missing)
+    assert GitHubStats.objects.count() == 4
+
+
+@pytest.mark.django_db
+def test_load_stats_single_query_when_all_exist(
+    github_service: GitHubAPIService, mocker, django_assert_num_queries
+) -> None:
+    """Test only one query is needed when every project has stats."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    projects = [
+        Project.objects.create(title=f"Project {i}", repo="https://a.b/c/d")
+        for i in range(3)
+    ]
+    for project in projects:
+        GitHubStats.objects.create(project=project)
+
+    with django_assert_num_queries(1):
+        stats_map = github_service._load_stats(projects)
+
+    assert len(stats_map) == 3
+
+
+@pytest.mark.django_db
+def test_load_stats_uses_selected_rows(
+    github_service: GitHubAPIService, mocker, django_assert_num_queries
+) -> None:
+    """Test rows loaded with select_related are used without a query."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    for i in range(3):
+        project = Project.objects.create(
+            title=f"Project {i}", repo="https://a.b/c/d"
+        )
+        GitHubStats.objects.create(project=project, stars=i)
+    projects = list(Project.objects.select_related("github_stats"))
+
+    with django_assert_num_queries(0):
+        stats_map = github_service._load_stats(projects, use_loaded=True)
+
+    assert {stats.stars for stats in stats_map.values()} == {0, 1, 2}
+
+
+def test_fetch_repo_stats_sends_stored_validators(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test stored repo validators are sent and a 304 reuses old values."""
+    current = mocker.MagicMock(spec=GitHubStats)
+    current.stars = 10
+    current.forks = 5
+    current.open_issues = 3
+    current.open_prs = 2
+    current.validators = {
+        "repo": {"etag": '"repo-etag"'},
+        "pulls": {"last_modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+    }
+
+    mock_client = mocker.MagicMock(spec=httpx.Client)
+    mock_client.get.side_effect = [
+        httpx.Response(
+            status_code=HTTP_304_NOT_MODIFIED.status_code,
+            request=httpx.Request("GET", "https://api.github.com/repos/o/r"),
+        ),
+        httpx.Response(
+            status_code=HTTP_200_OK.status_code,
+            content=b'[{"id": 1}, {"id": 2}]',
+            request=httpx.Request("GET", "https://api.github.com/repos/o/r"),
+        ),
+    ]
+    mocker.patch(
+        "app.services.github.get_http_client", return_value=mock_client
+    )
+
+    stats = github_service._fetch_repo_stats("owner", "repo", current)
+
+    assert stats == {"stars": 10, "forks": 5, "open_issues": 3, "open_prs": 2}
+
+    sent_headers = [
+        call[1]["headers"] for call in mock_client.get.call_args_list
+    ]
+    assert sent_headers[0]["If-None-Match"] == '"repo-etag"'
+    # The pull request count is never sent conditionally
+    assert "If-Modified-Since" not in sent_headers[1]
+    assert len(sent_headers) == 2
+
+
+def test_fetch_repo_stats_stores_new_validators(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test validators from a 200 response are stored for the endpoint."""
+    current = mocker.MagicMock(spec=GitHubStats)
+    current.validators = {}
+
+    mock_client = mocker.MagicMock(spec=httpx.Client)
+    mock_client.get.side_effect = [
+        httpx.Response(
+            status_code=HTTP_200_OK.status_code,
+            headers={
+                "ETag": '"new-etag"',
+                "Last-Modified": "Thu, 02 Jan 2025 00:00:00 GMT",
+            },
+            content=b'{"stargazers_count": 1, "forks_count": 2}',
+            request=httpx.Request("GET", "https://api.github.com/repos/o/r"),
+        ),
+        httpx.Response(
+            status_code=HTTP_200_OK.status_code,
+            content=b"[]",
+            request=httpx.Request("GET", "https://api.github.com/repos/o/r"),
+        ),
+    ]
+    mocker.patch(
+        "app.services.github.get_http_client", return_value=mock_client
+    )
+
+    stats = github_service._fetch_repo_stats("owner", "repo", current)
+
+    assert stats is not None
+    assert stats["stars"] == 1
+    assert current.validators == {
+        "repo": {
+            "etag": '"new-etag"',
+            "last_modified": "Thu, 02 Jan 2025 00:00:00 GMT",
+        }
+    }
+
+
+def test_limit_to_budget_defers_when_core_low(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test REST refreshes are trimmed to the remaining core budget."""
+    github_service.tokens = []
+    rate_limits.record("core", 60, 10, time.time() + 600)
+    projects = [mocker.MagicMock(spec=Project) for _ in range(5)]
+
+    # 10 remaining minus a 6 request reserve leaves 2 refreshes of 2 calls
+    allowed = github_service._limit_to_budget(projects)
+
+    assert allowed == projects[:2]
+
+
+def test_limit_to_budget_graphql_keeps_batch(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test the whole batch is kept when GraphQL has budget."""
+    github_service.tokens = ["test-token"]
+    rate_limits.record("core", 60, 0, time.time() + 600)
+    projects = [mocker.MagicMock(spec=Project) for _ in range(5)]
+
+    assert github_service._limit_to_budget(projects) == projects
+
+
+def test_fetch_repo_stats_open_issues_without_search(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test open issues are derived from the repo and pull request counts."""
+    current = mocker.MagicMock(spec=GitHubStats)
+    current.stars = 1
+    current.forks = 2
+    current.open_issues = 3
+    current.open_prs = 2
+    current.validators = {}
+
+    mock_client = mocker.MagicMock(spec=httpx.Client)
+    mock_client.get.side_effect = [
+        # The repo is unchanged, so it still has 5 open issues and PRs
+        httpx.Response(
+            status_code=HTTP_304_NOT_MODIFIED.status_code,
+            request=httpx.Request("GET", "https://api.github.com/repos/o/r"),
+        ),
+        # But one PR has been merged
+        httpx.Response(
+            status_code=HTTP_200_OK.status_code,
+            content=b'[{"id": 1}]',
+            request=httpx.Request("GET", "https://api.github.com/repos/o/r"),
+        ),
+    ]
+    mocker.patch(
+        "app.services.github.get_http_client", return_value=mock_client
+    )
+
+    stats = github_service._fetch_repo_stats("owner", "repo", current)
+
+    assert stats == {"stars": 1, "forks": 2, "open_issues": 4, "open_prs": 1}
+    assert mock_client.get.call_count == 2
+
+
+def test_rate_limit_status(github_service: GitHubAPIService, mocker) -> None:
+    """Test the rate limit status is refreshed from the API."""
+    reset = int(time.time()) + 600
+    mock_client = mocker.MagicMock(spec=httpx.Client)
+    mock_client.get.return_value = httpx.Response(
+        status_code=HTTP_200_OK.status_code,
+        json={
+            "resources": {
+                "core": {"limit": 5000, "remaining": 4900, "reset": reset},
+                "search": {"limit": 30, "remaining": 29, "reset": reset},
+            }
+        },
+        request=httpx.Request("GET", "https://api.github.com/rate_limit"),
+    )
+    mocker.patch(
+        "app.services.github.get_http_client", return_value=mock_client
+    )
+
+    status = github_service.rate_limit_status()
+
+    assert status["core"]["remaining"] == 4900
+    assert status["search"]["limit"] == 30
+
+
+@pytest.mark.django_db
+def test_get_stats_for_projects_skips_in_flight(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test no refresh is started for a project already being refreshed."""
+    mock_project = mocker.MagicMock(spec=Project)
+    mock_project.id = 1
+    mock_project.repo = "https://github.com/owner/repo"
+    mock_project.github_owner = "owner"
+    mock_project.github_repo = "repo"
+    mock_project.on_github = True
+    mock_stats = mocker.MagicMock(spec=GitHubStats)
+    mock_stats.needs_update.return_value = True
+    mocker.patch.object(
+        github_service, "_load_stats", return_value={1: mock_stats}
+    )
+
+    mock_submit = mocker.patch("app.services.github.refresh_executor.submit")
+    mocker.patch(
+        "app.services.github.refresh_guard.acquire_many", return_value=set()
+    )
+
+    stats_map = github_service.get_stats_for_projects([mock_project])
+
+    assert stats_map[1] == mock_stats
+    mock_submit.assert_not_called()
+
+
+def test_refresh_claimed_releases_on_error(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test claimed projects are released even if the refresh fails."""
+    mock_project = mocker.MagicMock(spec=Project)
+    mock_project.id = 1
+    mocker.patch.object(
+        github_service, "_update_stats_batch", side_effect=RuntimeError
+    )
+    mock_release = mocker.patch("app.services.github.refresh_guard.release")
+
+    with pytest.raises(RuntimeError):
+        github_service._refresh_claimed([mock_project])
+
+    mock_release.assert_called_once_with(1)
+
+
+@pytest.mark.django_db
+def test_get_stats_for_projects_releases_when_queue_full(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test claimed projects are released if the refresh is not queued."""
+    mock_project = mocker.MagicMock(spec=Project)
+    mock_project.id = 1
+    mock_project.repo = "https://github.com/owner/repo"
+    mock_project.github_owner = "owner"
+    mock_project.github_repo = "repo"
+    mock_project.on_github = True
+    mock_stats = mocker.MagicMock(spec=GitHubStats)
+    mock_stats.needs_update.return_value = True
+    mocker.patch.object(
+        github_service, "_load_stats", return_value={1: mock_stats}
+    )
+
+    mocker.patch(
+        "app.services.github.refresh_executor.submit", return_value=False
+    )
+    mocker.patch(
+        "app.services.github.refresh_guard.acquire_many", return_value={1}
+    )
+    mock_release = mocker.patch("app.services.github.refresh_guard.release")
+
+    github_service.get_stats_for_projects([mock_project])
+
+    mock_release.assert_called_once_with(1)
+
+
+@pytest.mark.django_db
+def test_get_stats_for_projects_query_count_constant(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test claiming a page of stale projects costs the same for any size."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    mocker.patch("app.services.github.refresh_guard", RefreshGuard())
+    submit = mocker.patch(
+        "app.services.github.refresh_executor.submit", return_value=True
+    )
+    for i in range(8):
+        project = Project.objects.create(
+            title=f"Stale {i}", repo=f"https://github.com/owner/repo{i}"
+        )
+        GitHubStats.objects.create(
+            project=project, next_due_at=timezone.now() - timedelta(hours=1)
+        )
+    projects = list(
+        Project.objects.select_related("github_stats").order_by("id")
+    )
+    # The first refresh also reads the circuit breaker
+    github_service.get_stats_for_projects(projects[:1])
+    with CaptureQueriesContext(connection) as one_project:
+        github_service.get_stats_for_projects(projects[1:2])
+    with CaptureQueriesContext(connection) as full_page:
+        github_service.get_stats_for_projects(projects[2:])
+
+    assert len(full_page) == len(one_project)
+    assert [len(call.args[2]) for call in submit.call_args_list] == [1, 1, 6]
+
+
+def test_get_stats_for_projects_read_only(
+    github_service: GitHubAPIService, mocker, settings
+) -> None:
+    """Test no refresh is started when views are set to read-only stats."""
+    settings.GITHUB_STATS_READ_ONLY = True
+    mock_project = mocker.MagicMock(spec=Project)
+    mock_project.id = 1
+    mock_project.repo = "https://github.com/owner/repo"
+    mock_project.github_owner = "owner"
+    mock_project.github_repo = "repo"
+    mock_project.on_github = True
+    mock_stats = mocker.MagicMock(spec=GitHubStats)
+    mock_stats.needs_update.return_value = True
+    mocker.patch.object(
+        github_service, "_load_stats", return_value={1: mock_stats}
+    )
+
+    mock_submit = mocker.patch("app.services.github.refresh_executor.submit")
+
+    stats_map = github_service.get_stats_for_projects([mock_project])
+
+    assert stats_map[1] == mock_stats
+    mock_submit.assert_not_called()
+
+
+def test_refresh_projects(github_service: GitHubAPIService, mocker) -> None:
+    """Test projects are claimed and refreshed in the calling thread."""
+    mock_project = mocker.MagicMock(spec=Project)
+    mocker.patch.object(
+        github_service, "claim_for_refresh", return_value=[mock_project]
+    )
+    mock_refresh = mocker.patch.object(github_service, "_refresh_claimed")
+
+    assert github_service.refresh_projects([mock_project]) == 1
+    mock_refresh.assert_called_once_with([mock_project])
+
+
+@pytest.mark.django_db
+def test_update_stats_batch_backs_off_failures(
+    github_service: GitHubAPIService, mocker, project_with_repo: Project
+) -> None:
+    """Test projects that cannot be fetched are backed off."""
+    mocker.patch.object(github_service, "_fetch_stats_graphql", return_value={})
+
+    github_service._update_stats_batch([project_with_repo])
+
+    stats = GitHubStats.objects.get(project=project_with_repo)
+    assert stats.failure_count == 1
+    assert not stats.needs_update()
+    assert github_service.due_for_refresh() == []
+    assert github_service.due_for_refresh(timedelta(0)) == []
+
+
+def test_fetch_repo_stats_server_error_trips_breaker(
+    github_service: GitHubAPIService, mocker, settings
+) -> None:
+    """Test server errors and network failures count towards the breaker."""
+    settings.GITHUB_BREAKER_THRESHOLD = 10
+    mock_client = mocker.MagicMock(spec=httpx.Client)
+    mock_client.get.side_effect = [
+        mocker.MagicMock(spec=httpx.Response, status_code=502, headers={}),
+        httpx.ConnectError("down"),
+    ]
+    mocker.patch(
+        "app.services.github.get_http_client", return_value=mock_client
+    )
+    record_failure = mocker.patch(
+        "app.services.github.circuit_breaker.record_failure"
+    )
+
+    assert github_service._fetch_repo_stats("owner", "repo") is None
+    assert github_service._fetch_repo_stats("owner", "repo") is None
+
+    assert [c.args[0] for c in record_failure.call_args_list] == [
+        "HTTP 502",
+        "ConnectError('down')",
+    ]
+
+
+def test_claim_for_refresh_while_breaker_open(
+    github_service: GitHubAPIService, mocker
+) -> None:
+    """Test nothing is claimed while the circuit breaker is open."""
+    mocker.patch(
+        "app.services.github.circuit_breaker.is_open", return_value=True
+    )
+    acquire = mocker.patch("app.services.github.refresh_guard.acquire_many")
+
+    assert github_service.claim_for_refresh([mocker.MagicMock()]) == []
+    acquire.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_due_for_refresh_follows_schedule(
+    github_service: GitHubAPIService, project_with_repo: Project
+) -> None:
+    """Test projects are due when their own next refresh time has passed."""
+    now = timezone.now()
+    stats = GitHubStats.objects.create(
+        project=project_with_repo,
+        last_updated=now - timedelta(hours=2),
+        ttl_minutes=240,
+        next_due_at=now + timedelta(hours=2),
+    )
+
+    # Older than the base TTL, but quiet repos are not due yet
+    assert github_service.due_for_refresh() == []
+    assert github_service.due_for_refresh(timedelta(minutes=30)) == [
+        project_with_repo
+    ]
+
+    stats.next_due_at = now - timedelta(minutes=1)
+    stats.save()
+    assert github_service.due_for_refresh() == [project_with_repo]
+
+
+@pytest.mark.django_db
+def test_apply_stats_schedules_next_refresh(
+    github_service: GitHubAPIService, project_with_repo: Project
+) -> None:
+    """Test unchanged stats double the TTL and changed stats reset it."""
+    stats = GitHubStats.objects.create(
+        project=project_with_repo, ttl_minutes=30
+    )
+    unchanged = {"stars": 0, "forks": 0, "open_issues": 0, "open_prs": 0}
+
+    github_service._apply_stats(stats, unchanged)
+    assert stats.ttl_minutes == 60
+
+    github_service._apply_stats(stats, {**unchanged, "stars": 1})
+    assert stats.ttl_minutes == 30
+    assert stats.next_due_at == stats.last_updated + timedelta(minutes=30)
+
+
+@pytest.mark.django_db
+def test_get_stats_for_projects_queues_job(
+    github_service: GitHubAPIService,
+    mocker,
+    project_with_repo: Project,
+    settings,
+) -> None:
+    """Test stale stats are left to the job queue when it is enabled."""
+    settings.JOB_QUEUE_ENABLED = True
+    GitHubStats.objects.create(
+        project=project_with_repo,
+        last_updated=timezone.now() - timedelta(days=1),
+    )
+    claim = mocker.patch.object(github_service, "claim_for_refresh")
+
+    github_service.get_stats_for_projects([project_with_repo])
+    github_service.get_stats_for_projects([project_with_repo])
+
+    claim.assert_not_called()
+    job = Job.objects.get()
+    assert job.name == REFRESH_STATS_JOB
+    assert job.payload == {"project_ids": [project_with_repo.id]}
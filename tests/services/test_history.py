@@ -0,0 +1,118 @@
+"""Test recording and compacting the GitHub stats history."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import GitHubStats, GitHubStatsHistory, Project
+from app.services.history import (
+    bucket_start,
+    compact_history,
+    record_history,
+    stats_history,
+)
+
+Resolution = GitHubStatsHistory.Resolution
+
+NOW = datetime(2025, 6, 18, 12, 30, tzinfo=timezone.utc)  # a Wednesday
+
+pytestmark = pytest.mark.django_db
+
+
+def add_point(
+    project: Project,
+    recorded_at: datetime,
+    stars: int,
+    resolution: str = Resolution.RAW,
+) -> None:
+    """Add a history point for a project."""
+    GitHubStatsHistory.objects.create(
+        project=project,
+        recorded_at=recorded_at,
+        resolution=resolution,
+        stars=stars,
+    )
+
+
+def test_record_history(project_with_repo: Project) -> None:
+    """Test a raw point is written for each refreshed stats row."""
+    row = GitHubStats.objects.create(
+        project=project_with_repo, stars=7, open_prs=2
+    )
+
+    assert record_history([row]) == 1
+
+    point = GitHubStatsHistory.objects.get()
+    assert (point.stars, point.open_prs) == (7, 2)
+    assert point.resolution == Resolution.RAW
+    assert point.recorded_at == row.last_updated
+
+
+def test_stats_history_range(project_with_repo: Project) -> None:
+    """Test history is returned oldest first, limited to the range."""
+    for hours, stars in ((3, 1), (1, 3), (2, 2)):
+        add_point(project_with_repo, NOW - timedelta(hours=hours), stars)
+
+    points = stats_history(
+        project_with_repo, since=NOW - timedelta(hours=2), until=NOW
+    )
+
+    assert [point.stars for point in points] == [2, 3]
+
+
+def test_bucket_start() -> None:
+    """Test times are truncated to the start of their hour, day or week."""
+    assert bucket_start(NOW, Resolution.HOURLY) == NOW.replace(minute=0)
+    assert bucket_start(NOW, Resolution.DAILY) == NOW.replace(hour=0, minute=0)
+    assert bucket_start(NOW, Resolution.WEEKLY) == datetime(
+        2025, 6, 16, tzinfo=timezone.utc
+    )
+
+
+def test_compact_history_downsamples(project_with_repo: Project) -> None:
+    """Test old raw points are merged into one hourly point per hour."""
+    old_hour = NOW - timedelta(days=3)
+    add_point(project_with_repo, old_hour.replace(minute=5), 1)
+    add_point(project_with_repo, old_hour.replace(minute=45), 2)
+    add_point(project_with_repo, NOW - timedelta(hours=1), 3)
+
+    removed = compact_history(NOW)
+
+    assert removed["raw"] == 2
+    hourly = GitHubStatsHistory.objects.get(resolution=Resolution.HOURLY)
+    assert hourly.recorded_at == old_hour.replace(minute=0)
+    # The last value in the hour is kept
+    assert hourly.stars == 2
+    assert (
+        GitHubStatsHistory.objects.filter(resolution=Resolution.RAW).count()
+        == 1
+    )
+
+
+def test_compact_history_cascades(project_with_repo: Project) -> None:
+    """Test each resolution is merged into the next coarser one."""
+    add_point(project_with_repo, NOW - timedelta(days=40), 1, Resolution.HOURLY)
+    add_point(project_with_repo, NOW - timedelta(days=400), 2, Resolution.DAILY)
+
+    compact_history(NOW)
+
+    assert list(
+        GitHubStatsHistory.objects.values_list("resolution", "stars")
+    ) == [(Resolution.WEEKLY, 2), (Resolution.DAILY, 1)]
+
+
+def test_compact_history_retention(
+    project_with_repo: Project, settings
+) -> None:
+    """Test weekly points are only deleted when a retention is set."""
+    add_point(
+        project_with_repo, NOW - timedelta(days=800), 1, Resolution.WEEKLY
+    )
+
+    assert compact_history(NOW)["week"] == 0
+
+    settings.GITHUB_HISTORY_RETENTION_DAYS = 730
+    assert compact_history(NOW)["week"] == 1
+    assert not GitHubStatsHistory.objects.exists()
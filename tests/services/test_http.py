@@ -0,0 +1,97 @@
+"""Test the shared HTTP client used for GitHub API calls."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.services.http import SharedHTTPClient, http2_enabled
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from pytest_django.fixtures import SettingsWrapper
+    from pytest_mock import MockerFixture
+
+
+@pytest.fixture
+def shared_client() -> Iterator[SharedHTTPClient]:
+    """Create a fresh shared client holder and close it afterwards."""
+    holder = SharedHTTPClient()
+    yield holder
+    holder.close()
+
+
+def test_get_returns_same_client(shared_client: SharedHTTPClient) -> None:
+    """Test the same pooled client is returned on every call."""
+    client = shared_client.get()
+
+    assert shared_client.get() is client
+    assert not client.is_closed
+
+
+def test_get_uses_settings(
+    shared_client: SharedHTTPClient, settings: SettingsWrapper
+) -> None:
+    """Test the client timeouts and pool limits come from settings."""
+    settings.GITHUB_HTTP_TIMEOUT = 7.0
+    settings.GITHUB_HTTP_CONNECT_TIMEOUT = 2.0
+
+    client = shared_client.get()
+
+    assert client.timeout.read == 7.0
+    assert client.timeout.connect == 2.0
+
+
+def test_close_releases_client(shared_client: SharedHTTPClient) -> None:
+    """Test closing the holder closes the client and a new one is created."""
+    client = shared_client.get()
+    shared_client.close()
+
+    assert client.is_closed
+    new_client = shared_client.get()
+    assert new_client is not client
+    assert not new_client.is_closed
+
+
+def test_get_recreates_client_after_fork(
+    shared_client: SharedHTTPClient, mocker: MockerFixture
+) -> None:
+    """Test a forked process does not reuse its parent's client."""
+    client = shared_client.get()
+    mocker.patch("app.services.http.os.getpid", return_value=-1)
+
+    assert shared_client.get() is not client
+
+
+def test_http2_disabled_by_default(settings: SettingsWrapper) -> None:
+    """Test HTTP/2 is not used unless enabled in settings."""
+    settings.GITHUB_HTTP2 = False
+
+    assert http2_enabled() is False
+
+
+def test_http2_falls_back_without_h2(
+    settings: SettingsWrapper, mocker: MockerFixture
+) -> None:
+    """Test HTTP/2 falls back to HTTP/1.1 when 'h2' is not installed."""
+    settings.GITHUB_HTTP2 = True
+    mocker.patch(
+        "app.services.http.importlib.util.find_spec", return_value=None
+    )
+
+    assert http2_enabled() is False
+
+
+def test_http2_enabled_with_h2(
+    settings: SettingsWrapper, mocker: MockerFixture
+) -> None:
+    """Test HTTP/2 is used when enabled and 'h2' is installed."""
+    settings.GITHUB_HTTP2 = True
+    mocker.patch(
+        "app.services.http.importlib.util.find_spec",
+        return_value=mocker.MagicMock(),
+    )
+
+    assert http2_enabled() is True
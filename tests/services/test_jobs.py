@@ -0,0 +1,184 @@
+"""Test the database-backed background job queue."""
+
+# ruff: noqa: SLF001
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from app import jobs as handlers
+from app.models import ContactSubmission, GitHubStats, Job, Project
+from app.services import jobs
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def calls(mocker) -> list[dict[str, object]]:
+    """Register a 'test' job handler that records its payloads."""
+    received: list[dict[str, object]] = []
+
+    def handler(payload: dict[str, object]) -> None:
+        if payload.get("fail"):
+            msg = "failed"
+            raise jobs.JobError(msg)
+        received.append(payload)
+
+    mocker.patch.dict(jobs._handlers, {"test": handler})
+    return received
+
+
+def test_enqueue_drops_duplicate_pending_jobs() -> None:
+    """Test only one pending job may have each dedup key."""
+    first = jobs.enqueue("test", {"n": 1}, dedup_key="key")
+
+    assert first is not None
+    assert jobs.enqueue("test", {"n": 2}, dedup_key="key") is None
+    assert jobs.enqueue("test", {"n": 3}) is not None
+
+    # Once the first job is running, the same work may be queued again
+    jobs.claim_jobs(1)
+    assert jobs.enqueue("test", {"n": 4}, dedup_key="key") is not None
+
+
+@pytest.mark.parametrize("skip_locked", [True, False])
+def test_claim_jobs(mocker, skip_locked: bool) -> None:  # noqa: FBT001
+    """Test ready jobs are claimed once, by either locking strategy."""
+    mocker.patch.object(
+        connection.features, "has_select_for_update_skip_locked", skip_locked
+    )
+    ready = jobs.enqueue("test")
+    jobs.enqueue("test", delay=60)
+
+    claimed = jobs.claim_jobs(10)
+
+    assert [job.pk for job in claimed] == [ready.pk]  # type: ignore[union-attr]
+    assert claimed[0].status == Job.Status.RUNNING
+    assert claimed[0].attempts == 1
+    assert jobs.claim_jobs(10) == []
+
+
+def test_claim_jobs_recovers_lost_workers() -> None:
+    """Test a running job whose lock expired is claimed again."""
+    job = jobs.enqueue("test")
+    jobs.claim_jobs(1)
+    Job.objects.filter(pk=job.pk).update(  # type: ignore[union-attr]
+        locked_until=timezone.now() - timedelta(seconds=1)
+    )
+
+    (claimed,) = jobs.claim_jobs(1)
+
+    assert claimed.attempts == 2
+
+
+def test_run_job_deletes_successful_jobs(calls: list[object]) -> None:
+    """Test a job that succeeds is run once and removed."""
+    jobs.enqueue("test", {"n": 1})
+
+    assert jobs.run_pending(10) == 1
+
+    assert calls == [{"n": 1}]
+    assert not Job.objects.exists()
+
+
+@pytest.mark.usefixtures("calls")
+def test_run_job_retries_with_backoff(settings) -> None:
+    """Test failed jobs are retried with a doubling delay, then kept."""
+    settings.JOB_RETRY_SECONDS = 10
+    job = jobs.enqueue("test", {"fail": True}, dedup_key="key")
+    assert job is not None
+    job.max_attempts = 3
+    job.save()
+
+    delays = []
+    for _ in range(2):
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        (claimed,) = jobs.claim_jobs(1)
+        start = timezone.now()
+        assert not jobs.run_job(claimed)
+        job.refresh_from_db()
+        assert job.status == Job.Status.PENDING
+        delays.append(round((job.run_at - start).total_seconds()))
+    assert delays == [10, 20]
+
+    Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+    jobs.run_pending(1)
+    job.refresh_from_db()
+    assert job.status == Job.Status.FAILED
+    assert "failed" in job.last_error
+
+
+def test_run_job_unknown_handler() -> None:
+    """Test a job with no handler is failed rather than lost."""
+    jobs.enqueue("missing")
+
+    jobs.run_pending(1)
+
+    job = Job.objects.get()
+    assert job.status == Job.Status.PENDING
+    assert "No handler" in job.last_error
+
+
+def test_refresh_project_forgets_old_validators(mocker) -> None:
+    """Test the project refresh drops validators for the old repo."""
+    mocker.patch("app.signals.refresh_executor")
+    refresh = mocker.patch.object(handlers.GitHubAPIService, "refresh_projects")
+    project = Project.objects.create(
+        title="Moved", repo="https://github.com/owner/new"
+    )
+    GitHubStats.objects.create(
+        project=project, validators={"repo": {"etag": "old"}}
+    )
+
+    handlers.refresh_project({"project_id": project.pk})
+
+    assert GitHubStats.objects.get(project=project).validators == {}
+    refresh.assert_called_once_with([project])
+
+
+def test_refresh_project_retries_when_not_claimed(mocker) -> None:
+    """Test a repo change is retried while another refresh is in flight."""
+    mocker.patch("app.signals.refresh_executor")
+    mocker.patch.object(
+        handlers.GitHubAPIService, "refresh_projects", return_value=0
+    )
+    project = Project.objects.create(
+        title="Busy", repo="https://github.com/owner/new"
+    )
+
+    with pytest.raises(jobs.JobError):
+        handlers.refresh_project({"project_id": project.pk})
+
+
+def test_refresh_stats_skips_fresh_projects(mocker) -> None:
+    """Test projects refreshed since the job was queued are skipped."""
+    mocker.patch("app.signals.refresh_executor")
+    refresh = mocker.patch.object(handlers.GitHubAPIService, "refresh_projects")
+    missing = Project.objects.create(
+        title="Missing", repo="https://github.com/owner/a"
+    )
+    fresh = Project.objects.create(
+        title="Fresh", repo="https://github.com/owner/b"
+    )
+    GitHubStats.objects.create(project=fresh, last_updated=timezone.now())
+
+    handlers.refresh_stats({"project_ids": [missing.pk, fresh.pk]})
+
+    refresh.assert_called_once_with([missing], only_due=True)
+
+
+def test_send_contact_email_retries_on_failure(mocker) -> None:
+    """Test an email that could not be sent fails the job."""
+    send = mocker.patch.object(
+        handlers.EmailService, "send_contact_email", return_value=False
+    )
+    submission = ContactSubmission.objects.create(
+        name="Name", email="name@example.com", message="Hello"
+    )
+
+    with pytest.raises(jobs.JobError):
+        handlers.send_contact_email({"submission_id": submission.pk})
+    send.assert_called_once_with(submission)
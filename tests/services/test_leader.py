@@ -0,0 +1,44 @@
+"""Test electing a leader with a lease stored in the database."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from app.models import Lease
+from app.services.leader import acquire_lease, process_id, release_lease
+
+pytestmark = pytest.mark.django_db
+
+
+def test_only_one_holder_at_a_time() -> None:
+    """Test a held lease cannot be taken, but can be renewed."""
+    assert acquire_lease("leader", 60, holder="node-1")
+    assert not acquire_lease("leader", 60, holder="node-2")
+    assert acquire_lease("leader", 60, holder="node-1")
+
+    assert Lease.objects.get(name="leader").holder == "node-1"
+
+
+def test_expired_lease_is_taken_over() -> None:
+    """Test a leader that stopped renewing its lease is replaced."""
+    acquire_lease("leader", 60, holder="node-1")
+    Lease.objects.filter(name="leader").update(
+        expires_at=timezone.now() - timedelta(seconds=1)
+    )
+
+    assert acquire_lease("leader", 60, holder="node-2")
+    assert not acquire_lease("leader", 60, holder="node-1")
+
+
+def test_release_lease() -> None:
+    """Test only the holder can release a lease, freeing it for others."""
+    assert acquire_lease("leader", 60)
+
+    release_lease("leader", holder="someone-else")
+    assert Lease.objects.get(name="leader").holder == process_id()
+
+    release_lease("leader")
+    assert acquire_lease("leader", 60, holder="node-2")
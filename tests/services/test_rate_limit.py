@@ -0,0 +1,136 @@
+"""Test the GitHub rate limit tracker."""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+
+from app.services.rate_limit import RateLimitTracker
+
+if TYPE_CHECKING:
+    from pytest_django.fixtures import SettingsWrapper
+
+
+@pytest.fixture
+def tracker(settings: SettingsWrapper) -> RateLimitTracker:
+    """Create a tracker with a 10% reserve."""
+    settings.GITHUB_RATE_LIMIT_RESERVE_PERCENT = 10
+    return RateLimitTracker()
+
+
+def _headers(
+    remaining: int, limit: int = 5000, reset: float | None = None
+) -> dict[str, str]:
+    """Build a set of rate limit response headers."""
+    reset = reset if reset is not None else time.time() + 600
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(reset)),
+    }
+
+
+def test_unknown_bucket_budget(tracker: RateLimitTracker) -> None:
+    """Test a bucket with no recorded state is assumed to have budget."""
+    assert tracker.available("core") is None
+
+
+def test_update_records_bucket(tracker: RateLimitTracker) -> None:
+    """Test the budget is read from headers, minus the reserve."""
+    tracker.update(_headers(remaining=1000))
+
+    assert tracker.available("core") == 500
+
+
+def test_update_uses_resource_header(tracker: RateLimitTracker) -> None:
+    """Test the X-RateLimit-Resource header selects the bucket."""
+    headers = _headers(remaining=20, limit=30)
+    headers["X-RateLimit-Resource"] = "search"
+
+    tracker.update(headers)
+
+    assert tracker.available("search") == 17
+    assert tracker.available("core") is None
+
+
+def test_update_ignores_missing_headers(tracker: RateLimitTracker) -> None:
+    """Test responses without rate limit headers are ignored."""
+    tracker.update({})
+
+    assert tracker.snapshot() == {}
+
+
+def test_budget_never_negative(tracker: RateLimitTracker) -> None:
+    """Test an exhausted bucket reports no budget."""
+    tracker.update(_headers(remaining=0))
+
+    assert tracker.available("core") == 0
+
+
+def test_bucket_after_reset_budget(tracker: RateLimitTracker) -> None:
+    """Test a bucket is treated as refilled once its reset time passes."""
+    tracker.update(_headers(remaining=0, reset=time.time() - 1))
+
+    assert tracker.available("core") is None
+
+
+def test_snapshot(tracker: RateLimitTracker) -> None:
+    """Test the snapshot exposes each bucket for monitoring."""
+    tracker.record("graphql", 5000, 4999, time.time() + 60)
+
+    snapshot = tracker.snapshot()
+
+    assert snapshot["graphql"]["limit"] == 5000
+    assert snapshot["graphql"]["remaining"] == 4999
+    assert 0 < snapshot["graphql"]["seconds_to_reset"] <= 60
+
+
+def test_buckets_are_kept_per_token(tracker: RateLimitTracker) -> None:
+    """Test each token has its own budget, named apart in the snapshot."""
+    tracker.record("core", 100, 50, time.time() + 60, "1")
+    tracker.record("core", 100, 80, time.time() + 60, "2")
+
+    assert tracker.available("core", "1") == 40
+    assert tracker.available("core", "2") == 70
+    assert tracker.available("core") is None
+    assert tracker.total_available("core", ["1", "2"]) == 110
+    assert set(tracker.snapshot()) == {"core (token 1)", "core (token 2)"}
+
+
+def test_pick_token_prefers_most_budget(tracker: RateLimitTracker) -> None:
+    """Test the token with the most budget left is chosen."""
+    tracker.record("core", 100, 50, time.time() + 60, "1")
+    tracker.record("core", 100, 80, time.time() + 60, "2")
+
+    assert tracker.pick_token("core", ["1", "2"]) == "2"
+    assert tracker.pick_token("core", []) is None
+
+
+def test_pick_token_prefers_unknown_budget(tracker: RateLimitTracker) -> None:
+    """Test a token that has not been used yet is chosen first."""
+    tracker.record("core", 100, 80, time.time() + 60, "1")
+
+    assert tracker.pick_token("core", ["1", "2"]) == "2"
+
+
+def test_pick_token_skips_exhausted(tracker: RateLimitTracker) -> None:
+    """Test a token that has used up its budget waits for its reset."""
+    tracker.record("core", 100, 0, time.time() + 60, "1")
+    tracker.record("core", 100, 0, time.time() - 1, "2")
+
+    assert tracker.pick_token("core", ["1"]) is None
+    assert tracker.pick_token("core", ["1", "2"]) == "2"
+
+
+def test_skip_token(tracker: RateLimitTracker) -> None:
+    """Test a skipped token is not chosen or counted until it is due."""
+    tracker.record("core", 100, 50, time.time() + 60, "1")
+    tracker.record("core", 100, 80, time.time() + 60, "2")
+    tracker.skip_token("2", time.time() + 60)
+    tracker.skip_token("1", time.time() - 1)
+
+    assert tracker.is_skipped("2")
+    assert tracker.pick_token("core", ["1", "2"]) == "1"
+    assert tracker.total_available("core", ["1", "2"]) == 40
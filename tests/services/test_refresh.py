@@ -0,0 +1,204 @@
+"""Test the coordination of background GitHub stats refreshes."""
+
+from __future__ import annotations
+
+import threading
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from app.models import GitHubStats, Project
+from app.services.refresh import RefreshExecutor, RefreshGuard
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def stats() -> GitHubStats:
+    """Create a project with an empty stats row."""
+    project = Project.objects.create(title="Guarded Project")
+    return GitHubStats.objects.create(project=project)
+
+
+def test_acquire_once(stats: GitHubStats) -> None:
+    """Test a project can only be claimed once until it is released."""
+    guard = RefreshGuard()
+
+    assert guard.acquire(stats.project_id)
+    assert not guard.acquire(stats.project_id)
+    assert guard.in_flight() == 1
+
+    guard.release(stats.project_id)
+
+    assert guard.in_flight() == 0
+    assert guard.acquire(stats.project_id)
+
+
+def test_acquire_blocked_by_other_worker(stats: GitHubStats) -> None:
+    """Test a lease held by another process blocks the refresh."""
+    other_worker = RefreshGuard()
+    this_worker = RefreshGuard()
+
+    assert other_worker.acquire(stats.project_id)
+    assert not this_worker.acquire(stats.project_id)
+    assert this_worker.in_flight() == 0
+
+
+def test_acquire_after_lease_expires(stats: GitHubStats) -> None:
+    """Test an expired lease from a dead worker can be taken over."""
+    stats.refresh_lease_until = timezone.now() - timedelta(seconds=1)
+    stats.save()
+
+    assert RefreshGuard().acquire(stats.project_id)
+
+
+def test_acquire_creates_missing_stats_row() -> None:
+    """Test a project without a stats row yet can still be claimed."""
+    project = Project.objects.create(title="New Project")
+
+    assert RefreshGuard().acquire(project.id)
+    assert GitHubStats.objects.get(project=project).refresh_lease_until
+
+
+def test_acquire_only_due_skips_refreshed_stats(stats: GitHubStats) -> None:
+    """Test stats another worker has just refreshed are not claimed again."""
+    stats.last_updated = timezone.now() - timedelta(days=1)
+    stats.save()
+    guard = RefreshGuard()
+
+    # Found to be due, but another worker refreshes it before the claim
+    stats.last_updated = timezone.now()
+    stats.next_due_at = timezone.now() + timedelta(minutes=30)
+    stats.save()
+
+    assert not guard.acquire(stats.project_id, only_due=True)
+    assert guard.in_flight() == 0
+    assert guard.acquire(stats.project_id)
+
+
+def test_acquire_many_takes_free_leases(
+    stats: GitHubStats, django_assert_num_queries
+) -> None:
+    """Test only the projects nobody else is refreshing are claimed."""
+    held = GitHubStats.objects.create(
+        project=Project.objects.create(title="Held Project")
+    )
+    new = Project.objects.create(title="New Project")
+    assert RefreshGuard().acquire(held.project_id)
+    guard = RefreshGuard()
+
+    claimed = guard.acquire_many([stats.project_id, held.project_id, new.id])
+
+    assert claimed == {stats.project_id, new.id}
+    assert guard.in_flight() == 2
+    assert GitHubStats.objects.get(project=new).refresh_lease_until
+    # Free leases are all taken with a single UPDATE
+    guard.release(stats.project_id)
+    with django_assert_num_queries(1):
+        assert guard.acquire_many([stats.project_id]) == {stats.project_id}
+
+
+def test_release_clears_lease(stats: GitHubStats) -> None:
+    """Test releasing a refresh clears the lease on the stats row."""
+    guard = RefreshGuard()
+    guard.acquire(stats.project_id)
+
+    stats.refresh_from_db()
+    assert stats.refresh_lease_until is not None
+
+    guard.release(stats.project_id)
+
+    stats.refresh_from_db()
+    assert stats.refresh_lease_until is None
+
+
+def test_executor_runs_task() -> None:
+    """Test submitted work runs and is recorded in the metrics."""
+    executor = RefreshExecutor(max_workers=1, max_queue=5)
+    done = threading.Event()
+
+    assert executor.submit("task", done.set)
+    executor.shutdown()
+
+    assert done.is_set()
+    metrics = executor.metrics()
+    assert metrics["completed"] == 1
+    assert metrics["queued"] == 0
+    assert metrics["running"] == 0
+    assert metrics["avg_duration"] >= 0
+
+
+def test_executor_coalesces_and_drops() -> None:
+    """Test duplicate keys are coalesced and a full queue drops work."""
+    executor = RefreshExecutor(max_workers=1, max_queue=2)
+    release = threading.Event()
+
+    assert executor.submit("a", release.wait)
+    assert not executor.submit("a", release.wait)
+    assert executor.submit("b", release.wait)
+    assert not executor.submit("c", release.wait)
+
+    metrics = executor.metrics()
+    assert metrics["coalesced"] == 1
+    assert metrics["dropped"] == 1
+
+    release.set()
+    executor.shutdown()
+    metrics = executor.metrics()
+    assert metrics["completed"] + metrics["cancelled"] == 2
+    assert metrics["queued"] == 0
+
+
+def test_executor_records_failures() -> None:
+    """Test an exception in a task is logged rather than lost."""
+    executor = RefreshExecutor(max_workers=1, max_queue=5)
+
+    def fail() -> None:
+        msg = "boom"
+        raise RuntimeError(msg)
+
+    executor.submit("fail", fail)
+    executor.shutdown()
+
+    assert executor.metrics()["failed"] == 1
+
+
+def test_executor_restarts_after_fork(mocker) -> None:
+    """Test a forked process does not use, or wait for, its parent's pool."""
+    executor = RefreshExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+    assert executor.submit("parent", release.wait)
+    mocker.patch("app.services.refresh.os.getpid", return_value=-1)
+    done = threading.Event()
+
+    # The parent's task no longer fills the queue, or blocks the worker
+    assert executor.submit("child", done.set)
+    executor.shutdown()
+
+    assert done.is_set()
+    release.set()
+
+
+def test_executor_shutdown_cancels_queued_work() -> None:
+    """Test queued work is cancelled on shutdown but running work finishes."""
+    executor = RefreshExecutor(max_workers=1, max_queue=5)
+    started = threading.Event()
+    release = threading.Event()
+    ran_second = threading.Event()
+
+    def first() -> None:
+        started.set()
+        release.wait()
+
+    executor.submit("first", first)
+    executor.submit("second", ran_second.set)
+    started.wait()
+
+    threading.Timer(0.05, release.set).start()
+    executor.shutdown()
+
+    metrics = executor.metrics()
+    assert metrics["completed"] == 1
+    assert metrics["cancelled"] == 1
+    assert not ran_second.is_set()
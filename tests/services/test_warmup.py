@@ -0,0 +1,53 @@
+"""Test warming up GitHub stats when a server process starts."""
+
+# ruff: noqa: SLF001
+from __future__ import annotations
+
+import pytest
+
+from app.models import PROJECT_PAGE_SIZE, Project
+from app.services import warmup
+
+
+def test_warm_up_disabled_by_default(mocker) -> None:
+    """Test nothing is queued unless the warm-up is turned on."""
+    submit = mocker.patch.object(warmup.refresh_executor, "submit")
+
+    assert not warmup.warm_github_stats()
+    submit.assert_not_called()
+
+
+def test_warm_up_skipped_when_read_only(mocker, settings) -> None:
+    """Test views that only read stats are never warmed up."""
+    settings.GITHUB_STATS_READ_ONLY = True
+    submit = mocker.patch.object(warmup.refresh_executor, "submit")
+
+    assert not warmup.warm_github_stats(pages=2)
+    submit.assert_not_called()
+
+
+def test_warm_up_queued_in_background(mocker, settings) -> None:
+    """Test the warm-up runs on the shared refresh executor."""
+    settings.GITHUB_WARMUP_PAGES = 2
+    submit = mocker.patch.object(
+        warmup.refresh_executor, "submit", return_value=True
+    )
+
+    assert warmup.warm_github_stats()
+    submit.assert_called_once_with("warmup", warmup._warm_pages, 2)
+
+
+@pytest.mark.django_db
+def test_warm_pages_refreshes_first_pages(mocker) -> None:
+    """Test only the projects on the first pages are passed on."""
+    mocker.patch("app.jobs.GitHubAPIService")
+    for priority in range(PROJECT_PAGE_SIZE + 2):
+        Project.objects.create(title=f"Project {priority}", priority=priority)
+    get_stats = mocker.patch.object(
+        warmup.GitHubAPIService, "get_stats_for_projects"
+    )
+
+    warmup._warm_pages(1)
+
+    (projects,) = get_stats.call_args.args
+    assert [p.priority for p in projects] == list(range(PROJECT_PAGE_SIZE))
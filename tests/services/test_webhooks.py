@@ -0,0 +1,134 @@
+"""Test applying GitHub webhook events to the stored stats."""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from app.models import GitHubStats, Project
+from app.services.github import GitHubAPIService
+from app.services.webhooks import apply_event, verify_signature
+
+
+def payload(**extra: object) -> dict[str, object]:
+    """Return a minimal webhook payload for the 'owner/repo' repository."""
+    return {
+        "repository": {
+            "name": "repo",
+            "owner": {"login": "owner"},
+            "stargazers_count": 12,
+            "forks_count": 3,
+        },
+        **extra,
+    }
+
+
+def test_verify_signature() -> None:
+    """Test only a body signed with the secret is accepted."""
+    body = b'{"zen": "hi"}'
+    digest = hmac.new(b"secret", body, hashlib.sha256).hexdigest()
+
+    assert verify_signature("secret", body, f"sha256={digest}")
+    assert not verify_signature("other", body, f"sha256={digest}")
+    assert not verify_signature("secret", body, digest)
+    assert not verify_signature("", body, f"sha256={digest}")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "project_with_repo", ["https://github.com/Owner/Repo"], indirect=True
+)
+def test_projects_for_repo(project_with_repo: Project) -> None:
+    """Test projects are matched by owner and name, ignoring case."""
+    Project.objects.create(
+        title="Other", repo="https://github.com/owner/repo-two"
+    )
+
+    assert GitHubAPIService().projects_for_repo("owner", "repo") == [
+        project_with_repo
+    ]
+
+
+@pytest.mark.django_db
+def test_apply_event_star(project_with_repo: Project) -> None:
+    """Test a star event updates the counts and creates the stats row."""
+    assert apply_event("star", payload(action="created")) == 1
+
+    stats = GitHubStats.objects.get(project=project_with_repo)
+    assert stats.stars == 12
+    assert stats.forks == 3
+    assert stats.last_webhook_at is not None
+    assert not stats.needs_update()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("event", "action", "field", "expected"),
+    [
+        ("issues", "opened", "open_issues", 3),
+        ("issues", "closed", "open_issues", 1),
+        ("pull_request", "reopened", "open_prs", 3),
+        ("pull_request", "closed", "open_prs", 1),
+        ("pull_request", "edited", "open_prs", 2),
+    ],
+)
+def test_apply_event_open_counts(
+    project_with_repo: Project,
+    event: str,
+    action: str,
+    field: str,
+    expected: int,
+) -> None:
+    """Test issue and pull request events adjust the open counts."""
+    GitHubStats.objects.create(
+        project=project_with_repo, open_issues=2, open_prs=2
+    )
+
+    apply_event(event, payload(action=action))
+
+    stats = GitHubStats.objects.get(project=project_with_repo)
+    assert getattr(stats, field) == expected
+
+
+@pytest.mark.django_db
+def test_apply_event_never_negative(project_with_repo: Project) -> None:
+    """Test a close event never takes an open count below zero."""
+    GitHubStats.objects.create(project=project_with_repo, open_issues=0)
+
+    apply_event("issues", payload(action="closed"))
+
+    assert GitHubStats.objects.get(project=project_with_repo).open_issues == 0
+
+
+@pytest.mark.django_db
+def test_apply_event_ignored(project_with_repo: Project) -> None:
+    """Test unsupported events and unknown repositories are ignored."""
+    assert apply_event("push", payload()) == 0
+    other = payload()
+    other["repository"]["name"] = "unknown"  # type: ignore[index]
+    assert apply_event("star", other) == 0
+    assert not GitHubStats.objects.filter(project=project_with_repo).exists()
+
+
+@pytest.mark.django_db
+def test_webhook_fed_projects_not_polled(project_with_repo: Project) -> None:
+    """Test projects fed by webhooks are skipped until the webhooks stop."""
+    stats = GitHubStats.objects.create(
+        project=project_with_repo, last_webhook_at=timezone.now()
+    )
+    GitHubStats.objects.filter(pk=stats.pk).update(
+        last_updated=timezone.now() - timedelta(days=1)
+    )
+    service = GitHubAPIService()
+
+    assert service.due_for_refresh(timedelta(minutes=30)) == []
+    assert service.due_for_refresh() == []
+
+    GitHubStats.objects.filter(pk=stats.pk).update(
+        last_webhook_at=timezone.now() - timedelta(days=2)
+    )
+    assert service.due_for_refresh(timedelta(minutes=30)) == [project_with_repo]
@@ -33,6 +33,14 @@ def test_filter_projects_url_resolves() -> None:
     assert resolved_view.func == views.filter_projects
 
 
+def test_github_webhook_url_resolves() -> None:
+    """Test resolving and reversing the 'github_webhook' URL."""
+    url_path: str = reverse("github_webhook")
+    assert url_path == "/github/webhook/"
+    resolved_view = resolve(url_path)
+    assert resolved_view.func == views.github_webhook
+
+
 def test_admin_index_url_resolves() -> None:
     """Test resolving and reversing the 'admin:index' URL."""
     url_path: str = reverse("admin:index")
@@ -0,0 +1,95 @@
+"""Tests for the github_webhook view."""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+from django.urls import reverse
+from response_codes import (
+    HTTP_204_NO_CONTENT,
+    HTTP_400_BAD_REQUEST,
+    HTTP_403_FORBIDDEN,
+    HTTP_404_NOT_FOUND,
+    HTTP_405_METHOD_NOT_ALLOWED,
+)
+
+if TYPE_CHECKING:
+    from django.test import Client
+    from django.test.client import _MonkeyPatchedWSGIResponse
+
+SECRET = "webhook-secret"  # noqa: S105
+
+
+def post(
+    client: Client, body: bytes, secret: str = SECRET, event: str = "star"
+) -> _MonkeyPatchedWSGIResponse:
+    """Post a webhook delivery signed with the given secret."""
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return client.post(
+        reverse("github_webhook"),
+        data=body,
+        content_type="application/json",
+        headers={
+            "X-GitHub-Event": event,
+            "X-Hub-Signature-256": f"sha256={digest}",
+        },
+    )
+
+
+@pytest.fixture
+def webhook_secret(settings) -> str:
+    """Configure the webhook secret."""
+    settings.GITHUB_WEBHOOK_SECRET = SECRET
+    return SECRET
+
+
+@pytest.mark.usefixtures("webhook_secret")
+def test_webhook_applies_event(client: Client, mocker) -> None:
+    """Test a signed delivery is passed on to apply_event."""
+    apply_event = mocker.patch("app.views.apply_event")
+    payload = {"action": "created", "repository": {"name": "repo"}}
+
+    response = post(client, json.dumps(payload).encode())
+
+    assert response.status_code == HTTP_204_NO_CONTENT
+    apply_event.assert_called_once_with("star", payload)
+
+
+@pytest.mark.usefixtures("webhook_secret")
+def test_webhook_bad_signature(client: Client, mocker) -> None:
+    """Test a delivery signed with the wrong secret is rejected."""
+    apply_event = mocker.patch("app.views.apply_event")
+
+    response = post(client, b"{}", secret="wrong")  # noqa: S106
+
+    assert response.status_code == HTTP_403_FORBIDDEN
+    apply_event.assert_not_called()
+
+
+@pytest.mark.usefixtures("webhook_secret")
+def test_webhook_invalid_json(client: Client) -> None:
+    """Test a signed delivery that is not JSON is rejected."""
+    response = post(client, b"not json")
+
+    assert response.status_code == HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.usefixtures("webhook_secret")
+def test_webhook_get_not_allowed(client: Client) -> None:
+    """Test the webhook only accepts POST requests."""
+    response = client.get(reverse("github_webhook"))
+
+    assert response.status_code == HTTP_405_METHOD_NOT_ALLOWED
+
+
+def test_webhook_disabled_without_secret(client: Client, settings) -> None:
+    """Test the webhook is disabled when no secret is configured."""
+    settings.GITHUB_WEBHOOK_SECRET = ""
+
+    response = post(client, b"{}")
+
+    assert response.status_code == HTTP_404_NOT_FOUND
@@ -1,11 +1,14 @@
 """Tests for the home view."""
 
+from collections.abc import Callable
 from typing import Any
 
 import pytest
 from django import forms
 from django.contrib.messages import get_messages
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from pytest_django.asserts import assertRedirects, assertTemplateUsed
 from pytest_mock import MockerFixture
@@ -14,9 +17,11 @@ from app.forms import ContactForm
 from app.models import (
     AboutSection,
     ContactSubmission,
-    Project,
+    Job,
     SiteConfiguration,
+    Tag,
 )
+from app.services.jobs import CONTACT_EMAIL_JOB
 
 pytestmark = pytest.mark.django_db
 
@@ -48,8 +53,9 @@ def test_home_view_get(client: Client) -> None:
     assert "form" in response.context
     assert "projects" in response.context
     assert isinstance(response.context["form"], ContactForm)
-    # Check if projects queryset is present (can be empty)
-    assert response.context["projects"].model == Project
+    # Check the first page of projects is present (can be empty)
+    assert response.context["projects"] == []
+    assert not response.context["has_more"]
 
     # Check for sanitized about_sections in context
     assert "about_sections" in response.context
@@ -111,6 +117,35 @@ def test_home_view_post_valid(
     assert ContactSubmission.objects.filter(email="test@example.com").exists()
 
 
+def test_home_view_post_valid_queues_email(
+    client: Client, mocker: MockerFixture, settings
+) -> None:
+    """Test the email is queued for the worker when the job queue is on."""
+    settings.JOB_QUEUE_ENABLED = True
+    SiteConfiguration.objects.get_or_create()
+    mock_send_email = mocker.patch("app.views.EmailService.send_contact_email")
+    mocker.patch(
+        "django_recaptcha.fields.ReCaptchaField.validate", return_value=True
+    )
+
+    response = client.post(
+        reverse("projects"),
+        data={
+            "name": "Test User",
+            "email": "test@example.com",
+            "message": "This is a test message.",
+            "g-recaptcha-response": "test",
+        },
+    )
+
+    assertRedirects(response, reverse("contact_success"), status_code=302)
+    mock_send_email.assert_not_called()
+    submission = ContactSubmission.objects.get(email="test@example.com")
+    job = Job.objects.get()
+    assert job.name == CONTACT_EMAIL_JOB
+    assert job.payload == {"submission_id": submission.pk}
+
+
 def test_home_view_post_invalid(client: Client, mocker: MockerFixture) -> None:
     """Test the home view POST request with invalid data.
 
@@ -238,3 +273,22 @@ def test_home_view_post_invalid_captcha(
     assert not ContactSubmission.objects.filter(
         email="test_captcha_fail@example.com"
     ).exists()
+
+
+def test_home_view_query_count_constant(
+    client: Client, add_projects: Callable[..., None]
+) -> None:
+    """Test the page takes the same number of queries however full it is."""
+    tag = Tag.objects.create(name="Python", slug="python")
+    add_projects(1, tag)
+    # The first request also creates the site configuration
+    client.get(reverse("projects"))
+    with CaptureQueriesContext(connection) as one_project:
+        client.get(reverse("projects"))
+
+    add_projects(5, tag)
+    with CaptureQueriesContext(connection) as full_page:
+        response = client.get(reverse("projects"))
+
+    assert len(response.context["projects"]) == 6
+    assert len(full_page) == len(one_project)
@@ -1,9 +1,13 @@
 """Tests for the load_more_projects view."""
 
+from collections.abc import Callable
+
 import pytest
-from django.db import models
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from pytest_django.asserts import assertTemplateUsed
 
 from app.models import Project, Tag
@@ -48,9 +52,10 @@ def test_load_more_projects_get(
     Checks status code, template used, and context data (paginated projects).
     """
     url = reverse("filter_projects")  # Correct URL name
+    cursor = client.get(url).context["next_cursor"]
     # Simulate an HTMX request by setting the HX-Request header
     # Test loading the second page (assuming default page size is e.g., 6 or 9)
-    response = client.get(url + "?page=2", HTTP_HX_Request="true")
+    response = client.get(url, {"cursor": cursor}, HTTP_HX_Request="true")
 
     assert response.status_code == 200
     # For HTMX requests loading more pages, the specific section template is
@@ -58,11 +63,12 @@ def test_load_more_projects_get(
     assertTemplateUsed(response, "app/_load_more_section.html")
     assert "projects" in response.context
 
-    # For HTMX page > 1 requests, the view passes the QuerySet slice directly
+    # For "Show More" requests, the view passes the page of projects
     projects_queryset = response.context["projects"]
-    assert isinstance(projects_queryset, models.QuerySet), (
-        "Context 'projects' should be a QuerySet for HTMX page > 1"
+    assert isinstance(projects_queryset, list), (
+        "Context 'projects' should be a list for HTMX page > 1"
     )
+    assert response.context["has_more"]
 
     # Check that the projects on this page are correct (depends on ordering)
     # The view orders by priority (nulls last), then created_at.
@@ -95,9 +101,9 @@ def test_load_more_projects_non_htmx(
     assert response.status_code == 200
     assertTemplateUsed(response, "app/_projects_grid.html")
     assert "projects" in response.context
-    # The view passes the QuerySet slice directly, not a Page object
+    # The view passes the page of projects, not a Page object
     projects_queryset = response.context["projects"]
-    assert isinstance(projects_queryset, models.QuerySet)
+    assert isinstance(projects_queryset, list)
     # Check if the first page of projects is present
     expected_project_titles_page_1 = {
         f"Project {i}" for i in range(6)
@@ -121,7 +127,7 @@ def test_filter_projects_get_with_tags(
     assert response.status_code == 200
     assertTemplateUsed(response, "app/_projects_grid.html")
     projects_queryset = response.context["projects"]
-    assert isinstance(projects_queryset, models.QuerySet)
+    assert isinstance(projects_queryset, list)
 
     # Check only projects with 'Python' tag are returned
     # Python projects: 0, 1, 3, 4, 6, 7, 9, 10, 12, 13
@@ -146,6 +152,7 @@ def test_filter_projects_get_with_tags(
     actual_titles = {p.title for p in projects_queryset}
     # Page 1 slice [0:6] returns all 5
     assert actual_titles == expected_titles_py_dj_p1
+    assert not response.context["has_more"]
 
 
 def test_filter_projects_get_htmx_with_tags(
@@ -157,14 +164,18 @@ def test_filter_projects_get_htmx_with_tags(
 
     url = reverse("filter_projects")
     # Filter by Python tag, get page 2
+    cursor = client.get(url, {"tags": python_tag.name}).context["next_cursor"]
     response = client.get(
-        url + f"?tags={python_tag.name}&page=2", HTTP_HX_Request="true"
+        url,
+        {"tags": python_tag.name, "cursor": cursor},
+        HTTP_HX_Request="true",
     )
 
     assert response.status_code == 200
     assertTemplateUsed(response, "app/_load_more_section.html")
     projects_queryset = response.context["projects"]
-    assert isinstance(projects_queryset, models.QuerySet)
+    assert isinstance(projects_queryset, list)
+    assert not response.context["has_more"]
 
     # Check only projects with 'Python' tag are returned
     # Python projects: 0, 1, 3, 4, 6, 7, 9, 10, 12, 13
@@ -172,3 +183,75 @@ def test_filter_projects_get_htmx_with_tags(
     expected_titles_py_p2 = {f"Project {i}" for i in [9, 10, 12, 13]}
     actual_titles = {p.title for p in projects_queryset}
     assert actual_titles == expected_titles_py_p2
+
+
+def test_filter_projects_query_count_constant(
+    client: Client, add_projects: Callable[..., None]
+) -> None:
+    """Test a page takes the same number of queries however full it is."""
+    tag = Tag.objects.create(name="Python", slug="python")
+    url = reverse("filter_projects") + "?tags=Python"
+    add_projects(1, tag)
+    with CaptureQueriesContext(connection) as one_project:
+        client.get(url, HTTP_HX_Request="true")
+
+    add_projects(5, tag)
+    with CaptureQueriesContext(connection) as full_page:
+        response = client.get(url, HTTP_HX_Request="true")
+
+    assert len(response.context["projects"]) == 6
+    assert len(full_page) == len(one_project)
+
+
+def test_filter_projects_pages_through_ties(
+    client: Client, add_projects: Callable[..., None]
+) -> None:
+    """Test every project is shown once, even with equal sort columns."""
+    tag = Tag.objects.create(name="Python", slug="python")
+    add_projects(14, tag)
+    # Give every project the same sort columns, so only the id tells them
+    # apart
+    Project.objects.update(sort_key=1, created_at=timezone.now())
+    url = reverse("filter_projects")
+
+    titles: list[str] = []
+    cursor = ""
+    while True:
+        params = {"cursor": cursor} if cursor else {}
+        response = client.get(url, params, HTTP_HX_Request="true")
+        titles += [project.title for project in response.context["projects"]]
+        cursor = response.context["next_cursor"]
+        if not cursor:
+            break
+
+    assert sorted(titles) == sorted({f"Tagged {i}" for i in range(14)})
+
+
+def test_filter_projects_deep_page_skips_count(
+    client: Client,
+    projects_with_tags: tuple[list[Project], list[Tag]],
+) -> None:
+    """Test a later page is found without OFFSET or COUNT queries."""
+    cursor = client.get(reverse("filter_projects")).context["next_cursor"]
+
+    with CaptureQueriesContext(connection) as queries:
+        client.get(
+            reverse("filter_projects"),
+            {"cursor": cursor},
+            HTTP_HX_Request="true",
+        )
+
+    sql = " ".join(query["sql"] for query in queries).upper()
+    assert "COUNT(" not in sql
+    assert "OFFSET" not in sql
+
+
+def test_filter_projects_invalid_cursor(client: Client) -> None:
+    """Test a cursor that was not made by the view is rejected."""
+    response = client.get(
+        reverse("filter_projects"),
+        {"cursor": "not-a-cursor"},
+        HTTP_HX_Request="true",
+    )
+
+    assert response.status_code == 400